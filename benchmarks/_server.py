@@ -0,0 +1,171 @@
+"""
+Local stand-in server for benchmarks. It speaks HTTP/1.1, and HTTP/2 with
+prior knowledge (h2c), answers every request with a small JSON body after
+a fixed delay which simulates server latency.
+"""
+
+import asyncio
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+
+BODY = b'{"state": true, "desc": "ok"}'
+
+_PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+
+class StandInServer:
+
+    def __init__(self, delay: float = 0.02) -> None:
+        self.delay = delay
+        self.connections = 0
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> 'StandInServer':
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *_):
+        asyncio.run_coroutine_threadsafe(
+            self._shutdown(), self._loop
+        ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/ping'
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', 0)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            head = await reader.readexactly(len(_PREFACE))
+            if head == _PREFACE:
+                await self._serve_h2(head, reader, writer)
+            else:
+                await self._serve_h1(head, reader, writer)
+        except (
+            asyncio.IncompleteReadError, ConnectionError,
+            # Handlers are cancelled on shutdown, end them quietly.
+            asyncio.CancelledError
+        ):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h1(self, head, reader, writer):
+        buffer = head
+        while True:
+            while b'\r\n\r\n' not in buffer:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+            _, buffer = buffer.split(b'\r\n\r\n', 1)
+            await asyncio.sleep(self.delay)
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                b'Content-Length: %d\r\n\r\n%s' % (len(BODY), BODY)
+            )
+            await writer.drain()
+
+    async def _serve_h2(self, head, reader, writer):
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False)
+        )
+        conn.initiate_connection()
+        lock = asyncio.Lock()
+
+        async def respond(stream_id: int):
+            await asyncio.sleep(self.delay)
+            async with lock:
+                conn.send_headers(stream_id, [
+                    (':status', '200'),
+                    ('content-type', 'application/json'),
+                    ('content-length', str(len(BODY))),
+                ])
+                conn.send_data(stream_id, BODY, end_stream=True)
+                writer.write(conn.data_to_send())
+                await writer.drain()
+
+        data = head
+        while data:
+            async with lock:
+                events = conn.receive_data(data)
+                writer.write(conn.data_to_send())
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    asyncio.ensure_future(respond(event.stream_id))
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            await writer.drain()
+            data = await reader.read(65536)
+
+
+class RangeServer(StandInServer):
+    """
+    Serves `data` over HTTP/1.1 with Range support, each connection is
+    throttled to `bandwidth` bytes per second, like a CDN node which limits
+    per-connection speed.
+    """
+
+    def __init__(self, data: bytes, bandwidth: int) -> None:
+        super().__init__(delay=0.0)
+        self.data = data
+        self.bandwidth = bandwidth
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/file'
+
+    async def _serve_h1(self, head, reader, writer):
+        buffer = head
+        while True:
+            while b'\r\n\r\n' not in buffer:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+            request, buffer = buffer.split(b'\r\n\r\n', 1)
+            start, end = 0, len(self.data) - 1
+            for line in request.split(b'\r\n')[1:]:
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'range':
+                    first, _, last = value.strip()[6:].partition(b'-')
+                    start, end = int(first), int(last)
+            writer.write(
+                b'HTTP/1.1 206 Partial Content\r\n'
+                b'Content-Range: bytes %d-%d/%d\r\n'
+                b'Content-Length: %d\r\n\r\n' % (
+                    start, end, len(self.data), end - start + 1
+                )
+            )
+            step = max(self.bandwidth // 20, 1)
+            for offset in range(start, end + 1, step):
+                writer.write(self.data[offset:min(offset + step, end + 1)])
+                await writer.drain()
+                await asyncio.sleep(0.05)
@@ -0,0 +1,52 @@
+"""
+Compare single-connection and multi-connection download throughput of
+Downloader, against a local server which throttles each connection.
+
+Usage: python benchmarks/bench_download.py [size_mb] [bandwidth_mb]
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from py115.downloader import MIN_CHUNK_SIZE, Downloader
+from py115.types import DownloadTicket
+
+from _server import RangeServer
+
+
+def run(url: str, data: bytes, concurrency: int, chunk_size: int) -> float:
+    ticket = DownloadTicket(url, 'file.bin', len(data))
+    sha1 = hashlib.sha1(data).hexdigest().upper()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'file.bin')
+        with Downloader(
+            concurrency=concurrency, chunk_size=chunk_size
+        ) as downloader:
+            start = time.perf_counter()
+            downloader.download(ticket, path, sha1=sha1)
+            return len(data) / (time.perf_counter() - start)
+
+
+def main():
+    size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 \
+        else 16 * 1024 * 1024
+    bandwidth = int(float(sys.argv[2]) * 1024 * 1024) if len(sys.argv) > 2 \
+        else 4 * 1024 * 1024
+    data = os.urandom(size)
+    cases = [
+        ('1 connection', 1, size),
+        ('4 connections', 4, max(size // 8, MIN_CHUNK_SIZE)),
+        ('8 connections', 8, max(size // 16, MIN_CHUNK_SIZE)),
+    ]
+    for name, concurrency, chunk_size in cases:
+        with RangeServer(data, bandwidth) as server:
+            speed = run(server.url, data, concurrency, chunk_size)
+            print(f'{name:16} {speed / 1024 / 1024:8.1f} MB/s, '
+                  f'{server.connections} connections opened')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare API call throughput of AsyncClient over a pooled HTTP/1.1 and a
+multiplexed HTTP/2 connection, against a local stand-in server.
+
+Usage: python benchmarks/bench_http2.py [requests] [concurrency]
+"""
+
+import asyncio
+import sys
+import time
+
+from py115.lowlevel import AsyncClient
+from py115.lowlevel.api._base import JsonApiSpec, JsonResult
+
+from _server import StandInServer
+
+
+class PingApi(JsonApiSpec[str]):
+
+    def __init__(self, url: str) -> None:
+        super().__init__(url)
+
+    def _parse_json_result(self, json_obj: JsonResult) -> str:
+        return json_obj['desc']
+
+
+async def run(url: str, total: int, concurrency: int, **kwargs) -> float:
+    async with AsyncClient(**kwargs) as client:
+        start = time.perf_counter()
+        async for _ in client.iter_many(
+            [PingApi(url) for _ in range(total)], concurrency=concurrency
+        ):
+            pass
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    cases = [
+        ('HTTP/1.1, 10 connections', dict(max_connections=10)),
+        ('HTTP/1.1, 100 connections', dict(
+            max_connections=100, max_keepalive_connections=100
+        )),
+        # Stand-in server is cleartext, so HTTP/2 needs prior knowledge.
+        ('HTTP/2, 1 connection', dict(
+            http2=True, http1=False, max_connections=1
+        )),
+    ]
+    for name, kwargs in cases:
+        with StandInServer() as server:
+            rps = asyncio.run(run(server.url, total, concurrency, **kwargs))
+            print(f'{name:28} {rps:8.0f} req/s, '
+                  f'{server.connections} connections opened')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measure m115 cost: the XOR transform and full encode/decode across payload
+sizes, and building the payload of a bulk offline task request.
+
+Usage: python benchmarks/bench_m115.py [urls]
+"""
+
+import base64
+import sys
+import timeit
+
+from py115._internal.crypto import _xor, m115
+from py115.lowlevel.api import OfflineAddUrlsApi
+from py115.lowlevel.types import CommonParams
+
+
+def _best(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def bench_transform():
+    key = _xor.derive_key(m115.generate_key(), 4)
+    for size in (64, 1024, 16 * 1024, 256 * 1024):
+        data = bytearray(size)
+        cost = _best(lambda: _xor.transform(key, data), 200)
+        print(f'xor transform {size:>8} B {cost * 1e6:10.1f} us')
+
+
+def bench_codec():
+    key = m115.generate_key()
+    for size in (64, 1024, 16 * 1024, 256 * 1024):
+        text = 'x' * size
+        cost = _best(lambda: m115.encode(key, text), 10)
+        print(f'm115 encode   {size:>8} B {cost * 1e3:10.2f} ms')
+    # Decode an encoded text, public exponent is used for both sides.
+    for size in (64, 1024, 16 * 1024):
+        data = base64.b64decode(m115.encode(key, 'x' * size))
+        cost = _best(lambda: m115._cipher.decrypt(data), 10)
+        print(f'rsa decrypt   {size:>8} B {cost * 1e3:10.2f} ms')
+
+
+def bench_offline_add(count: int):
+    cp = CommonParams('27.0.0')
+    cp.set_user_info(1, 'key')
+    urls = [
+        f'magnet:?xt=urn:btih:{index:040x}&dn=file-{index}.mkv'
+        for index in range(count)
+    ]
+    cost = _best(lambda: OfflineAddUrlsApi(cp, urls).payload(), 5)
+    print(f'offline add   {count:>6} urls {cost * 1e3:10.2f} ms')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bench_transform()
+    bench_codec()
+    bench_offline_add(count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure import time of py115 and construction time of clients, each import
+runs in a fresh interpreter.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+
+_IMPORTS = [
+    'import py115',
+    'import py115.lowlevel',
+    'from py115 import Cloud',
+    'from py115.lowlevel import Client',
+]
+
+
+def _import_cost(stmt: str, runs: int) -> float:
+    code = (
+        'import time; start = time.perf_counter(); '
+        f'{stmt}; print(time.perf_counter() - start)'
+    )
+    costs = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', code], env=os.environ
+        )
+        costs.append(float(output))
+    return min(costs)
+
+
+def _construct_cost(runs: int) -> float:
+    from py115.lowlevel import Client
+    costs = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        Client().close()
+        costs.append(time.perf_counter() - start)
+    return min(costs)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for stmt in _IMPORTS:
+        cost = _import_cost(stmt, runs)
+        print(f'{stmt:36} {cost * 1e3:8.1f} ms')
+    print(f'{"Client()":36} {_construct_cost(runs) * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
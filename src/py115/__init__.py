@@ -1,11 +1,91 @@
 __author__ = 'deadblue'
 
-from .cloud import (
-    Cloud, OfflineService, StorageService
-)
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .cloud import (
+        Cloud, OfflineService, StorageService,
+        AsyncCloud, AsyncOfflineService, AsyncStorageService
+    )
+    from .batch import (
+        BatchUploadResult, BatchUploadStats, ImportResult, UploadResult
+    )
+    from .downloader import Downloader, AsyncDownloader
+    from .exceptions import DownloadError, UploadError
+    from .hashcache import HashCache
+    from .hashing import (
+        FileHash, digest_path, hash_files, hash_files_async
+    )
+    from .session import SessionCache, SessionData
+    from .uploader import OssUploader, AsyncOssUploader
+
+# Public names are loaded on first access, so importing the package does 
+# not pull in HTTP and crypto dependencies.
+_LAZY_NAMES = {
+    'Cloud': '.cloud',
+    'OfflineService': '.cloud',
+    'StorageService': '.cloud',
+    'AsyncCloud': '.cloud',
+    'AsyncOfflineService': '.cloud',
+    'AsyncStorageService': '.cloud',
+    'UploadResult': '.batch',
+    'BatchUploadStats': '.batch',
+    'BatchUploadResult': '.batch',
+    'ImportResult': '.batch',
+    'HashCache': '.hashcache',
+    'FileHash': '.hashing',
+    'digest_path': '.hashing',
+    'hash_files': '.hashing',
+    'hash_files_async': '.hashing',
+    'SessionCache': '.session',
+    'SessionData': '.session',
+    'OssUploader': '.uploader',
+    'AsyncOssUploader': '.uploader',
+    'Downloader': '.downloader',
+    'AsyncDownloader': '.downloader',
+    'UploadError': '.exceptions',
+    'DownloadError': '.exceptions',
+}
 
 __all__ = [
     'Cloud',
     'OfflineService',
-    'StorageService'
-]
\ No newline at end of file
+    'StorageService',
+
+    'AsyncCloud',
+    'AsyncOfflineService',
+    'AsyncStorageService',
+
+    'HashCache',
+    'FileHash',
+    'digest_path',
+    'hash_files',
+    'hash_files_async',
+    'SessionCache',
+    'SessionData',
+
+    'OssUploader',
+    'AsyncOssUploader',
+    'Downloader',
+    'AsyncDownloader',
+    'UploadResult',
+    'BatchUploadStats',
+    'BatchUploadResult',
+    'ImportResult',
+    'UploadError',
+    'DownloadError'
+]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_NAMES.get(name, None)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
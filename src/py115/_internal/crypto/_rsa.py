@@ -3,6 +3,14 @@ __author__ = 'deadblue'
 import secrets
 
 
+def _random_nonzero_bytes(size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        # Request a little more than needed, since zero bytes are dropped.
+        buf += secrets.token_bytes(size - len(buf) + 8).replace(b'\x00', b'')
+    return bytes(buf[:size])
+
+
 class Cipher():
 
     def __init__(self, n: bytes, e: int) -> None:
@@ -11,53 +19,39 @@ class Cipher():
         self._key_len = len(n)
 
 
-    def _encrypt_slice(self, segment: bytes) -> bytes:
-        # Make pad
+    def _encrypt_slice(self, segment: memoryview) -> bytes:
+        # Make PKCS#1 v1.5 pad: 0x00 0x02 <non-zero random bytes> 0x00
         pad_size = self._key_len - len(segment)
-        pad_buf = bytearray(pad_size)
-        pad_buf[0], pad_buf[1] = 0, 2
-        for i in range(pad_size - 3):
-            pad_buf[2 + i] = secrets.randbelow(0xff) + 1
-        pad_buf[-1] = 0
-        msg = int.from_bytes(pad_buf + segment, 'big')
+        msg = int.from_bytes(
+            b'\x00\x02' + _random_nonzero_bytes(pad_size - 3) + b'\x00' + segment, 
+            'big'
+        )
         return pow(msg, self._e, self._n).to_bytes(self._key_len, 'big')
 
 
     def encrypt(self, plaintext: bytes) -> bytes:
         ciphertext = bytearray()
-        remain_size = len(plaintext)
-        while remain_size > 0:
-            slice_size = self._key_len - 11
-            if slice_size > remain_size:
-                slice_size = remain_size
-            ciphertext.extend(
-                self._encrypt_slice(plaintext[:slice_size])
+        view, slice_size = memoryview(plaintext), self._key_len - 11
+        for offset in range(0, len(view), slice_size):
+            ciphertext += self._encrypt_slice(
+                view[offset:offset+slice_size]
             )
-            plaintext = plaintext[slice_size:]
-            remain_size -= slice_size
         return bytes(ciphertext)
 
 
-    def _decrypt_slice(self, segment: bytes) -> bytes:
+    def _decrypt_slice(self, segment: memoryview) -> bytes:
         msg = int.from_bytes(segment, 'big')
         ret = pow(msg, self._e, self._n).to_bytes(self._key_len, 'big')
-        for i, b in enumerate(ret):
-            if i != 0 and b == 0:
-                ret = ret[i+1:]
-                break
-        return ret
+        # Strip pad, which ends with the first zero byte after the head.
+        pos = ret.find(0, 1)
+        return ret if pos < 0 else ret[pos+1:]
 
 
     def decrypt(self, ciphertext: bytes) -> bytearray:
         plaintext = bytearray()
-        remain_size = len(ciphertext)
-        while remain_size > 0:
-            slice_size = self._key_len
-            if slice_size > remain_size:
-                slice_size = remain_size
-            plaintext.extend(
-                self._decrypt_slice(ciphertext[:slice_size])
+        view, slice_size = memoryview(ciphertext), self._key_len
+        for offset in range(0, len(view), slice_size):
+            plaintext += self._decrypt_slice(
+                view[offset:offset+slice_size]
             )
-            ciphertext = ciphertext[slice_size:]
-            remain_size -= slice_size
         return plaintext
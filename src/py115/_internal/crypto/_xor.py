@@ -34,12 +34,19 @@ def derive_key(source: bytes, size: int) -> bytes:
     return bytes(key)
 
 
+def _key_stream(key: bytes, size: int) -> bytes:
+    repeat, remain = divmod(size, len(key))
+    return key * repeat + key[:remain]
+
+
 def transform(key: bytes, data: bytearray):
-    key_size, data_size = len(key), len(data)
+    data_size = len(data)
+    if data_size == 0:
+        return
+    # Head bytes which are not aligned to 4 use a key stream of their own, 
+    # rest bytes use another one starting from the key head.
     mod_size = data_size % 4
-    for i in range(data_size):
-        if i < mod_size:
-            data[i] ^= key[i % key_size]
-        else:
-            data[i] ^= key[(i - mod_size) % key_size]
-    return
+    stream = _key_stream(key, mod_size) + _key_stream(key, data_size - mod_size)
+    # XOR whole buffer at once as big integers
+    result = int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')
+    data[:] = result.to_bytes(data_size, 'little')
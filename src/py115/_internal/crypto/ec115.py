@@ -3,11 +3,12 @@ __author__ = 'deadblue'
 import binascii
 import random
 import struct
+import threading
 import time
+from typing import Any, Tuple
 
-from Crypto.Cipher import AES
-from Crypto.PublicKey import ECC
-import lz4.block
+# Crypto and lz4 modules are imported on first use, to keep importing 
+# this module cheap.
 
 _server_pub_key = bytes([
     0x04, 0x57, 0xa2, 0x92, 0x57, 0xcd, 0x23, 0x20, 
@@ -24,23 +25,61 @@ _curve_name = 'P-224'
 
 _crc_salt = b'^j>WD3Kr?J2gLFjD4W2y@'
 
+KEY_SIZE = 28
+
+_TAIL_SIZE = 12
+
+_BLOCK_SIZE = 8192
+
+# Maximum compression ratio of LZ4
+_MAX_RATIO = 255
+
 class Cipher:
+    """
+    Cipher holds the client key and the session key derived from it. It 
+    keeps no per-call state, so one instance can be shared by clients 
+    across threads.
+    """
 
-    def __init__(self) -> None:
+    _private_key: bytes
+
+    def __init__(self, private_key: bytes | None = None) -> None:
+        """
+        Args:
+            private_key (bytes): Client private key exported from another 
+                cipher, a new key is generated when not specified.
+        """
+        from Crypto.PublicKey import ECC
         # Load server public key
         server_key = ECC.import_key(
             encoded=_server_pub_key, curve_name=_curve_name
         )
-        # Generate client key
-        client_key = ECC.generate(curve=_curve_name)
+        if private_key is None:
+            # Generate client key
+            client_key = ECC.generate(curve=_curve_name)
+        else:
+            if len(private_key) != KEY_SIZE:
+                raise ValueError(f'private key must be {KEY_SIZE} bytes')
+            client_key = ECC.construct(
+                curve=_curve_name, d=int.from_bytes(private_key, 'big')
+            )
+        self._private_key = int(client_key.d).to_bytes(KEY_SIZE, 'big')
         # Export client public key
         self._pub_key = b'\x1d' + client_key.public_key().export_key(
             format='SEC1', compress=True
         )
         # ECDH key exchange
-        shared_secret = (server_key.pointQ * client_key.d).x.to_bytes(28, 'big')
+        shared_secret = (server_key.pointQ * client_key.d).x.to_bytes(KEY_SIZE, 'big')
         self._aes_key = shared_secret[:16]
         self._aes_iv = shared_secret[-16:]
+
+    @property
+    def private_key(self) -> bytes:
+        """
+        Client private key, which can be persisted and passed to another 
+        cipher to reuse the session key.
+        """
+        return self._private_key
     
     def encode_token(self) -> str:
         timestamp = int(time.time())
@@ -62,6 +101,7 @@ class Cipher:
         return binascii.b2a_base64(token, newline=False).decode()
 
     def encode(self, data: bytes) -> bytes:
+        from Crypto.Cipher import AES
         pad_size = AES.block_size - len(data) % AES.block_size
         if pad_size != AES.block_size:
             data += b'\x00' * pad_size
@@ -72,30 +112,154 @@ class Cipher:
         )
         return encrypter.encrypt(data)
 
-    def decode(self, data: bytes) -> bytes:
-        ciphertext, tail = data[:-12], bytearray(data[-12:])
-        # Decrypt
+    def decode(self, data: bytes) -> bytearray:
+        return decompress(*self.decrypt(data))
+
+    def decrypt(self, data: bytes) -> Tuple[bytes, bytearray]:
+        """
+        Decrypt an EC-encrypted response body, without decompressing it.
+
+        Returns:
+            Tuple[bytes, bytearray]: Compressed plaintext and the tail, 
+                which are to be passed to `decompress()`.
+        """
+        from Crypto.Cipher import AES
+        if len(data) < _TAIL_SIZE:
+            raise ValueError('EC response is too short')
+        view = memoryview(data)
+        ciphertext, tail = view[:-_TAIL_SIZE], bytearray(view[-_TAIL_SIZE:])
         decrypter = AES.new(
             key = self._aes_key, 
             mode = AES.MODE_CBC, 
             iv = self._aes_iv
         )
-        plaintext = decrypter.decrypt(ciphertext)
-        # Get uncompress size
-        for i in range(4):
-            tail[i] = tail[i] ^ tail[7]
-        dst_size, = struct.unpack('<I', tail[:4])
-        # Decompress
-        buf = []
-        while dst_size > 0:
-            uncompressed_size = dst_size
-            if uncompressed_size > 8192:
-                uncompressed_size = 8192
-            src_size, = struct.unpack('<H', plaintext[:2])
-            buf.append(lz4.block.decompress(
-                plaintext[2:src_size+2], uncompressed_size
-            ))
-            # Move to next block
-            plaintext = plaintext[src_size+2:]
-            dst_size -= uncompressed_size
-        return buf[0] if len(buf) == 0 else b''.join(buf)
+        return decrypter.decrypt(ciphertext), tail
+
+    def decoder(self) -> 'Decoder':
+        """
+        Create a decoder which decodes response body incrementally.
+        """
+        return Decoder(self._aes_key, self._aes_iv)
+
+
+class Decoder:
+    """
+    Decoder decodes an EC-encrypted response body which is fed in chunks, 
+    so decryption and decompression overlap with network reading.
+    """
+
+    _decrypter: Any
+    _pending: bytearray
+    _plaintext: bytearray
+    _output: bytearray
+
+    def __init__(self, aes_key: bytes, aes_iv: bytes) -> None:
+        from Crypto.Cipher import AES
+        self._decrypter = AES.new(key=aes_key, mode=AES.MODE_CBC, iv=aes_iv)
+        self._pending = bytearray()
+        self._plaintext = bytearray()
+        self._output = bytearray()
+
+    def _decompress(self, dst_size: int | None):
+        view, pos = memoryview(self._plaintext), 0
+        try:
+            while len(view) - pos >= 2:
+                src_size, = struct.unpack_from('<H', view, pos)
+                if src_size == 0 or len(view) - pos - 2 < src_size:
+                    # Zero padding or incomplete block
+                    break
+                block_size = _BLOCK_SIZE
+                if dst_size is not None:
+                    block_size = min(block_size, dst_size - len(self._output))
+                    if block_size <= 0:
+                        break
+                block, pos = _decompress_block(view, pos, block_size)
+                self._output += block
+        finally:
+            view.release()
+        del self._plaintext[:pos]
+
+    def feed(self, data: bytes):
+        """
+        Feed a chunk of response body.
+        """
+        self._pending += data
+        # Tail is kept until all data is fed.
+        ready_size = len(self._pending) - _TAIL_SIZE
+        ready_size -= ready_size % 16
+        if ready_size > 0:
+            with memoryview(self._pending) as view:
+                self._plaintext += self._decrypter.decrypt(view[:ready_size])
+            del self._pending[:ready_size]
+            self._decompress(None)
+
+    def finish(self) -> bytearray:
+        """
+        Finish decoding and get decoded data.
+        """
+        if len(self._pending) < _TAIL_SIZE:
+            raise ValueError('EC response is too short')
+        ciphertext, tail = self._pending[:-_TAIL_SIZE], self._pending[-_TAIL_SIZE:]
+        if ciphertext:
+            self._plaintext += self._decrypter.decrypt(ciphertext)
+        dst_size = _get_uncompress_size(tail)
+        self._decompress(dst_size)
+        if len(self._output) != dst_size:
+            raise ValueError('EC response is corrupted')
+        return self._output
+
+
+def decompress(plaintext: bytes, tail: bytearray) -> bytearray:
+    """
+    Decompress plaintext from `Cipher.decrypt()`. It needs no key, so it 
+    can run in another process.
+    """
+    plaintext = memoryview(plaintext)
+    # Get uncompress size
+    dst_size = _get_uncompress_size(bytearray(tail))
+    if dst_size > len(plaintext) * _MAX_RATIO:
+        raise ValueError('EC response is corrupted')
+    # Decompress into output buffer
+    output = bytearray(dst_size)
+    src_pos = dst_pos = 0
+    while dst_pos < dst_size:
+        block, src_pos = _decompress_block(
+            plaintext, src_pos, min(_BLOCK_SIZE, dst_size - dst_pos)
+        )
+        output[dst_pos:dst_pos+len(block)] = block
+        dst_pos += len(block)
+    return output
+
+
+def _get_uncompress_size(tail: bytearray) -> int:
+    for i in range(4):
+        tail[i] = tail[i] ^ tail[7]
+    dst_size, = struct.unpack('<I', tail[:4])
+    return dst_size
+
+
+def _decompress_block(
+        plaintext: memoryview, pos: int, uncompressed_size: int
+    ) -> Tuple[bytes, int]:
+    import lz4.block
+    src_size, = struct.unpack_from('<H', plaintext, pos)
+    block = lz4.block.decompress(
+        plaintext[pos+2:pos+2+src_size], uncompressed_size
+    )
+    return block, pos + 2 + src_size
+
+
+_shared: Cipher | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cipher() -> Cipher:
+    """
+    Get the process-wide cipher, which is created on first call.
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = Cipher()
+    return _shared
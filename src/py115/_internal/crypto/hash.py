@@ -2,8 +2,15 @@ __author__ = 'deadblue'
 
 import hashlib
 import io
+import mmap
+import os
+import stat
+import tempfile
 from dataclasses import dataclass
-from typing import BinaryIO
+from typing import BinaryIO, Tuple
+
+
+_CHUNK_SIZE = 1024 * 1024
 
 
 @dataclass
@@ -12,12 +19,64 @@ class DigestResult:
     size: int
 
 
+def _map_file(stream: BinaryIO) -> mmap.mmap | None:
+    """
+    Map the file behind stream into memory, returns None when stream is not 
+    a regular file.
+    """
+    try:
+        fd = stream.fileno()
+        st = os.fstat(fd)
+    except (AttributeError, OSError, ValueError):
+        return None
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        return None
+    try:
+        return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _update(h, stream: BinaryIO, length: int | None) -> int:
+    """
+    Feed at most `length` bytes from stream to hash object, or all remaining
+    bytes when length is None. Returns number of bytes fed.
+    """
+    buf = bytearray(_CHUNK_SIZE)
+    view = memoryview(buf)
+    readinto = getattr(stream, 'readinto', None)
+    total = 0
+    while length is None or total < length:
+        size = _CHUNK_SIZE if length is None else min(_CHUNK_SIZE, length - total)
+        if readinto is not None:
+            n = readinto(view[:size])
+            if not n:
+                break
+            h.update(view[:n])
+        else:
+            data = stream.read(size)
+            if not data:
+                break
+            n = len(data)
+            h.update(data)
+        total += n
+    return total
+
+
 def digest(stream: BinaryIO) -> DigestResult:
-    h = hashlib.sha1(
-        stream.read()
-    ).hexdigest().upper()
+    h = hashlib.sha1()
+    mm = _map_file(stream)
+    if mm is not None:
+        with mm:
+            pos = stream.tell()
+            with memoryview(mm) as view:
+                h.update(view[pos:])
+            # Leave stream at the end, as reading does.
+            stream.seek(0, io.SEEK_END)
+    else:
+        _update(h, stream, None)
     return DigestResult(
-        sha1=h, size=stream.tell()
+        sha1=h.hexdigest().upper(), size=stream.tell()
     )
 
 
@@ -27,7 +86,90 @@ def digest_range(stream: BinaryIO, range_spec: str) -> str:
         return None
     offset = int(tmp[0])
     length = int(tmp[1]) - offset + 1
-    stream.seek(offset, io.SEEK_SET)
-    return hashlib.sha1(
-        stream.read(length)
-    ).hexdigest().upper()
+    h = hashlib.sha1()
+    mm = _map_file(stream)
+    if mm is not None:
+        with mm:
+            with memoryview(mm) as view:
+                h.update(view[offset:offset+length])
+            stream.seek(min(offset + length, len(mm)), io.SEEK_SET)
+    else:
+        stream.seek(offset, io.SEEK_SET)
+        _update(h, stream, length)
+    return h.hexdigest().upper()
+
+
+class Spooler:
+    """
+    Spooler stores data into memory, or into a temporary file once it 
+    exceeds the threshold, and calculates SHA-1 in the same pass.
+    """
+
+    _h: 'hashlib._Hash'
+    _max_memory: int
+    _file: BinaryIO
+    _size: int
+
+    def __init__(self, max_memory: int) -> None:
+        self._h = hashlib.sha1()
+        self._max_memory = max_memory
+        self._file = io.BytesIO()
+        self._size = 0
+
+    def write(self, data: bytes | memoryview):
+        if isinstance(self._file, io.BytesIO) and \
+            self._size + len(data) > self._max_memory:
+            tmp = tempfile.TemporaryFile()
+            try:
+                with self._file.getbuffer() as view:
+                    tmp.write(view)
+            except BaseException:
+                tmp.close()
+                raise
+            self._file.close()
+            self._file = tmp
+        self._h.update(data)
+        self._file.write(data)
+        self._size += len(data)
+
+    def finish(self) -> Tuple[BinaryIO, DigestResult]:
+        """
+        Returns spooled data as a seekable stream at the beginning, and its 
+        digest result. Caller should close the stream.
+        """
+        self._file.seek(0, io.SEEK_SET)
+        return self._file, DigestResult(
+            sha1=self._h.hexdigest().upper(), size=self._size
+        )
+
+    def close(self):
+        self._file.close()
+
+
+def digest_spool(
+        stream: BinaryIO, max_memory: int
+    ) -> Tuple[BinaryIO, DigestResult]:
+    """
+    Read all remaining data from stream, which does not need to be 
+    seekable, into a spool while calculating its SHA-1.
+    """
+    spooler = Spooler(max_memory)
+    try:
+        buf = bytearray(_CHUNK_SIZE)
+        view = memoryview(buf)
+        readinto = getattr(stream, 'readinto', None)
+        while True:
+            if readinto is not None:
+                n = readinto(view)
+                if not n:
+                    break
+                spooler.write(view[:n])
+            else:
+                data = stream.read(_CHUNK_SIZE)
+                if not data:
+                    break
+                spooler.write(data)
+    except BaseException:
+        spooler.close()
+        raise
+    return spooler.finish()
@@ -2,12 +2,34 @@ __author__ = 'deadblue'
 
 import json
 import base64
-from typing import Dict
+import hashlib
+import hmac
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import quote, urlsplit
 
 REGION = 'cn-shenzhen'
 
 ENDPOINT='https://oss-cn-shenzhen.aliyuncs.com'
 
+# Query parameters which are signed in OSS V1 signature, others such as 
+# "part-number-marker" are sent but not signed.
+SUB_RESOURCES = frozenset([
+    'acl', 'append', 'bucketInfo', 'callback', 'callback-var', 'comp', 
+    'cors', 'delete', 'encryption', 'endTime', 'group', 'lifecycle', 
+    'link', 'live', 'location', 'logging', 'objectInfo', 'objectMeta', 
+    'partNumber', 'policy', 'position', 'qos', 'referer', 
+    'replication', 'replicationLocation', 'replicationProgress', 
+    'requestPayment', 'response-cache-control', 
+    'response-content-disposition', 'response-content-encoding', 
+    'response-content-language', 'response-content-type', 
+    'response-expires', 'restore', 'security-token', 'sequential', 
+    'startTime', 'stat', 'status', 'symlink', 'tagging', 'uploadId', 
+    'uploads', 'versionId', 'versioning', 'versions', 'vod', 'website', 
+    'x-oss-process', 'x-oss-traffic-limit',
+])
+
 
 def replace_callback_sha1(callback: str, file_sha1: str) -> str:
     cb_obj = json.loads(callback)
@@ -17,3 +39,110 @@ def replace_callback_sha1(callback: str, file_sha1: str) -> str:
 
 def encode_header_value(v: str) -> str:
     return base64.b64encode(v.encode()).decode()
+
+
+def make_url(
+        endpoint: str, 
+        bucket: str, 
+        object_key: str, 
+        path_style: bool = False
+    ) -> str:
+    """
+    Make object URL, in virtual-hosted style unless `path_style` is set.
+    """
+    parts = urlsplit(endpoint)
+    path = quote(object_key, safe='/')
+    if path_style:
+        return f'{parts.scheme}://{parts.netloc}/{bucket}/{path}'
+    return f'{parts.scheme}://{bucket}.{parts.netloc}/{path}'
+
+
+def sign_headers(
+        method: str,
+        bucket: str,
+        object_key: str,
+        sub_resources: Dict[str, str | None],
+        headers: Dict[str, str],
+        access_key_id: str,
+        access_key_secret: str
+    ) -> Dict[str, str]:
+    """
+    Add "Date" and "Authorization" headers with OSS V1 signature. Date is 
+    kept when it is already in headers.
+
+    Args:
+        sub_resources (Dict[str, str]): Query parameters of the request, 
+            only those in `SUB_RESOURCES` are signed.
+    """
+    headers.setdefault('Date', formatdate(usegmt=True))
+    string_to_sign = make_string_to_sign(
+        method, bucket, object_key, sub_resources, headers
+    )
+    signature = base64.b64encode(hmac.new(
+        access_key_secret.encode(), string_to_sign.encode(), hashlib.sha1
+    ).digest()).decode()
+    headers['Authorization'] = f'OSS {access_key_id}:{signature}'
+    return headers
+
+
+def make_string_to_sign(
+        method: str,
+        bucket: str,
+        object_key: str,
+        sub_resources: Dict[str, str | None],
+        headers: Dict[str, str]
+    ) -> str:
+    oss_headers = sorted(
+        (k.lower(), v.strip()) for k, v in headers.items() 
+        if k.lower().startswith('x-oss-')
+    )
+    resource = f'/{bucket}/{object_key}'
+    signed = sorted(
+        (k, v) for k, v in sub_resources.items() if k in SUB_RESOURCES
+    )
+    if signed:
+        resource += '?' + '&'.join(
+            k if v is None else f'{k}={v}' for k, v in signed
+        )
+    return '\n'.join([
+        method,
+        headers.get('Content-MD5', ''),
+        headers.get('Content-Type', ''),
+        headers['Date'],
+        ''.join(f'{k}:{v}\n' for k, v in oss_headers) + resource
+    ])
+
+
+def parse_upload_id(body: bytes) -> str:
+    return ET.fromstring(body).findtext('UploadId')
+
+
+def parse_list_parts(body: bytes) -> Tuple[List[Tuple[int, int, str]], str | None]:
+    """
+    Parse ListParts result.
+
+    Returns:
+        Tuple: Uploaded parts as (part_number, size, etag), and marker for 
+            next page, None when there are no more parts.
+    """
+    root = ET.fromstring(body)
+    parts = [
+        (
+            int(el.findtext('PartNumber')),
+            int(el.findtext('Size')),
+            el.findtext('ETag')
+        ) for el in root.iter('Part')
+    ]
+    marker = None
+    if root.findtext('IsTruncated') == 'true':
+        marker = root.findtext('NextPartNumberMarker')
+    return parts, marker
+
+
+def make_complete_body(parts: Iterable[Tuple[int, str]]) -> bytes:
+    root = ET.Element('CompleteMultipartUpload')
+    for part_number, etag in sorted(parts):
+        part = ET.SubElement(root, 'Part')
+        ET.SubElement(part, 'PartNumber').text = str(part_number)
+        ET.SubElement(part, 'ETag').text = etag
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
@@ -0,0 +1,755 @@
+__author__ = 'deadblue'
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+)
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, BinaryIO, Callable, 
+    Dict, Iterable, Iterator, List, Set, Tuple
+)
+
+from py115._internal.crypto.hash import digest_range
+from py115.exceptions import UploadError
+from py115.hashcache import HashCache
+from py115.hashing import FileHash, digest_path
+from py115.types import UploadTicket
+from py115.uploader import AsyncOssUploader, OssUploader
+
+if TYPE_CHECKING:
+    from py115.cloud import AsyncStorageService, StorageService
+
+
+DEFAULT_HASH_WORKERS = 4
+DEFAULT_INIT_WORKERS = 4
+DEFAULT_TRANSFER_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 32
+
+_POLL_INTERVAL = 0.1
+
+UploadEntry = Tuple[str, str]
+"""Upload entry of a remote directory ID and a local file path."""
+
+
+@dataclass
+class UploadResult:
+    """
+    UploadResult is the result of uploading a local file in batch.
+    """
+
+    dir_id: str
+    """Remote directory ID to save the file."""
+
+    path: str
+    """Local file path."""
+
+    size: int = 0
+    """File size in bytes."""
+
+    sha1: str | None = None
+    """Upper-case hex SHA-1 of the file."""
+
+    pickcode: str | None = None
+    """Pickcode of the uploaded file, None when cloud does not return it."""
+
+    rapid: bool = False
+    """Whether the file is rapid-uploaded without transfer."""
+
+    error: Exception | None = None
+    """Error raised when uploading the file."""
+
+
+@dataclass
+class BatchUploadStats:
+    """
+    BatchUploadStats contains aggregate statistics of a batch upload.
+    """
+
+    files: int = 0
+    """Number of processed files."""
+
+    rapid_files: int = 0
+    """Number of rapid-uploaded files."""
+
+    transferred_files: int = 0
+    """Number of files transferred to cloud storage."""
+
+    failed_files: int = 0
+    """Number of failed files."""
+
+    hashed_bytes: int = 0
+    """Total size of hashed files."""
+
+    transferred_bytes: int = 0
+    """Total size of transferred files."""
+
+    hash_seconds: float = 0
+    """Busy time of hashing stage, summed over its workers."""
+
+    init_seconds: float = 0
+    """Busy time of upload init stage, summed over its workers."""
+
+    transfer_seconds: float = 0
+    """Busy time of transfer stage, summed over its workers."""
+
+    elapsed: float = 0
+    """Wall-clock time of the whole batch."""
+
+    @property
+    def hash_throughput(self) -> float:
+        """Hashed bytes per second of wall-clock time."""
+        return self.hashed_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def transfer_throughput(self) -> float:
+        """Transferred bytes per second of wall-clock time."""
+        return self.transferred_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class BatchUploadResult:
+    """
+    BatchUploadResult is the result of a batch upload.
+    """
+
+    results: List[UploadResult] = field(default_factory=list)
+    """Results of all files, in order of completion."""
+
+    stats: BatchUploadStats = field(default_factory=BatchUploadStats)
+    """Aggregate statistics."""
+
+
+ResultHook = Callable[[UploadResult], None]
+"""Hook to receive result of every file as soon as it is done."""
+
+RangeReader = Callable[[], BinaryIO]
+"""
+Callback to open a seekable stream of the content, it is called only when 
+cloud requests a sign check.
+"""
+
+ImportEntry = Tuple[str, str, int, str, RangeReader | None]
+"""
+Import entry of remote directory ID, file name, size, SHA-1 and range 
+reader of the content.
+"""
+
+
+@dataclass
+class ImportResult:
+    """
+    ImportResult is the result of importing a file by its hash.
+    """
+
+    dir_id: str
+    """Remote directory ID to save the file."""
+
+    name: str
+    """File name to save on cloud."""
+
+    size: int
+    """File size in bytes."""
+
+    sha1: str
+    """Upper-case hex SHA-1 of the file."""
+
+    pickcode: str | None = None
+    """Pickcode of the created file."""
+
+    ticket: UploadTicket | None = None
+    """Upload ticket when the content is unknown to cloud, and needs to be 
+    transferred."""
+
+    error: Exception | None = None
+    """Error raised when importing the file."""
+
+    @property
+    def created(self) -> bool:
+        """Whether the file is created on cloud by rapid upload."""
+        return self.pickcode is not None
+
+
+class _Job:
+
+    __slots__ = ('result', 'hash', 'ticket')
+
+    def __init__(self, dir_id: str, path: str) -> None:
+        self.result = UploadResult(dir_id=dir_id, path=path)
+        self.hash: FileHash | None = None
+        self.ticket: UploadTicket | None = None
+
+
+class _Done:
+    pass
+
+
+_DONE = _Done()
+
+
+def _check_workers(**workers: int):
+    for name, value in workers.items():
+        if value < 1:
+            raise ValueError(f'{name} must be at least 1')
+
+
+def _get_pickcode(callback_result: Dict[str, Any]) -> str | None:
+    data = callback_result.get('data', None)
+    if isinstance(data, dict):
+        return data.get('pick_code', None)
+    return None
+
+
+def _add_result(result: BatchUploadResult, item: UploadResult):
+    result.results.append(item)
+    stats = result.stats
+    stats.files += 1
+    if item.error is not None:
+        stats.failed_files += 1
+    elif item.rapid:
+        stats.rapid_files += 1
+    else:
+        stats.transferred_files += 1
+
+
+class _Pipeline:
+    """
+    Runs hashing, upload init and transfer as stages with their own worker
+    threads, connected by bounded queues.
+    """
+
+    _storage: 'StorageService'
+    _uploader: OssUploader
+    _stop: threading.Event
+    _lock: threading.Lock
+    _stats: BatchUploadStats
+    _results: queue.Queue
+
+    def __init__(
+            self,
+            storage: 'StorageService',
+            uploader: OssUploader
+        ) -> None:
+        self._storage = storage
+        self._uploader = uploader
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = BatchUploadStats()
+        self._results = queue.Queue()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _count(self, name: str, seconds: float, size: int = 0):
+        with self._lock:
+            setattr(self._stats, f'{name}_seconds',
+                getattr(self._stats, f'{name}_seconds') + seconds)
+            if name == 'hash':
+                self._stats.hashed_bytes += size
+            elif name == 'transfer':
+                self._stats.transferred_bytes += size
+
+    def _finish(self, job: _Job, error: Exception | None = None):
+        job.result.error = error
+        self._results.put(job.result)
+
+    def _hash(self, job: _Job) -> bool:
+        start = time.monotonic()
+        try:
+            job.hash = digest_path(
+                job.result.path, self._storage.hash_cache
+            )
+        except Exception as e:
+            self._finish(job, e)
+            return False
+        finally:
+            size = 0 if job.hash is None else job.hash.size
+            self._count('hash', time.monotonic() - start, size)
+        job.result.size, job.result.sha1 = job.hash.size, job.hash.sha1
+        return True
+
+    def _init(self, job: _Job) -> bool:
+        start = time.monotonic()
+        try:
+            # File is hashed again when it has been changed after hashing.
+            ret = self._storage.request_upload(
+                job.result.dir_id, job.result.path, job.hash
+            )
+        except Exception as e:
+            self._finish(job, e)
+            return False
+        finally:
+            self._count('init', time.monotonic() - start)
+        if isinstance(ret, UploadTicket):
+            job.ticket = ret
+            return True
+        job.result.pickcode, job.result.rapid = ret, True
+        self._finish(job)
+        return False
+
+    def _transfer(self, job: _Job) -> bool:
+        start, size = time.monotonic(), 0
+        try:
+            with open(job.result.path, 'rb') as fp:
+                size = os.fstat(fp.fileno()).st_size
+                ret = self._uploader.upload(job.ticket, fp)
+            job.result.pickcode = _get_pickcode(ret)
+            self._finish(job)
+        except Exception as e:
+            size = 0
+            self._finish(job, e)
+        finally:
+            self._count('transfer', time.monotonic() - start, size)
+        return False
+
+    def _feed(self, entries: Iterable[UploadEntry], out_q: queue.Queue):
+        for dir_id, path in entries:
+            if not self._put(out_q, _Job(dir_id, path)):
+                return
+
+    def _start_stage(
+            self,
+            name: str,
+            workers: int,
+            work: Callable[[_Job], bool],
+            in_q: queue.Queue,
+            out_q: queue.Queue | None,
+            out_workers: int
+        ) -> List[threading.Thread]:
+        remain = [workers]
+
+        def run():
+            try:
+                while True:
+                    job = self._get(in_q)
+                    if job is _DONE:
+                        break
+                    if work(job) and out_q is not None:
+                        if not self._put(out_q, job):
+                            break
+            finally:
+                with self._lock:
+                    remain[0] -= 1
+                    last = remain[0] == 0
+                if last:
+                    if out_q is None:
+                        # All results have been put before this.
+                        self._results.put(_DONE)
+                    else:
+                        for _ in range(out_workers):
+                            self._put(out_q, _DONE)
+
+        threads = [
+            threading.Thread(
+                target=run, name=f'py115-batch-{name}-{i}', daemon=True
+            ) for i in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        return threads
+
+    def run(
+            self,
+            entries: Iterable[UploadEntry],
+            hash_workers: int,
+            init_workers: int,
+            transfer_workers: int,
+            queue_size: int,
+            on_result: ResultHook | None
+        ) -> BatchUploadResult:
+        hash_q = queue.Queue(queue_size)
+        init_q = queue.Queue(queue_size)
+        transfer_q = queue.Queue(queue_size)
+        start = time.monotonic()
+        threads = []
+        threads += self._start_stage(
+            'hash', hash_workers, self._hash, hash_q, init_q, init_workers
+        )
+        threads += self._start_stage(
+            'init', init_workers, self._init, init_q, transfer_q,
+            transfer_workers
+        )
+        threads += self._start_stage(
+            'transfer', transfer_workers, self._transfer, transfer_q, None, 0
+        )
+        result = BatchUploadResult(stats=self._stats)
+        try:
+            try:
+                self._feed(entries, hash_q)
+            finally:
+                for _ in range(hash_workers):
+                    self._put(hash_q, _DONE)
+            while True:
+                item = self._results.get()
+                if item is _DONE:
+                    break
+                _add_result(result, item)
+                if on_result is not None:
+                    on_result(item)
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+        self._stats.elapsed = time.monotonic() - start
+        return result
+
+
+def upload_files(
+        storage: 'StorageService',
+        entries: Iterable[UploadEntry],
+        *,
+        hash_workers: int = DEFAULT_HASH_WORKERS,
+        init_workers: int = DEFAULT_INIT_WORKERS,
+        transfer_workers: int = DEFAULT_TRANSFER_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        uploader: OssUploader | None = None,
+        on_result: ResultHook | None = None
+    ) -> BatchUploadResult:
+    _check_workers(
+        hash_workers=hash_workers,
+        init_workers=init_workers,
+        transfer_workers=transfer_workers,
+        queue_size=queue_size
+    )
+    own_uploader = uploader is None
+    if own_uploader:
+        uploader = OssUploader(renew_ticket=storage.renew_ticket)
+    try:
+        return _Pipeline(storage, uploader).run(
+            entries, hash_workers, init_workers, transfer_workers,
+            queue_size, on_result
+        )
+    finally:
+        if own_uploader:
+            uploader.close()
+
+
+class _AsyncPipeline:
+    """
+    Asynchronous version of `_Pipeline`, stages run as tasks and hashing runs
+    in threads.
+    """
+
+    _storage: 'AsyncStorageService'
+    _uploader: AsyncOssUploader
+    _stats: BatchUploadStats
+    _results: asyncio.Queue
+
+    def __init__(
+            self,
+            storage: 'AsyncStorageService',
+            uploader: AsyncOssUploader
+        ) -> None:
+        self._storage = storage
+        self._uploader = uploader
+        self._stats = BatchUploadStats()
+        self._results = asyncio.Queue()
+
+    def _finish(self, job: _Job, error: Exception | None = None):
+        job.result.error = error
+        self._results.put_nowait(job.result)
+
+    async def _hash(self, job: _Job) -> bool:
+        start = time.monotonic()
+        try:
+            job.hash = await asyncio.to_thread(
+                digest_path, job.result.path, self._storage.hash_cache
+            )
+        except Exception as e:
+            self._finish(job, e)
+            return False
+        finally:
+            self._stats.hash_seconds += time.monotonic() - start
+        self._stats.hashed_bytes += job.hash.size
+        job.result.size, job.result.sha1 = job.hash.size, job.hash.sha1
+        return True
+
+    async def _init(self, job: _Job) -> bool:
+        start = time.monotonic()
+        try:
+            # File is hashed again when it has been changed after hashing.
+            ret = await self._storage.request_upload(
+                job.result.dir_id, job.result.path, job.hash
+            )
+        except Exception as e:
+            self._finish(job, e)
+            return False
+        finally:
+            self._stats.init_seconds += time.monotonic() - start
+        if isinstance(ret, UploadTicket):
+            job.ticket = ret
+            return True
+        job.result.pickcode, job.result.rapid = ret, True
+        self._finish(job)
+        return False
+
+    async def _transfer(self, job: _Job) -> bool:
+        start = time.monotonic()
+        try:
+            fp = await asyncio.to_thread(open, job.result.path, 'rb')
+            try:
+                size = os.fstat(fp.fileno()).st_size
+                ret = await self._uploader.upload(job.ticket, fp)
+            finally:
+                fp.close()
+            job.result.pickcode = _get_pickcode(ret)
+            self._stats.transferred_bytes += size
+            self._finish(job)
+        except Exception as e:
+            self._finish(job, e)
+        finally:
+            self._stats.transfer_seconds += time.monotonic() - start
+        return False
+
+    async def _feed(
+            self,
+            entries: Iterable[UploadEntry] | AsyncIterable[UploadEntry],
+            out_q: asyncio.Queue
+        ):
+        if isinstance(entries, AsyncIterable):
+            async for dir_id, path in entries:
+                await out_q.put(_Job(dir_id, path))
+        else:
+            for dir_id, path in entries:
+                await out_q.put(_Job(dir_id, path))
+
+    def _start_stage(
+            self,
+            workers: int,
+            work: Callable,
+            in_q: asyncio.Queue,
+            out_q: asyncio.Queue | None,
+            out_workers: int
+        ) -> List[asyncio.Task]:
+        remain = [workers]
+
+        async def run():
+            while True:
+                job = await in_q.get()
+                if job is _DONE:
+                    break
+                if await work(job) and out_q is not None:
+                    await out_q.put(job)
+            remain[0] -= 1
+            if remain[0] == 0:
+                if out_q is None:
+                    self._results.put_nowait(_DONE)
+                else:
+                    for _ in range(out_workers):
+                        await out_q.put(_DONE)
+
+        return [asyncio.create_task(run()) for _ in range(workers)]
+
+    async def run(
+            self,
+            entries: Iterable[UploadEntry] | AsyncIterable[UploadEntry],
+            hash_workers: int,
+            init_workers: int,
+            transfer_workers: int,
+            queue_size: int,
+            on_result: ResultHook | None
+        ) -> BatchUploadResult:
+        hash_q = asyncio.Queue(queue_size)
+        init_q = asyncio.Queue(queue_size)
+        transfer_q = asyncio.Queue(queue_size)
+        start = time.monotonic()
+        tasks = []
+        tasks += self._start_stage(
+            hash_workers, self._hash, hash_q, init_q, init_workers
+        )
+        tasks += self._start_stage(
+            init_workers, self._init, init_q, transfer_q, transfer_workers
+        )
+        tasks += self._start_stage(
+            transfer_workers, self._transfer, transfer_q, None, 0
+        )
+        result = BatchUploadResult(stats=self._stats)
+        try:
+            await self._feed(entries, hash_q)
+            for _ in range(hash_workers):
+                await hash_q.put(_DONE)
+            while True:
+                item = await self._results.get()
+                if item is _DONE:
+                    break
+                _add_result(result, item)
+                if on_result is not None:
+                    on_result(item)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._stats.elapsed = time.monotonic() - start
+        return result
+
+
+async def upload_files_async(
+        storage: 'AsyncStorageService',
+        entries: Iterable[UploadEntry] | AsyncIterable[UploadEntry],
+        *,
+        hash_workers: int = DEFAULT_HASH_WORKERS,
+        init_workers: int = DEFAULT_INIT_WORKERS,
+        transfer_workers: int = DEFAULT_TRANSFER_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        uploader: AsyncOssUploader | None = None,
+        on_result: ResultHook | None = None
+    ) -> BatchUploadResult:
+    _check_workers(
+        hash_workers=hash_workers,
+        init_workers=init_workers,
+        transfer_workers=transfer_workers,
+        queue_size=queue_size
+    )
+    own_uploader = uploader is None
+    if own_uploader:
+        uploader = AsyncOssUploader(renew_ticket=storage.renew_ticket)
+    try:
+        return await _AsyncPipeline(storage, uploader).run(
+            entries, hash_workers, init_workers, transfer_workers,
+            queue_size, on_result
+        )
+    finally:
+        if own_uploader:
+            await uploader.aclose()
+
+
+def _read_range(
+        hash_cache: HashCache | None,
+        reader: RangeReader | None,
+        range_spec: str
+    ) -> str:
+    if reader is None:
+        raise UploadError(
+            'Sign check is requested, but content is unavailable!'
+        )
+    with reader() as stream:
+        if hash_cache is None:
+            return digest_range(stream, range_spec)
+        return hash_cache.digest_range(stream, range_spec)
+
+
+def _make_import_result(
+        entry: ImportEntry
+    ) -> Tuple[ImportResult, RangeReader | None]:
+    dir_id, name, size, sha1, reader = entry
+    return ImportResult(dir_id, name, size, sha1.upper()), reader
+
+
+def _fill_import_result(result: ImportResult, ret: str | UploadTicket):
+    if isinstance(ret, UploadTicket):
+        result.ticket = ret
+    else:
+        result.pickcode = ret
+
+
+def _import_file(storage: 'StorageService', entry: ImportEntry) -> ImportResult:
+    result, reader = _make_import_result(entry)
+    try:
+        _fill_import_result(result, storage.import_file(
+            result.dir_id, result.name, result.size, result.sha1,
+            lambda range_spec: _read_range(
+                storage.hash_cache, reader, range_spec
+            )
+        ))
+    except Exception as e:
+        result.error = e
+    return result
+
+
+def import_files(
+        storage: 'StorageService',
+        entries: Iterable[ImportEntry],
+        *,
+        workers: int = DEFAULT_INIT_WORKERS
+    ) -> Iterator[ImportResult]:
+    _check_workers(workers=workers)
+    executor = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='py115-import'
+    )
+    pending: Set[Future] = set()
+    try:
+        for entry in entries:
+            # Bound in-flight entries, so that a long stream is consumed 
+            # as it is processed.
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(_import_file, storage, entry))
+        for future in as_completed(pending):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def _import_file_async(
+        storage: 'AsyncStorageService', entry: ImportEntry
+    ) -> ImportResult:
+    result, reader = _make_import_result(entry)
+    try:
+        _fill_import_result(result, await storage.import_file(
+            result.dir_id, result.name, result.size, result.sha1,
+            lambda range_spec: asyncio.to_thread(
+                _read_range, storage.hash_cache, reader, range_spec
+            )
+        ))
+    except Exception as e:
+        result.error = e
+    return result
+
+
+async def import_files_async(
+        storage: 'AsyncStorageService',
+        entries: Iterable[ImportEntry] | AsyncIterable[ImportEntry],
+        *,
+        workers: int = DEFAULT_INIT_WORKERS
+    ) -> AsyncIterator[ImportResult]:
+    _check_workers(workers=workers)
+    if not isinstance(entries, AsyncIterable):
+        entries = _to_async_iterable(entries)
+    pending: Set[asyncio.Task] = set()
+    try:
+        async for entry in entries:
+            # Bound in-flight entries the same as the sync version.
+            if len(pending) >= workers * 2:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.create_task(
+                _import_file_async(storage, entry)
+            ))
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _to_async_iterable(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
@@ -1,25 +1,34 @@
 __author__ = 'deadblue'
 
+import asyncio
+import os
 import os.path as ospath
+import time
 from typing import (
-    Any, Dict, Iterable, Tuple, BinaryIO
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, 
+    Iterator, Tuple, TypeVar, BinaryIO
 )
 
 from py115._internal import oss
 from py115._internal.crypto.hash import (
-    digest, digest_range
+    DigestResult, Spooler, digest, digest_range, digest_spool
 )
-from py115.lowlevel import Client
+from py115.lowlevel import Client, AsyncClient, ApiException
+from py115.lowlevel.client._base import BaseClient
+from py115.lowlevel.singleflight import AsyncSingleFlight, SingleFlight
 from py115.lowlevel.api import *
+from py115.lowlevel.spec import ApiSpec, R
 from py115.lowlevel.types import (
     CommonParams,
     AppName, 
     QrcodeClient, 
     QrcodeStatus,
     OfflineClearFlag,
+    DownloadResult,
     UploadInitOssResult,
     UploadInitDoneResult, 
-    UploadInitSignResult
+    UploadInitSignResult,
+    UploadToken
 )
 from py115.types import (
     Credential,
@@ -27,17 +36,143 @@ from py115.types import (
     File, Task, 
     DownloadTicket, 
     UploadTicket,
-    PlayTicket
+    PlayTicket,
+    ProgressHook
 )
+from py115.batch import (
+    DEFAULT_HASH_WORKERS, DEFAULT_INIT_WORKERS, DEFAULT_TRANSFER_WORKERS,
+    DEFAULT_QUEUE_SIZE, BatchUploadResult, ImportEntry, ImportResult, 
+    ResultHook, UploadEntry, 
+    import_files, import_files_async, upload_files, upload_files_async,
+    _get_pickcode
+)
+from py115.downloader import AsyncDownloader, Downloader
+from py115.exceptions import UploadError
+from py115.hashcache import HashCache
+from py115.hashing import FileHash
+from py115.session import SessionCache, SessionData
+from py115.uploader import AsyncOssUploader, OssUploader
+
+
+Refresher = Callable[[], bool]
+"""
+Callback to refresh cached user info, returns False when there is nothing 
+to refresh.
+"""
+
+AsyncRefresher = Callable[[], Awaitable[bool]]
+
+_C = TypeVar('_C', Client, AsyncClient)
+
+TOKEN_REFRESH_AHEAD = 300.0
+"""Seconds before expiration to refresh upload token."""
+
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+"""Unseekable stream smaller than this is spooled in memory."""
+
+_SPOOL_BATCH_SIZE = 1024 * 1024
+"""Async chunks are batched up to this size before spooled in a thread."""
+
+
+def _is_token_fresh(expiration: int) -> bool:
+    return expiration - time.time() > TOKEN_REFRESH_AHEAD
+
+
+class _TokenCache:
+    """
+    _TokenCache keeps an upload token until it is about to expire, 
+    concurrent callers share one refreshing call.
+    """
+
+    _lac: Client
+    _token: UploadToken | None
+    _generation: int
+    _flight: SingleFlight
+
+    def __init__(self, lac: Client) -> None:
+        self._lac = lac
+        self._token = None
+        self._generation = 0
+        self._flight = SingleFlight()
+
+    def _refresh(self) -> UploadToken:
+        token = self._token
+        if token is None or not _is_token_fresh(token.expiration):
+            generation = self._generation
+            token = self._lac.call_api(UploadTokenApi())
+            # Do not keep token of the previous user.
+            if generation == self._generation:
+                self._token = token
+        return token
+
+    def get(self) -> UploadToken:
+        token = self._token
+        if token is not None and _is_token_fresh(token.expiration):
+            return token
+        return self._flight.do('token', self._refresh)
+
+    def clear(self):
+        """
+        Drop the cached token, after user has changed.
+        """
+        self._token = None
+        self._generation += 1
+
+
+class _AsyncTokenCache:
+    """
+    Asynchronous version of _TokenCache.
+    """
+
+    _lac: AsyncClient
+    _token: UploadToken | None
+    _generation: int
+    _flight: AsyncSingleFlight
+
+    def __init__(self, lac: AsyncClient) -> None:
+        self._lac = lac
+        self._token = None
+        self._generation = 0
+        self._flight = AsyncSingleFlight()
+
+    async def _refresh(self) -> UploadToken:
+        token = self._token
+        if token is None or not _is_token_fresh(token.expiration):
+            generation = self._generation
+            token = await self._lac.call_api(UploadTokenApi())
+            # Do not keep token of the previous user.
+            if generation == self._generation:
+                self._token = token
+        return token
+
+    async def get(self) -> UploadToken:
+        token = self._token
+        if token is not None and _is_token_fresh(token.expiration):
+            return token
+        return await self._flight.do('token', self._refresh)
+
+    def clear(self):
+        """
+        Drop the cached token, after user has changed.
+        """
+        self._token = None
+        self._generation += 1
 
 
 class OfflineService:
 
     _lac: Client
     _lcp: CommonParams
+    _refresher: Refresher | None
 
-    def __init__(self, lac: Client, lcp: CommonParams) -> None:
+    def __init__(
+            self, 
+            lac: Client, 
+            lcp: CommonParams, 
+            refresher: Refresher | None = None
+        ) -> None:
         self._lac, self._lcp = lac, lcp
+        self._refresher = refresher
     
     def list(self) -> Iterable[Task]:
         page_num = 1
@@ -50,7 +185,7 @@ class OfflineService:
 
     def add_urls(self, *urls: str, save_dir_id: str | None = None):
         if len(urls) == 0: return
-        self._lac.call_api(OfflineAddUrlsApi(
+        _call_with_refresh(self._lac, self._refresher, lambda: OfflineAddUrlsApi(
             self._lcp, 
             urls, 
             save_dir_id=save_dir_id
@@ -71,9 +206,27 @@ class StorageService:
 
     _lac: Client
     _lcp: CommonParams
+    _refresher: Refresher | None
+    _hash_cache: HashCache | None
+    _tokens: _TokenCache
 
-    def __init__(self, lac: Client, lcp: CommonParams) -> None:
+    def __init__(
+            self, 
+            lac: Client, 
+            lcp: CommonParams, 
+            refresher: Refresher | None = None,
+            hash_cache: HashCache | None = None,
+            tokens: _TokenCache | None = None
+        ) -> None:
         self._lac, self._lcp = lac, lcp
+        self._refresher = refresher
+        self._hash_cache = hash_cache
+        self._tokens = tokens or _TokenCache(lac)
+
+    @property
+    def hash_cache(self) -> HashCache | None:
+        """Cache for SHA-1 of local files, None when not enabled."""
+        return self._hash_cache
 
     def list_files(self, dir_id: str) -> Iterable[File]:
         """Retrieve files under a directory.
@@ -164,24 +317,51 @@ class StorageService:
             DownloadTicket: Ticket to download files.
         """
         dr = self._lac.call_api(DownloadApi(pickcode=pickcode))
-        ticket = DownloadTicket(
-            url=dr.url,
-            file_name=dr.file_name,
-            file_size=dr.file_size
-        )
-        # Fill required headers
-        ticket.headers['User-Agent'] = self._lac.user_agent
-        cookies = self._lac.export_cookies(target_url=dr.url)
-        if len(cookies) > 0:
-            ticket.headers['Cookie'] = '; '.join([
-                f'{name}={value}' for name, value in cookies.items()
-            ])
-        return ticket
+        return _make_download_ticket(self._lac, dr)
+
+    def download(
+            self,
+            pickcode: str,
+            path: str,
+            *,
+            sha1: str | None = None,
+            journal: str | None = None,
+            downloader: Downloader | None = None,
+            progress: ProgressHook | None = None
+        ) -> str:
+        """Download a file to local path over multiple connections.
+
+        Download URL is requested again when it expires.
+
+        Args:
+            pickcode (str): Pickcode of file.
+            path (str): Local path to save the file.
+            sha1 (str): Expected SHA-1 of the file, such as `sha1` of `File`.
+            journal (str): Path of journal file to resume download from.
+            downloader (Downloader): Downloader to use, a default one is 
+                created when not specified.
+            progress (ProgressHook): Hook to receive download progress.
+
+        Returns:
+            str: Upper-case hex SHA-1 of downloaded file.
+        """
+        resolve = lambda: self.request_download(pickcode)
+        if downloader is not None:
+            return downloader.download(
+                resolve(), path, sha1=sha1, resolve=resolve, 
+                journal=journal, progress=progress
+            )
+        with Downloader() as downloader:
+            return downloader.download(
+                resolve(), path, sha1=sha1, resolve=resolve, 
+                journal=journal, progress=progress
+            )
 
     def request_upload(
             self, 
             dir_id: str, 
-            file_path: str
+            file_path: str,
+            file_hash: FileHash | None = None
         ) -> str | UploadTicket:
         """
         Try upload files to cloud.
@@ -189,6 +369,9 @@ class StorageService:
         Args:
             dir_id (str): Remote directory ID to save the file.
             file_path (str): Local file path to upload.
+            file_hash (FileHash): Hashing result of the file from 
+                `hash_files`, hashing is skipped when it is specified and 
+                the file is unchanged.
 
         Returns:
             str|UploadTicket: 
@@ -198,7 +381,9 @@ class StorageService:
         """
         save_name = ospath.basename(file_path)
         with open(file_path, 'rb') as fp:
-            return self.request_upload_stream(dir_id, save_name, fp)
+            return self._request_upload(
+                dir_id, save_name, fp, _to_digest_result(file_hash, fp)
+            )
 
     def request_upload_stream(
             self, 
@@ -212,7 +397,8 @@ class StorageService:
         Args:
             dir_id (str): Remote directory ID to save the file.
             save_name (str): File name to save data on cloud.
-            stream (BinaryIO): Data stream.
+            stream (BinaryIO): Data stream, it must be seekable. Use 
+                `upload_stream` for pipe, socket or HTTP response body.
 
         Returns:
             str|UploadTicket: 
@@ -221,39 +407,219 @@ class StorageService:
                 upload data to cloud.
         """
         if not stream.seekable():
-            # TODO: Use custom exception
-            raise Exception('Can not upload unseekable stream!')
-        dr = digest(stream)
-        spec = UploadInitApi(
-            self._lcp, dir_id, save_name, dr.size, dr.sha1
+            # Caller transfers the same stream after this call, which an
+            # unseekable stream can not serve once it is hashed.
+            raise UploadError(
+                'Can not upload unseekable stream, use upload_stream instead!'
+            )
+        return self._request_upload(dir_id, save_name, stream, None)
+
+    def _request_upload(
+            self,
+            dir_id: str,
+            save_name: str,
+            stream: BinaryIO,
+            dr: DigestResult | None
+        ) -> str | UploadTicket:
+        if dr is None:
+            dr = _digest(self._hash_cache, stream)
+        return self._init_upload(
+            dir_id, save_name, dr, 
+            lambda range_spec: _digest_range(
+                self._hash_cache, stream, range_spec
+            )
+        )
+
+    def _init_upload(
+            self,
+            dir_id: str,
+            save_name: str,
+            dr: DigestResult,
+            sign: Callable[[str], str]
+        ) -> str | UploadTicket:
+        spec, result = _call_with_refresh(
+            self._lac, self._refresher, lambda: UploadInitApi(
+                self._lcp, dir_id, save_name, dr.size, dr.sha1
+            )
         )
-        result = self._lac.call_api(spec)
         while True:
             if isinstance(result, UploadInitSignResult):
                 spec.update_token(
                     sign_key=result.sign_key,
-                    sign_value=digest_range(stream, result.sign_range)
+                    sign_value=sign(result.sign_range)
                 )
                 result = self._lac.call_api(spec)
             elif isinstance(result, UploadInitDoneResult):
                 return result.pickcode
             elif isinstance(result, UploadInitOssResult):
-                token = self._lac.call_api(UploadTokenApi())
-                return UploadTicket(
-                    region=oss.REGION,
-                    endpoint=oss.ENDPOINT,
-                    access_key_id=token.access_key_id,
-                    access_key_secret=token.access_key_secret,
-                    security_token=token.security_token,
-                    bucket_name=result.bucket,
-                    object_key=result.object,
-                    callback=oss.encode_header_value(
-                        oss.replace_callback_sha1(result.callback, dr.sha1)
-                    ),
-                    callback_var=oss.encode_header_value(result.callback_var),
-                    expiration=token.expiration
-                )
+                token = self._tokens.get()
+                return _make_upload_ticket(result, token, dr.sha1)
     
+    def upload_files(
+            self,
+            entries: Iterable[UploadEntry],
+            *,
+            hash_workers: int = DEFAULT_HASH_WORKERS,
+            init_workers: int = DEFAULT_INIT_WORKERS,
+            transfer_workers: int = DEFAULT_TRANSFER_WORKERS,
+            queue_size: int = DEFAULT_QUEUE_SIZE,
+            uploader: OssUploader | None = None,
+            on_result: ResultHook | None = None
+        ) -> BatchUploadResult:
+        """Upload many local files to cloud in a pipeline.
+
+        Files are hashed, checked for rapid upload, and transferred in 
+        concurrent stages, so that hashing of later files overlaps with 
+        init calls and transfers of earlier ones. Only files which can not 
+        be rapid-uploaded are transferred.
+
+        Args:
+            entries (Iterable[UploadEntry]): Pairs of remote directory ID and
+                local file path, consumed lazily.
+            hash_workers (int): Number of hashing workers.
+            init_workers (int): Number of workers calling upload init API.
+            transfer_workers (int): Number of files transferring in parallel.
+            queue_size (int): Capacity of queues between stages.
+            uploader (OssUploader): Uploader to transfer files, a default one
+                is created when not specified.
+            on_result (ResultHook): Hook to receive result of every file.
+
+        Returns:
+            BatchUploadResult: Results of all files, and statistics.
+        """
+        return upload_files(
+            self, entries,
+            hash_workers=hash_workers,
+            init_workers=init_workers,
+            transfer_workers=transfer_workers,
+            queue_size=queue_size,
+            uploader=uploader,
+            on_result=on_result
+        )
+
+    def upload_stream(
+            self,
+            dir_id: str,
+            save_name: str,
+            stream: BinaryIO,
+            *,
+            uploader: OssUploader | None = None,
+            spool_max_memory: int = SPOOL_MAX_MEMORY
+        ) -> str | None:
+        """
+        Upload data as a file to cloud, including transfer when rapid upload 
+        fails.
+
+        Unseekable stream, such as pipe, socket or HTTP response body, is 
+        read once into a spool while being hashed, then sign checks and 
+        transfer are served from the spool.
+
+        Args:
+            dir_id (str): Remote directory ID to save the file.
+            save_name (str): File name to save data on cloud.
+            stream (BinaryIO): Data stream.
+            uploader (OssUploader): Uploader to transfer data, a default one
+                is created when not specified.
+            spool_max_memory (int): Unseekable stream is spooled in memory 
+                up to this size, and in a temporary file beyond.
+
+        Returns:
+            str: Pickcode of the uploaded file, None when cloud does not 
+                return it.
+        """
+        if stream.seekable():
+            ret = self._request_upload(dir_id, save_name, stream, None)
+            return self._transfer(ret, stream, uploader)
+        spool, dr = digest_spool(stream, spool_max_memory)
+        with spool:
+            # Spool is private, hash its ranges without cache.
+            ret = self._init_upload(
+                dir_id, save_name, dr,
+                lambda range_spec: digest_range(spool, range_spec)
+            )
+            return self._transfer(ret, spool, uploader)
+
+    def _transfer(
+            self, 
+            ret: str | UploadTicket, 
+            stream: BinaryIO, 
+            uploader: OssUploader | None
+        ) -> str | None:
+        if not isinstance(ret, UploadTicket):
+            return ret
+        if uploader is not None:
+            return _get_pickcode(uploader.upload(ret, stream))
+        with OssUploader(renew_ticket=self.renew_ticket) as uploader:
+            return _get_pickcode(uploader.upload(ret, stream))
+
+    def import_file(
+            self,
+            dir_id: str,
+            save_name: str,
+            size: int,
+            sha1: str,
+            sign: Callable[[str], str] | None = None
+        ) -> str | UploadTicket:
+        """Try create a file on cloud by its size and SHA-1, without reading
+        its content unless cloud requests a sign check.
+
+        Args:
+            dir_id (str): Remote directory ID to save the file.
+            save_name (str): File name on cloud.
+            size (int): File size in bytes.
+            sha1 (str): Hex SHA-1 of the file.
+            sign (Callable): Function to calculate upper-case hex SHA-1 of 
+                a range of the file, such as "0-1023", when cloud requests a
+                sign check. None to fail in that case.
+
+        Returns:
+            str|UploadTicket: 
+                When str, it's the pickcode of the created file.
+                Or the upload ticket which contains all required information to 
+                upload file to cloud.
+        """
+        return self._init_upload(
+            dir_id, save_name, DigestResult(sha1=sha1.upper(), size=size), 
+            sign or _no_sign
+        )
+
+    def import_files(
+            self,
+            entries: Iterable[ImportEntry],
+            *,
+            workers: int = DEFAULT_INIT_WORKERS
+        ) -> Iterator[ImportResult]:
+        """Create files on cloud by their size and SHA-1, without reading 
+        their content unless cloud requests a sign check.
+
+        Args:
+            entries (Iterable[ImportEntry]): Tuples of remote directory ID, 
+                file name, size, SHA-1 and range reader, consumed lazily.
+            workers (int): Number of workers calling upload init API.
+
+        Yields:
+            ImportResult: Result of an entry, it has a pickcode when file is
+                created, or an upload ticket when content needs transfer.
+        """
+        return import_files(self, entries, workers=workers)
+
+    def renew_ticket(self, ticket: UploadTicket):
+        """Renew credentials in upload ticket when they are about to expire.
+
+        It can be passed to uploader as `renew_ticket`, to keep a long 
+        upload from failing on expired credentials.
+
+        Args:
+            ticket (UploadTicket): Upload ticket to renew in place.
+        """
+        if _is_token_fresh(ticket.expiration):
+            return
+        token = self._tokens.get()
+        ticket.access_key_id = token.access_key_id
+        ticket.access_key_secret = token.access_key_secret
+        ticket.security_token = token.security_token
+        ticket.expiration = token.expiration
+
     def request_play(self, pickcode: str) -> PlayTicket:
         """Generate a play ticket which contains all required information
         to download a video file.
@@ -266,12 +632,7 @@ class StorageService:
         """
         result = self._lac.call_api(VideoPlayWebApi(pickcode=pickcode))
         ticket = PlayTicket(result.play_url)
-        ticket.headers['User-Agent'] = self._lac.user_agent
-        cookies = self._lac.export_cookies(target_url=result.play_url)
-        if len(cookies) > 0:
-            ticket.headers['Cookie'] = '; '.join([
-                f'{name}={value}' for name, value in cookies.items()
-            ])
+        _fill_ticket_headers(self._lac, ticket, result.play_url)
         return ticket
 
 
@@ -280,23 +641,59 @@ class Cloud:
 
     _lac: Client
     _lcp: CommonParams
+    _session: SessionCache | None
+    _cached: SessionData | None
+    _stale: bool
+    _hash_cache: HashCache | None
+    _tokens: _TokenCache
 
     def __init__(
             self, 
             credential: Any = None,
             *,
-            app_ver: str | None = None
+            app_ver: str | None = None,
+            session: SessionCache | str | None = None,
+            hash_cache: HashCache | None = None,
+            client: Client | None = None,
+            **client_kwargs: Any
         ) -> None:
-        self._lac = Client()
+        """
+        Args:
+            credential (Any): Credential object to identity user.
+            app_ver (str): App version to simulate, will be fetched from 
+                server when not specified.
+            session (SessionCache | str): Session cache or its file path. 
+                When a valid session is cached, cloud instance starts 
+                without any network call, and cached credential is used 
+                if `credential` is not specified.
+            hash_cache (HashCache): Cache for SHA-1 of local files, which 
+                lets uploading unchanged files skip hashing.
+            client (Client): Pre-built low-level client to use.
+            **client_kwargs: Arguments to build the low-level client, such 
+                as `http2`, `max_connections`, `retry_policy`, 
+                `rate_limiter` or `cache`. See `Client` for all of them.
+        """
+        self._lac = _make_client(Client, client, client_kwargs)
+        self._hash_cache = hash_cache
+        self._tokens = _TokenCache(self._lac)
+        self._session = _make_session_cache(session)
+        self._cached = self._session.load() if self._session else None
+        self._stale = False
         # Get app version
+        if app_ver is None and self._cached is not None:
+            app_ver = self._cached.app_ver
         if app_ver is None:
             avr = self._lac.call_api(AppVersionApi())
             app_ver = avr.get(AppName.BROWSER_WINDOWS).version_code
         self._lac.add_to_user_agent(f'115Browser/{app_ver}')
         self._lcp = CommonParams(app_ver)
         # Set credential
+        if credential is None and self._cached is not None:
+            credential = self._cached.cookies
         if credential is not None:
             self.import_credential(credential)
+        elif self._cached is None:
+            self._save_session()
 
     def import_credential(self, credential: Any) -> bool:
         """Import credential to cloud instance.
@@ -311,15 +708,40 @@ class Cloud:
         if cookies is None:
             return False
         self._lac.import_cookies(cookies)
-        self._after_login()
+        self._tokens.clear()
+        if _match_session(self._cached, self._lcp, cookies):
+            # Trust cached user info until an API call fails.
+            self._lcp.set_user_info(
+                user_id=self._cached.user_id,
+                user_key=self._cached.user_key
+            )
+            self._stale = True
+        else:
+            self._after_login()
         return True
 
     def _after_login(self):
+        self._tokens.clear()
         result = self._lac.call_api(UploadInfoApi())
         self._lcp.set_user_info(
             user_id=result.user_id,
             user_key=result.user_key
         )
+        self._stale = False
+        self._save_session()
+
+    def _refresh_user_info(self) -> bool:
+        if not self._stale:
+            return False
+        self._after_login()
+        return True
+
+    def _save_session(self):
+        if self._session is not None:
+            self._cached = _make_session_data(
+                self._lcp, self.export_credentail()
+            )
+            self._session.save(self._cached)
 
     def export_credentail(self) -> Credential | None:
         """Export current credentail from cloud instance.
@@ -347,7 +769,7 @@ class Cloud:
         """
         token = self._lac.call_api(QrcodeTokenApi(client=client))
         qrcode_image = self._lac.fetch(
-            qrcode_get_image_url(client, token.uid)
+            qrcode_get_image_url(token.uid)
         )
         return QrcodeSession(
             client=client,
@@ -389,7 +811,7 @@ class Cloud:
         Return:
             OfflineService: Offline service instance.
         """
-        return OfflineService(self._lac, self._lcp)
+        return OfflineService(self._lac, self._lcp, self._refresh_user_info)
 
     def storage(self) -> StorageService:
         """Get storage service.
@@ -397,7 +819,10 @@ class Cloud:
         Return:
             StorageService: Storage service instance.
         """
-        return StorageService(self._lac, self._lcp)
+        return StorageService(
+            self._lac, self._lcp, self._refresh_user_info, 
+            self._hash_cache, self._tokens
+        )
 
     def lowlevel(self) -> Tuple[Client, CommonParams]:
         """Export lowlevel client and parameters
@@ -409,21 +834,921 @@ class Cloud:
         return (self._lac, self._lcp)
 
 
-def _convert_to_cookies(credential: Any) -> Dict[str, str] | None:
-    if isinstance(credential, Credential):
-        return credential.to_dict()
-    # Handle dict or object
-    raw: Dict[str, Any] = None
-    if isinstance(credential, dict):
-        raw = credential
-    elif hasattr(credential, '__dict__'):
-        raw = credential.__dict__
-    if raw is None:
-        return None
-    # Extract cookies from credentials
-    cookies = {}
-    for key, value in raw.items():
-        key = key.upper()
-        if key in ('UID', 'CID', 'KID', 'SEID'):
-            cookies[key] = str(value)
-    return cookies
+class AsyncOfflineService:
+
+    _lac: AsyncClient
+    _lcp: CommonParams
+    _refresher: AsyncRefresher | None
+
+    def __init__(
+            self, 
+            lac: AsyncClient, 
+            lcp: CommonParams, 
+            refresher: AsyncRefresher | None = None
+        ) -> None:
+        self._lac, self._lcp = lac, lcp
+        self._refresher = refresher
+
+    async def list(self) -> AsyncIterator[Task]:
+        page_num = 1
+        while True:
+            result = await self._lac.call_api(OfflineListApi(page_num))
+            for task in result.tasks:
+                yield task
+            page_num += 1
+            if page_num > result.page_count:
+                break
+
+    async def add_urls(self, *urls: str, save_dir_id: str | None = None):
+        if len(urls) == 0: return
+        await _acall_with_refresh(self._lac, self._refresher, lambda: OfflineAddUrlsApi(
+            self._lcp, 
+            urls, 
+            save_dir_id=save_dir_id
+        ))
+
+    async def delete(self, *task_ids: str, delete_files: bool = False):
+        if len(task_ids) == 0: return
+        await self._lac.call_api(OfflineDeleteApi(
+            info_hashes=task_ids, 
+            delete_files=delete_files
+        ))
+
+    async def clear(self, flag: OfflineClearFlag = OfflineClearFlag.DONE):
+        await self._lac.call_api(OfflineClearApi(flag))
+
+
+class AsyncStorageService:
+
+    _lac: AsyncClient
+    _lcp: CommonParams
+    _refresher: AsyncRefresher | None
+    _hash_cache: HashCache | None
+    _tokens: _AsyncTokenCache
+
+    def __init__(
+            self, 
+            lac: AsyncClient, 
+            lcp: CommonParams, 
+            refresher: AsyncRefresher | None = None,
+            hash_cache: HashCache | None = None,
+            tokens: _AsyncTokenCache | None = None
+        ) -> None:
+        self._lac, self._lcp = lac, lcp
+        self._refresher = refresher
+        self._hash_cache = hash_cache
+        self._tokens = tokens or _AsyncTokenCache(lac)
+
+    @property
+    def hash_cache(self) -> HashCache | None:
+        """Cache for SHA-1 of local files, None when not enabled."""
+        return self._hash_cache
+
+    async def list_files(self, dir_id: str) -> AsyncIterator[File]:
+        """Retrieve files under a directory.
+
+        Args:
+            dir_id (str): Directory ID where to retrive files.
+
+        Yields:
+            File: A file object under the directory.
+        """
+        spec = FileListApi(
+            dir_id=dir_id,
+            offset=0
+        )
+        while True:
+            result = await self._lac.call_api(spec)
+            for file in result.files:
+                yield file
+            spec.offset += result.limit
+            if spec.offset >= result.count: break
+
+    async def search_files(
+            self, keyword: str, dir_id: str = '0'
+        ) -> AsyncIterator[File]:
+        """Search files with keyword under a directory.
+
+        Args:
+            keyword (str): Keyword to search file.
+
+            dir_id (str): Directory ID where to search files.
+
+        Yields:
+            File: A file object matches the keyword.
+        """
+        spec = FileSearchApi(
+                keyword=keyword,
+                dir_id=dir_id,
+                offset=0
+            )
+        while True:
+            result = await self._lac.call_api(spec)
+            for file in result.files:
+                yield file
+            spec.offset += result.limit
+            if spec.offset >= result.count: break
+
+    async def move_files(self, target_dir_id: str, *file_ids: str):
+        if len(file_ids) > 0:
+            await self._lac.call_api(FileMoveApi(
+                target_dir_id, file_ids
+            ))
+
+    async def remove_files(self, *file_ids: str):
+        """Remove files from cloud.
+
+        Args:
+            *file_ids (str): ID of files to remove.
+        """
+        if len(file_ids) > 0:
+            await self._lac.call_api(FileDeleteApi(file_ids))
+
+    async def rename_file(self, file_id: str, new_name: str):
+        """Rename file.
+        """
+        await self._lac.call_api(FileBatchRenameApi({
+            file_id: new_name
+        }))
+
+    async def make_dir(self, parent_id: str, name: str) -> str:
+        """Make a directory under parent directory.
+
+        Args:
+            parent_id (str): Parent Directory ID.
+            name (str): Base name of new directroy.
+        
+        Returns:
+            str: Created directory ID.
+        """
+        return await self._lac.call_api(DirMakeApi(
+            parent_id=parent_id,
+            dir_name=name
+        ))
+
+    async def request_download(self, pickcode: str) -> DownloadTicket:
+        """Generate a downlaod ticket which contains all required information
+        to download a file.
+
+        Args:
+            pickcode (str): Pickcode of file.
+        
+        Returns:
+            DownloadTicket: Ticket to download files.
+        """
+        dr = await self._lac.call_api(DownloadApi(pickcode=pickcode))
+        return _make_download_ticket(self._lac, dr)
+
+    async def download(
+            self,
+            pickcode: str,
+            path: str,
+            *,
+            sha1: str | None = None,
+            journal: str | None = None,
+            downloader: AsyncDownloader | None = None,
+            progress: ProgressHook | None = None
+        ) -> str:
+        """Download a file to local path over multiple connections.
+
+        Args:
+            pickcode (str): Pickcode of file.
+            path (str): Local path to save the file.
+            sha1 (str): Expected SHA-1 of the file, such as `sha1` of `File`.
+            journal (str): Path of journal file to resume download from.
+            downloader (AsyncDownloader): Downloader to use, a default one is
+                created when not specified.
+            progress (ProgressHook): Hook to receive download progress.
+
+        Returns:
+            str: Upper-case hex SHA-1 of downloaded file.
+        """
+        resolve = lambda: self.request_download(pickcode)
+        if downloader is not None:
+            return await downloader.download(
+                await resolve(), path, sha1=sha1, resolve=resolve, 
+                journal=journal, progress=progress
+            )
+        async with AsyncDownloader() as downloader:
+            return await downloader.download(
+                await resolve(), path, sha1=sha1, resolve=resolve, 
+                journal=journal, progress=progress
+            )
+
+    async def request_upload(
+            self, 
+            dir_id: str, 
+            file_path: str,
+            file_hash: FileHash | None = None
+        ) -> str | UploadTicket:
+        """
+        Try upload files to cloud.
+
+        Args:
+            dir_id (str): Remote directory ID to save the file.
+            file_path (str): Local file path to upload.
+            file_hash (FileHash): Hashing result of the file from 
+                `hash_files`, hashing is skipped when it is specified and 
+                the file is unchanged.
+
+        Returns:
+            str|UploadTicket: 
+                When str, it's the pickcode of the rapid-uploaded file.
+                Or the upload ticket which contains all required information to 
+                upload file to cloud.
+        """
+        save_name = ospath.basename(file_path)
+        with open(file_path, 'rb') as fp:
+            return await self._request_upload(
+                dir_id, save_name, fp, _to_digest_result(file_hash, fp)
+            )
+
+    async def request_upload_stream(
+            self, 
+            dir_id: str,
+            save_name: str,
+            stream: BinaryIO
+        ) -> str | UploadTicket:
+        """
+        Try upload data as a file to cloud.
+
+        Hashing reads the whole stream, so it runs in a worker thread to keep 
+        the event loop responsive.
+
+        Args:
+            dir_id (str): Remote directory ID to save the file.
+            save_name (str): File name to save data on cloud.
+            stream (BinaryIO): Data stream, it must be seekable. Use 
+                `upload_stream` for pipe, socket or HTTP response body.
+
+        Returns:
+            str|UploadTicket: 
+                When str, it's the pickcode of the rapid-uploaded data.
+                Or the upload ticket which contains all required information to 
+                upload data to cloud.
+        """
+        if not stream.seekable():
+            # Caller transfers the same stream after this call, which an
+            # unseekable stream can not serve once it is hashed.
+            raise UploadError(
+                'Can not upload unseekable stream, use upload_stream instead!'
+            )
+        return await self._request_upload(dir_id, save_name, stream, None)
+
+    async def _request_upload(
+            self,
+            dir_id: str,
+            save_name: str,
+            stream: BinaryIO,
+            dr: DigestResult | None
+        ) -> str | UploadTicket:
+        if dr is None:
+            dr = await asyncio.to_thread(_digest, self._hash_cache, stream)
+        return await self._init_upload(
+            dir_id, save_name, dr, 
+            lambda range_spec: asyncio.to_thread(
+                _digest_range, self._hash_cache, stream, range_spec
+            )
+        )
+
+    async def _init_upload(
+            self,
+            dir_id: str,
+            save_name: str,
+            dr: DigestResult,
+            sign: Callable[[str], Awaitable[str]]
+        ) -> str | UploadTicket:
+        spec, result = await _acall_with_refresh(
+            self._lac, self._refresher, lambda: UploadInitApi(
+                self._lcp, dir_id, save_name, dr.size, dr.sha1
+            )
+        )
+        while True:
+            if isinstance(result, UploadInitSignResult):
+                spec.update_token(
+                    sign_key=result.sign_key,
+                    sign_value=await sign(result.sign_range)
+                )
+                result = await self._lac.call_api(spec)
+            elif isinstance(result, UploadInitDoneResult):
+                return result.pickcode
+            elif isinstance(result, UploadInitOssResult):
+                token = await self._tokens.get()
+                return _make_upload_ticket(result, token, dr.sha1)
+
+    async def upload_files(
+            self,
+            entries: Iterable[UploadEntry] | AsyncIterable[UploadEntry],
+            *,
+            hash_workers: int = DEFAULT_HASH_WORKERS,
+            init_workers: int = DEFAULT_INIT_WORKERS,
+            transfer_workers: int = DEFAULT_TRANSFER_WORKERS,
+            queue_size: int = DEFAULT_QUEUE_SIZE,
+            uploader: AsyncOssUploader | None = None,
+            on_result: ResultHook | None = None
+        ) -> BatchUploadResult:
+        """Upload many local files to cloud in a pipeline.
+
+        Args:
+            entries (Iterable[UploadEntry]|AsyncIterable[UploadEntry]): Pairs
+                of remote directory ID and local file path, consumed lazily.
+            hash_workers (int): Number of hashing workers.
+            init_workers (int): Number of workers calling upload init API.
+            transfer_workers (int): Number of files transferring in parallel.
+            queue_size (int): Capacity of queues between stages.
+            uploader (AsyncOssUploader): Uploader to transfer files, a default
+                one is created when not specified.
+            on_result (ResultHook): Hook to receive result of every file.
+
+        Returns:
+            BatchUploadResult: Results of all files, and statistics.
+        """
+        return await upload_files_async(
+            self, entries,
+            hash_workers=hash_workers,
+            init_workers=init_workers,
+            transfer_workers=transfer_workers,
+            queue_size=queue_size,
+            uploader=uploader,
+            on_result=on_result
+        )
+
+    async def upload_stream(
+            self,
+            dir_id: str,
+            save_name: str,
+            stream: BinaryIO | AsyncIterable[bytes],
+            *,
+            uploader: AsyncOssUploader | None = None,
+            spool_max_memory: int = SPOOL_MAX_MEMORY
+        ) -> str | None:
+        """
+        Upload data as a file to cloud, including transfer when rapid upload 
+        fails.
+
+        Args:
+            dir_id (str): Remote directory ID to save the file.
+            save_name (str): File name to save data on cloud.
+            stream (BinaryIO|AsyncIterable[bytes]): Data stream, or chunks 
+                such as `aiter_bytes()` of an HTTP response.
+            uploader (AsyncOssUploader): Uploader to transfer data, a default
+                one is created when not specified.
+            spool_max_memory (int): Unseekable stream is spooled in memory 
+                up to this size, and in a temporary file beyond.
+
+        Returns:
+            str: Pickcode of the uploaded file, None when cloud does not 
+                return it.
+        """
+        if not isinstance(stream, AsyncIterable) and stream.seekable():
+            ret = await self._request_upload(dir_id, save_name, stream, None)
+            return await self._transfer(ret, stream, uploader)
+        if isinstance(stream, AsyncIterable):
+            spool, dr = await _aspool(stream, spool_max_memory)
+        else:
+            spool, dr = await asyncio.to_thread(
+                digest_spool, stream, spool_max_memory
+            )
+        with spool:
+            # Spool is private, hash its ranges without cache.
+            ret = await self._init_upload(
+                dir_id, save_name, dr,
+                lambda range_spec: asyncio.to_thread(
+                    digest_range, spool, range_spec
+                )
+            )
+            return await self._transfer(ret, spool, uploader)
+
+    async def _transfer(
+            self, 
+            ret: str | UploadTicket, 
+            stream: BinaryIO, 
+            uploader: AsyncOssUploader | None
+        ) -> str | None:
+        if not isinstance(ret, UploadTicket):
+            return ret
+        if uploader is not None:
+            return _get_pickcode(await uploader.upload(ret, stream))
+        async with AsyncOssUploader(renew_ticket=self.renew_ticket) as uploader:
+            return _get_pickcode(await uploader.upload(ret, stream))
+
+    async def import_file(
+            self,
+            dir_id: str,
+            save_name: str,
+            size: int,
+            sha1: str,
+            sign: Callable[[str], Awaitable[str]] | None = None
+        ) -> str | UploadTicket:
+        """Try create a file on cloud by its size and SHA-1, without reading
+        its content unless cloud requests a sign check.
+
+        Args:
+            dir_id (str): Remote directory ID to save the file.
+            save_name (str): File name on cloud.
+            size (int): File size in bytes.
+            sha1 (str): Hex SHA-1 of the file.
+            sign (Callable): Function to calculate upper-case hex SHA-1 of 
+                a range of the file, such as "0-1023", when cloud requests a
+                sign check. None to fail in that case.
+
+        Returns:
+            str|UploadTicket: 
+                When str, it's the pickcode of the created file.
+                Or the upload ticket which contains all required information to 
+                upload file to cloud.
+        """
+        return await self._init_upload(
+            dir_id, save_name, DigestResult(sha1=sha1.upper(), size=size), 
+            sign or _ano_sign
+        )
+
+    def import_files(
+            self,
+            entries: Iterable[ImportEntry] | AsyncIterable[ImportEntry],
+            *,
+            workers: int = DEFAULT_INIT_WORKERS
+        ) -> AsyncIterator[ImportResult]:
+        """Create files on cloud by their size and SHA-1, without reading 
+        their content unless cloud requests a sign check.
+
+        Args:
+            entries (Iterable[ImportEntry]|AsyncIterable[ImportEntry]): 
+                Tuples of remote directory ID, file name, size, SHA-1 and 
+                range reader, consumed lazily.
+            workers (int): Number of concurrent upload init calls.
+
+        Yields:
+            ImportResult: Result of an entry, it has a pickcode when file is
+                created, or an upload ticket when content needs transfer.
+        """
+        return import_files_async(self, entries, workers=workers)
+
+    async def renew_ticket(self, ticket: UploadTicket):
+        """Renew credentials in upload ticket when they are about to expire.
+
+        It can be passed to uploader as `renew_ticket`, to keep a long 
+        upload from failing on expired credentials.
+
+        Args:
+            ticket (UploadTicket): Upload ticket to renew in place.
+        """
+        if _is_token_fresh(ticket.expiration):
+            return
+        token = await self._tokens.get()
+        ticket.access_key_id = token.access_key_id
+        ticket.access_key_secret = token.access_key_secret
+        ticket.security_token = token.security_token
+        ticket.expiration = token.expiration
+
+    async def request_play(self, pickcode: str) -> PlayTicket:
+        """Generate a play ticket which contains all required information
+        to download a video file.
+
+        Args:
+            pickcode (str): Pickcode of video file.
+        
+        Returns:
+            PlayTicket: Ticket to play video file.
+        """
+        result = await self._lac.call_api(VideoPlayWebApi(pickcode=pickcode))
+        ticket = PlayTicket(result.play_url)
+        _fill_ticket_headers(self._lac, ticket, result.play_url)
+        return ticket
+
+
+class AsyncCloud:
+    """Asynchronous 115 cloud service.
+
+    Instance should be created by `AsyncCloud.create()`, since it requires 
+    some API calls to initialize.
+    """
+
+    _lac: AsyncClient
+    _lcp: CommonParams
+    _session: SessionCache | None
+    _cached: SessionData | None
+    _stale: bool
+    _hash_cache: HashCache | None
+    _tokens: _AsyncTokenCache
+    _own_client: bool
+
+    def __init__(
+            self, 
+            lac: AsyncClient, 
+            lcp: CommonParams,
+            session: SessionCache | None = None,
+            cached: SessionData | None = None,
+            hash_cache: HashCache | None = None,
+            own_client: bool = True
+        ) -> None:
+        self._lac, self._lcp = lac, lcp
+        self._own_client = own_client
+        self._session, self._cached = session, cached
+        self._stale = False
+        self._hash_cache = hash_cache
+        self._tokens = _AsyncTokenCache(lac)
+
+    @classmethod
+    async def create(
+            cls,
+            credential: Any = None,
+            *,
+            app_ver: str | None = None,
+            session: SessionCache | str | None = None,
+            hash_cache: HashCache | None = None,
+            client: AsyncClient | None = None,
+            **client_kwargs: Any
+        ) -> 'AsyncCloud':
+        """Create an asynchronous cloud instance.
+
+        Args:
+            credential (Any): Credential object to identity user.
+            app_ver (str): App version to simulate, will be fetched from 
+                server when not specified.
+            session (SessionCache | str): Session cache or its file path. 
+                When a valid session is cached, cloud instance starts 
+                without any network call, and cached credential is used 
+                if `credential` is not specified.
+            hash_cache (HashCache): Cache for SHA-1 of local files, which 
+                lets uploading unchanged files skip hashing.
+            client (AsyncClient): Pre-built low-level client to use, it is 
+                not closed with the cloud instance.
+            **client_kwargs: Arguments to build the low-level client, such 
+                as `http2`, `max_connections`, `retry_policy`, 
+                `rate_limiter` or `cache`. See `AsyncClient` for all of them.
+
+        Returns:
+            AsyncCloud: Cloud instance.
+        """
+        lac = _make_client(AsyncClient, client, client_kwargs)
+        session = _make_session_cache(session)
+        cached = session.load() if session else None
+        # Get app version
+        if app_ver is None and cached is not None:
+            app_ver = cached.app_ver
+        if app_ver is None:
+            avr = await lac.call_api(AppVersionApi())
+            app_ver = avr.get(AppName.BROWSER_WINDOWS).version_code
+        lac.add_to_user_agent(f'115Browser/{app_ver}')
+        cloud = cls(
+            lac, CommonParams(app_ver), session, cached, hash_cache,
+            own_client=client is None
+        )
+        # Set credential
+        if credential is None and cached is not None:
+            credential = cached.cookies
+        if credential is not None:
+            await cloud.import_credential(credential)
+        elif cached is None:
+            await cloud._save_session()
+        return cloud
+
+    async def import_credential(self, credential: Any) -> bool:
+        """Import credential to cloud instance.
+
+        Args:
+            credential (Any): Credential object to identity user.
+
+        Return:
+            bool: Is credential valid.
+        """
+        cookies = _convert_to_cookies(credential)
+        if cookies is None:
+            return False
+        self._lac.import_cookies(cookies)
+        self._tokens.clear()
+        if _match_session(self._cached, self._lcp, cookies):
+            # Trust cached user info until an API call fails.
+            self._lcp.set_user_info(
+                user_id=self._cached.user_id,
+                user_key=self._cached.user_key
+            )
+            self._stale = True
+        else:
+            await self._after_login()
+        return True
+
+    async def _after_login(self):
+        self._tokens.clear()
+        result = await self._lac.call_api(UploadInfoApi())
+        self._lcp.set_user_info(
+            user_id=result.user_id,
+            user_key=result.user_key
+        )
+        self._stale = False
+        await self._save_session()
+
+    async def _refresh_user_info(self) -> bool:
+        if not self._stale:
+            return False
+        await self._after_login()
+        return True
+
+    async def _save_session(self):
+        if self._session is not None:
+            self._cached = _make_session_data(
+                self._lcp, self.export_credentail()
+            )
+            await asyncio.to_thread(self._session.save, self._cached)
+
+    def export_credentail(self) -> Credential | None:
+        """Export current credentail from cloud instance.
+
+        Return:
+            Credential: Credential object, or None when credential is invalid.
+        """
+        cookies = self._lac.export_cookies()
+        cred = Credential(
+            uid=cookies.get('UID', None),
+            cid=cookies.get('CID', None),
+            kid=cookies.get('KID', None),
+            seid=cookies.get('SEID', None)
+        )
+        return cred if cred else None
+
+    async def qrcode_start(
+            self, client: QrcodeClient = QrcodeClient.WEB
+        ) -> QrcodeSession:
+        """Start a QRcode login session.
+
+        Args:
+            client (QrcodeClient): Client type to simulate login.
+
+        Returns:
+            QrcodeSession: QRcode login session.
+        """
+        token = await self._lac.call_api(QrcodeTokenApi(client=client))
+        qrcode_image = await self._lac.fetch(
+            qrcode_get_image_url(token.uid)
+        )
+        return QrcodeSession(
+            client=client,
+            uid=token.uid,
+            time=token.time,
+            sign=token.sign,
+            image_data=qrcode_image
+        )
+
+    async def qrcode_poll(self, session: QrcodeSession) -> bool:
+        """Poll QRcode login status.
+
+        Args:
+            session (QrcodeSession): QRcode login session.
+        
+        Returns:
+            bool: True when login is done.
+        """
+        status = await self._lac.call_api(QrcodeStatusApi(
+            uid=session._uid,
+            time=session._time,
+            sign=session._sign
+        ))
+        if status == QrcodeStatus.ALLOWED:
+            await self._lac.call_api(QrcodeLoginApi(
+                client=session._client,
+                uid=session._uid
+            ))
+            await self._after_login()
+            return True
+        elif status == QrcodeStatus.EXPIRED:
+            # TODO: Raise custom exception.
+            raise Exception('QRcode expired!')
+        return False
+
+    def offline(self) -> AsyncOfflineService:
+        """Get offline service.
+
+        Return:
+            AsyncOfflineService: Offline service instance.
+        """
+        return AsyncOfflineService(
+            self._lac, self._lcp, self._refresh_user_info
+        )
+
+    def storage(self) -> AsyncStorageService:
+        """Get storage service.
+
+        Return:
+            AsyncStorageService: Storage service instance.
+        """
+        return AsyncStorageService(
+            self._lac, self._lcp, self._refresh_user_info, 
+            self._hash_cache, self._tokens
+        )
+
+    def lowlevel(self) -> Tuple[AsyncClient, CommonParams]:
+        """Export lowlevel client and parameters
+
+        Returns:
+            AsyncClient: Low-level asynchronous API client.
+            CommonParams: Common-used parameters for low-leve API.
+        """
+        return (self._lac, self._lcp)
+
+    async def close(self):
+        """Close underlying HTTP connections."""
+        if self._own_client:
+            await self._lac.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+
+def _make_client(
+        client_cls: Callable[..., _C], 
+        client: _C | None, 
+        client_kwargs: Dict[str, Any]
+    ) -> _C:
+    if client is None:
+        return client_cls(**client_kwargs)
+    if client_kwargs:
+        raise ValueError('client_kwargs can not be used with client')
+    return client
+
+
+def _call_with_refresh(
+        lac: Client,
+        refresher: Refresher | None,
+        make_spec: Callable[[], ApiSpec[R]]
+    ) -> Tuple[ApiSpec[R], R]:
+    spec = make_spec()
+    try:
+        return spec, lac.call_api(spec)
+    except ApiException:
+        if refresher is None or not refresher():
+            raise
+    # User info has been refreshed, rebuild spec and try again.
+    spec = make_spec()
+    return spec, lac.call_api(spec)
+
+
+async def _acall_with_refresh(
+        lac: AsyncClient,
+        refresher: AsyncRefresher | None,
+        make_spec: Callable[[], ApiSpec[R]]
+    ) -> Tuple[ApiSpec[R], R]:
+    spec = make_spec()
+    try:
+        return spec, await lac.call_api(spec)
+    except ApiException:
+        if refresher is None or not await refresher():
+            raise
+    # User info has been refreshed, rebuild spec and try again.
+    spec = make_spec()
+    return spec, await lac.call_api(spec)
+
+
+def _to_digest_result(
+        file_hash: FileHash | None, stream: BinaryIO
+    ) -> DigestResult | None:
+    # Hash again when file has been changed.
+    if file_hash is None or \
+        not file_hash.is_current(os.fstat(stream.fileno())):
+        return None
+    return DigestResult(sha1=file_hash.sha1, size=file_hash.size)
+
+
+def _no_sign(range_spec: str) -> str:
+    raise UploadError('Sign check is requested, but sign is not given!')
+
+
+async def _ano_sign(range_spec: str) -> str:
+    return _no_sign(range_spec)
+
+
+def _digest(hash_cache: HashCache | None, stream: BinaryIO) -> DigestResult:
+    if hash_cache is None:
+        return digest(stream)
+    return hash_cache.digest(stream)
+
+
+def _digest_range(
+        hash_cache: HashCache | None, stream: BinaryIO, range_spec: str
+    ) -> str:
+    if hash_cache is None:
+        return digest_range(stream, range_spec)
+    return hash_cache.digest_range(stream, range_spec)
+
+
+async def _aspool(
+        chunks: AsyncIterable[bytes], max_memory: int
+    ) -> Tuple[BinaryIO, DigestResult]:
+    spooler = Spooler(max_memory)
+    try:
+        # Hashing and temporary file writes run in a thread, batch small 
+        # chunks to keep the hops few.
+        batch = bytearray()
+        async for chunk in chunks:
+            batch += chunk
+            if len(batch) >= _SPOOL_BATCH_SIZE:
+                await asyncio.to_thread(spooler.write, batch)
+                batch = bytearray()
+        if batch:
+            await asyncio.to_thread(spooler.write, batch)
+        return await asyncio.to_thread(spooler.finish)
+    except BaseException:
+        await asyncio.to_thread(spooler.close)
+        raise
+
+
+def _make_session_cache(
+        session: SessionCache | str | None
+    ) -> SessionCache | None:
+    if isinstance(session, str):
+        return SessionCache(session)
+    return session
+
+
+def _make_session_data(
+        lcp: CommonParams, credential: Credential | None
+    ) -> SessionData:
+    data = SessionData(app_ver=lcp.app_ver)
+    if credential is not None:
+        data.cookies = _strip_cookies(credential.to_dict())
+        data.user_id = lcp.user_id
+        data.user_key = lcp.user_key
+    return data
+
+
+def _match_session(
+        cached: SessionData | None, 
+        lcp: CommonParams, 
+        cookies: Dict[str, str]
+    ) -> bool:
+    return cached is not None \
+        and cached.has_user_info() \
+        and cached.app_ver == lcp.app_ver \
+        and cached.cookies == _strip_cookies(cookies)
+
+
+def _strip_cookies(cookies: Dict[str, str | None]) -> Dict[str, str]:
+    return dict((k, v) for k, v in cookies.items() if v is not None)
+
+
+def _convert_to_cookies(credential: Any) -> Dict[str, str] | None:
+    if isinstance(credential, Credential):
+        return credential.to_dict()
+    # Handle dict or object
+    raw: Dict[str, Any] = None
+    if isinstance(credential, dict):
+        raw = credential
+    elif hasattr(credential, '__dict__'):
+        raw = credential.__dict__
+    if raw is None:
+        return None
+    # Extract cookies from credentials
+    cookies = {}
+    for key, value in raw.items():
+        key = key.upper()
+        if key in ('UID', 'CID', 'KID', 'SEID'):
+            cookies[key] = str(value)
+    return cookies
+
+
+def _fill_ticket_headers(
+        lac: BaseClient, 
+        ticket: DownloadTicket | PlayTicket, 
+        url: str
+    ):
+    ticket.headers['User-Agent'] = lac.user_agent
+    cookies = lac.export_cookies(target_url=url)
+    if len(cookies) > 0:
+        ticket.headers['Cookie'] = '; '.join([
+            f'{name}={value}' for name, value in cookies.items()
+        ])
+
+
+def _make_download_ticket(lac: BaseClient, dr: DownloadResult) -> DownloadTicket:
+    ticket = DownloadTicket(
+        url=dr.url,
+        file_name=dr.file_name,
+        file_size=dr.file_size
+    )
+    # Fill required headers
+    _fill_ticket_headers(lac, ticket, dr.url)
+    return ticket
+
+
+def _make_upload_ticket(
+        result: UploadInitOssResult, 
+        token: UploadToken, 
+        file_sha1: str
+    ) -> UploadTicket:
+    return UploadTicket(
+        region=oss.REGION,
+        endpoint=oss.ENDPOINT,
+        access_key_id=token.access_key_id,
+        access_key_secret=token.access_key_secret,
+        security_token=token.security_token,
+        bucket_name=result.bucket,
+        object_key=result.object,
+        callback=oss.encode_header_value(
+            oss.replace_callback_sha1(result.callback, file_sha1)
+        ),
+        callback_var=oss.encode_header_value(result.callback_var),
+        expiration=token.expiration
+    )
@@ -0,0 +1,712 @@
+__author__ = 'deadblue'
+
+import asyncio
+import hashlib
+import json
+import os
+import os.path as ospath
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import (
+    Any, Awaitable, Callable, Dict, List, Set, Tuple
+)
+
+import httpx
+
+from py115.exceptions import DownloadError
+from py115.lowlevel.retry import RetryPolicy
+from py115.types import DownloadTicket, ProgressHook
+
+
+MIN_CHUNK_SIZE = 256 * 1024
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+
+_JOURNAL_VERSION = 1
+
+_BUFFER_SIZE = 1024 * 1024
+
+_EXPIRED_STATUSES = frozenset([401, 403, 404, 410])
+"""HTTP status codes which mean download URL has expired."""
+
+_MAX_RESOLVES = 3
+"""Maximum times to resolve a new ticket for one range."""
+
+TicketResolver = Callable[[], DownloadTicket]
+"""
+Callback to get a new download ticket of the same file, such as
+`request_download` of storage service.
+"""
+
+AsyncTicketResolver = Callable[[], Awaitable[DownloadTicket]]
+
+_Range = Tuple[int, int, int]
+
+
+def choose_chunk_size(
+        file_size: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY
+    ) -> int:
+    """
+    Choose range size for a download. Range size shrinks to keep all
+    connections busy on small files.
+
+    Args:
+        file_size (int): Size of file to download.
+        chunk_size (int): Preferred range size.
+        concurrency (int): Number of ranges to download in parallel.
+
+    Returns:
+        int: Range size in bytes.
+    """
+    size = min(chunk_size, -(-file_size // concurrency))
+    return max(size, MIN_CHUNK_SIZE)
+
+
+def _plan_ranges(file_size: int, chunk_size: int) -> List[_Range]:
+    return [
+        (index, offset, min(chunk_size, file_size - offset))
+        for index, offset in enumerate(range(0, file_size, chunk_size))
+    ]
+
+
+@dataclass
+class _Journal:
+    file_name: str
+    size: int
+    chunk_size: int
+    sha1: str | None
+    done: List[int] = field(default_factory=list)
+
+
+def _load_journal(
+        path: str | None,
+        ticket: DownloadTicket,
+        sha1: str | None,
+        fd: int
+    ) -> _Journal | None:
+    if path is None:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as fp:
+            obj = json.load(fp)
+        if obj.get('version') != _JOURNAL_VERSION:
+            return None
+        journal = _Journal(**obj['data'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # Journal of another file, or of a truncated file is useless.
+    if journal.file_name != ticket.file_name or \
+        journal.size != ticket.file_size or \
+        journal.sha1 != sha1 or \
+        os.fstat(fd).st_size != ticket.file_size:
+        return None
+    return journal
+
+
+def _save_journal(path: str | None, journal: _Journal):
+    if path is None:
+        return
+    dir_name = ospath.dirname(ospath.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix='.py115-download-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+            json.dump({
+                'version': _JOURNAL_VERSION,
+                'data': asdict(journal)
+            }, fp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remove_file(path: str | None):
+    if path is None:
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _copy_ticket(ticket: DownloadTicket) -> DownloadTicket:
+    # Ticket is updated when URL expires, leave caller's one untouched.
+    new_ticket = DownloadTicket(ticket.url, ticket.file_name, ticket.file_size)
+    new_ticket.headers = dict(ticket.headers)
+    return new_ticket
+
+
+def _open_target(path: str) -> int:
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+    return os.open(path, flags, 0o644)
+
+
+def _preallocate(fd: int, size: int):
+    if os.fstat(fd).st_size != 0:
+        # Never clobber a file which can not be resumed.
+        raise DownloadError(
+            'Target file already exists, and can not be resumed!'
+        )
+    if size == 0:
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)
+
+
+class _FileWriter:
+    """
+    _FileWriter writes and reads ranges of a file from multiple threads, by
+    `os.pwrite` and `os.pread` without locking where they are available.
+    """
+
+    _fd: int
+    _lock: 'threading.Lock | None'
+
+    def __init__(self, fd: int) -> None:
+        self._fd = fd
+        self._lock = None if hasattr(os, 'pwrite') else threading.Lock()
+
+    def write(self, offset: int, data: bytes | memoryview):
+        view = memoryview(data)
+        if self._lock is None:
+            while len(view) > 0:
+                n = os.pwrite(self._fd, view, offset)
+                view, offset = view[n:], offset + n
+        else:
+            with self._lock:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                while len(view) > 0:
+                    view = view[os.write(self._fd, view):]
+
+    def read(self, offset: int, size: int) -> bytes:
+        if self._lock is None:
+            return os.pread(self._fd, size, offset)
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+
+class _Verifier:
+    """
+    _Verifier calculates SHA-1 of the file, by reading back ranges in order
+    as soon as they are downloaded.
+    """
+
+    _file: _FileWriter
+    _ranges: List[_Range]
+    _done: Set[int]
+    _next: int
+    _h: 'hashlib._Hash'
+
+    def __init__(self, file: _FileWriter, ranges: List[_Range]) -> None:
+        self._file = file
+        self._ranges = ranges
+        self._done = set()
+        self._next = 0
+        self._h = hashlib.sha1()
+
+    def add(self, index: int):
+        self._done.add(index)
+
+    def advance(self):
+        """
+        Hash all leading ranges which have been downloaded.
+        """
+        while self._next in self._done:
+            _, offset, size = self._ranges[self._next]
+            while size > 0:
+                data = self._file.read(offset, min(size, _BUFFER_SIZE))
+                if not data:
+                    raise DownloadError('Downloaded file is truncated!')
+                self._h.update(data)
+                offset += len(data)
+                size -= len(data)
+            self._done.discard(self._next)
+            self._next += 1
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest().upper()
+
+
+def _check_sha1(expected: str | None, actual: str):
+    if expected is not None and expected.upper() != actual:
+        raise DownloadError(
+            f'SHA-1 mismatch: expected {expected.upper()}, got {actual}'
+        )
+
+
+class _BaseDownloader:
+
+    _concurrency: int
+    _chunk_size: int
+    _retry_policy: RetryPolicy
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            retry_policy: RetryPolicy | None = None
+        ) -> None:
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        if chunk_size < MIN_CHUNK_SIZE:
+            raise ValueError(f'chunk_size must be at least {MIN_CHUNK_SIZE}')
+        self._concurrency = concurrency
+        self._chunk_size = chunk_size
+        self._retry_policy = retry_policy or RetryPolicy(
+            max_attempts=5, deadline=None
+        )
+
+    def _prepare(
+            self,
+            ticket: DownloadTicket,
+            fd: int,
+            sha1: str | None,
+            journal_path: str | None
+        ) -> Tuple[_Journal, List[_Range]]:
+        journal = _load_journal(journal_path, ticket, sha1, fd)
+        if journal is None:
+            journal = _Journal(
+                file_name=ticket.file_name,
+                size=ticket.file_size,
+                chunk_size=choose_chunk_size(
+                    ticket.file_size, self._chunk_size, self._concurrency
+                ),
+                sha1=sha1
+            )
+            _preallocate(fd, ticket.file_size)
+            _save_journal(journal_path, journal)
+        return journal, _plan_ranges(journal.size, journal.chunk_size)
+
+    def _range_headers(
+            self, ticket: DownloadTicket, offset: int, end: int
+        ) -> Dict[str, str]:
+        headers = dict(ticket.headers)
+        headers['Range'] = f'bytes={offset}-{end}'
+        return headers
+
+    def _check_response(
+            self, resp: httpx.Response, offset: int, size: int, file_size: int
+        ):
+        if resp.status_code == 200 and offset == 0 and size == file_size:
+            # Server ignores range of the whole file, that is fine.
+            return
+        if resp.status_code != 206:
+            resp.raise_for_status()
+            raise DownloadError(
+                f'Server does not support range request: {resp.status_code}'
+            )
+
+    def _is_expired(self, error: Exception, resolvable: bool) -> bool:
+        return resolvable and isinstance(error, httpx.HTTPStatusError) and \
+            error.response.status_code in _EXPIRED_STATUSES
+
+    def _update_ticket(self, ticket: DownloadTicket, new_ticket: DownloadTicket):
+        if new_ticket.file_size != ticket.file_size:
+            raise DownloadError('File has been changed during download!')
+        ticket.url = new_ticket.url
+        ticket.headers = dict(new_ticket.headers)
+
+
+class Downloader(_BaseDownloader):
+    """
+    Downloader downloads file from cloud storage with a `DownloadTicket`.
+
+    File is split into ranges which are fetched over multiple connections,
+    each range is retried on transient errors and resumed from where it
+    stopped. When a journal file is specified, an interrupted download
+    resumes from the downloaded ranges.
+    """
+
+    _hc: httpx.Client
+    _resolve_lock: threading.Lock
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            retry_policy: RetryPolicy | None = None,
+            **kwargs: Any
+        ) -> None:
+        """
+        Args:
+            concurrency (int): Maximum number of connections.
+            chunk_size (int): Preferred range size, it is adjusted by file
+                size.
+            retry_policy (RetryPolicy): Retry policy for every range.
+            **kwargs: Extra arguments for underlying HTTP client.
+        """
+        super().__init__(
+            concurrency=concurrency,
+            chunk_size=chunk_size,
+            retry_policy=retry_policy
+        )
+        kwargs.setdefault('timeout', httpx.Timeout(60.0, connect=10.0))
+        kwargs.setdefault('follow_redirects', True)
+        self._hc = httpx.Client(**kwargs)
+        self._resolve_lock = threading.Lock()
+
+    def _resolve(
+            self,
+            ticket: DownloadTicket,
+            expired_url: str,
+            resolve: TicketResolver
+        ):
+        with self._resolve_lock:
+            # Another range may have resolved it.
+            if ticket.url == expired_url:
+                self._update_ticket(ticket, resolve())
+
+    def _download_range(
+            self,
+            ticket: DownloadTicket,
+            writer: _FileWriter,
+            part: _Range,
+            resolve: TicketResolver | None,
+            progress: Callable[[int], None]
+        ):
+        _, offset, size = part
+        end = offset + size - 1
+        state, resolves = self._retry_policy.start(), 0
+        while True:
+            url = ticket.url
+            try:
+                with self._hc.stream(
+                    'GET', url,
+                    headers=self._range_headers(ticket, offset, end)
+                ) as resp:
+                    self._check_response(resp, offset, size, ticket.file_size)
+                    # Drain the body even when range is filled, so the
+                    # connection goes back to pool instead of being closed.
+                    for data in resp.iter_bytes(_BUFFER_SIZE):
+                        data = data[:end + 1 - offset]
+                        if data:
+                            writer.write(offset, data)
+                            offset += len(data)
+                            progress(len(data))
+                if offset > end:
+                    return
+                # Retry remaining bytes of the range.
+                raise httpx.RemoteProtocolError(
+                    'Incomplete range response', request=resp.request
+                )
+            except Exception as e:
+                if resolves < _MAX_RESOLVES and \
+                    self._is_expired(e, resolve is not None):
+                    resolves += 1
+                    self._resolve(ticket, url, resolve)
+                    continue
+                delay = state.next_delay(e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    def download(
+            self,
+            ticket: DownloadTicket,
+            path: str,
+            *,
+            sha1: str | None = None,
+            resolve: TicketResolver | None = None,
+            journal: str | None = None,
+            progress: ProgressHook | None = None
+        ) -> str:
+        """
+        Download whole file to local path.
+
+        Args:
+            ticket (DownloadTicket): Download ticket from `request_download`.
+            path (str): Local path to save the file.
+            sha1 (str): Expected SHA-1 of the file, such as `sha1` of `File`.
+            resolve (TicketResolver): Callback to get a new ticket when the
+                download URL expires.
+            journal (str): Path of journal file to resume download from, it
+                is removed after download completes. Existing target file 
+                which can not be resumed by journal is never overwritten.
+                Without journal, partial target file is removed when the
+                download fails.
+            progress (ProgressHook): Hook to receive download progress.
+
+        Returns:
+            str: Upper-case hex SHA-1 of downloaded file.
+        """
+        ticket = _copy_ticket(ticket)
+        fd = _open_target(path)
+        # Without journal, a partial file can not be resumed and would block
+        # next download of the same path, so it is removed on failure.
+        discard = False
+        try:
+            try:
+                jn, plan = self._prepare(ticket, fd, sha1, journal)
+                discard = journal is None
+                writer = _FileWriter(fd)
+                verifier = _Verifier(writer, plan)
+                size, done_size = jn.size, 0
+                lock = threading.Lock()
+                for index in jn.done:
+                    verifier.add(index)
+                    done_size += plan[index][2]
+
+                def on_progress(n: int):
+                    nonlocal done_size
+                    with lock:
+                        done_size += n
+                        if progress is not None:
+                            progress(done_size, size)
+
+                on_progress(0)
+                executor = ThreadPoolExecutor(
+                    max_workers=self._concurrency,
+                    thread_name_prefix='py115-download'
+                )
+                try:
+                    futures = dict(
+                        (executor.submit(
+                            self._download_range, ticket, writer, part,
+                            resolve, on_progress
+                        ), part[0]) for part in plan if part[0] not in jn.done
+                    )
+                    pending = set(futures)
+                    while pending:
+                        finished, pending = wait(
+                            pending, timeout=None, return_when=FIRST_COMPLETED
+                        )
+                        for future in finished:
+                            future.result()
+                            jn.done.append(futures[future])
+                            verifier.add(futures[future])
+                        _save_journal(journal, jn)
+                        # Hash downloaded data while other ranges are running.
+                        verifier.advance()
+                finally:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                verifier.advance()
+            finally:
+                os.close(fd)
+            _remove_file(journal)
+            result = verifier.hexdigest()
+            # Corrupted file is useless even with a journal.
+            discard = True
+            _check_sha1(sha1, result)
+        except BaseException:
+            if discard:
+                _remove_file(path)
+            raise
+        return result
+
+    def close(self):
+        self._hc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class AsyncDownloader(_BaseDownloader):
+    """
+    Asynchronous version of Downloader.
+    """
+
+    _hc: httpx.AsyncClient
+    _resolve_lock: 'asyncio.Lock | None'
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            retry_policy: RetryPolicy | None = None,
+            **kwargs: Any
+        ) -> None:
+        """
+        Args:
+            concurrency (int): Maximum number of connections.
+            chunk_size (int): Preferred range size, it is adjusted by file
+                size.
+            retry_policy (RetryPolicy): Retry policy for every range.
+            **kwargs: Extra arguments for underlying HTTP client.
+        """
+        super().__init__(
+            concurrency=concurrency,
+            chunk_size=chunk_size,
+            retry_policy=retry_policy
+        )
+        kwargs.setdefault('timeout', httpx.Timeout(60.0, connect=10.0))
+        kwargs.setdefault('follow_redirects', True)
+        self._hc = httpx.AsyncClient(**kwargs)
+        # Lock is created in running loop
+        self._resolve_lock = None
+
+    async def _resolve(
+            self,
+            ticket: DownloadTicket,
+            expired_url: str,
+            resolve: AsyncTicketResolver
+        ):
+        if self._resolve_lock is None:
+            self._resolve_lock = asyncio.Lock()
+        async with self._resolve_lock:
+            # Another range may have resolved it.
+            if ticket.url == expired_url:
+                self._update_ticket(ticket, await resolve())
+
+    async def _download_range(
+            self,
+            ticket: DownloadTicket,
+            writer: _FileWriter,
+            part: _Range,
+            resolve: AsyncTicketResolver | None,
+            progress: Callable[[int], None]
+        ) -> int:
+        index, offset, size = part
+        end = offset + size - 1
+        state, resolves = self._retry_policy.start(), 0
+        while True:
+            url = ticket.url
+            try:
+                async with self._hc.stream(
+                    'GET', url,
+                    headers=self._range_headers(ticket, offset, end)
+                ) as resp:
+                    self._check_response(resp, offset, size, ticket.file_size)
+                    async for data in resp.aiter_bytes(_BUFFER_SIZE):
+                        data = data[:end + 1 - offset]
+                        if data:
+                            # Disk may stall, do not block the event loop.
+                            await asyncio.to_thread(
+                                writer.write, offset, data
+                            )
+                            offset += len(data)
+                            progress(len(data))
+                if offset > end:
+                    return index
+                raise httpx.RemoteProtocolError(
+                    'Incomplete range response', request=resp.request
+                )
+            except Exception as e:
+                if resolves < _MAX_RESOLVES and \
+                    self._is_expired(e, resolve is not None):
+                    resolves += 1
+                    await self._resolve(ticket, url, resolve)
+                    continue
+                delay = state.next_delay(e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    async def download(
+            self,
+            ticket: DownloadTicket,
+            path: str,
+            *,
+            sha1: str | None = None,
+            resolve: AsyncTicketResolver | None = None,
+            journal: str | None = None,
+            progress: ProgressHook | None = None
+        ) -> str:
+        """
+        Download whole file to local path.
+
+        Args:
+            ticket (DownloadTicket): Download ticket from `request_download`.
+            path (str): Local path to save the file.
+            sha1 (str): Expected SHA-1 of the file, such as `sha1` of `File`.
+            resolve (AsyncTicketResolver): Callback to get a new ticket when
+                the download URL expires.
+            journal (str): Path of journal file to resume download from, it
+                is removed after download completes. Existing target file 
+                which can not be resumed by journal is never overwritten.
+                Without journal, partial target file is removed when the
+                download fails.
+            progress (ProgressHook): Hook to receive download progress.
+
+        Returns:
+            str: Upper-case hex SHA-1 of downloaded file.
+        """
+        ticket = _copy_ticket(ticket)
+        fd = await asyncio.to_thread(_open_target, path)
+        # Without journal, a partial file can not be resumed and would block
+        # next download of the same path, so it is removed on failure.
+        discard = False
+        try:
+            try:
+                jn, plan = await asyncio.to_thread(
+                    self._prepare, ticket, fd, sha1, journal
+                )
+                discard = journal is None
+                writer = _FileWriter(fd)
+                verifier = _Verifier(writer, plan)
+                size, done_size = jn.size, 0
+                for index in jn.done:
+                    verifier.add(index)
+                    done_size += plan[index][2]
+
+                def on_progress(n: int):
+                    nonlocal done_size
+                    done_size += n
+                    if progress is not None:
+                        progress(done_size, size)
+
+                on_progress(0)
+                semaphore = asyncio.Semaphore(self._concurrency)
+
+                async def run(part: _Range) -> int:
+                    async with semaphore:
+                        return await self._download_range(
+                            ticket, writer, part, resolve, on_progress
+                        )
+
+                pending = set(
+                    asyncio.create_task(run(part))
+                    for part in plan if part[0] not in jn.done
+                )
+                try:
+                    while pending:
+                        finished, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for task in finished:
+                            index = task.result()
+                            jn.done.append(index)
+                            verifier.add(index)
+                        await asyncio.to_thread(_save_journal, journal, jn)
+                        # Hash downloaded data while other ranges are running.
+                        await asyncio.to_thread(verifier.advance)
+                finally:
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                await asyncio.to_thread(verifier.advance)
+            finally:
+                os.close(fd)
+            _remove_file(journal)
+            result = verifier.hexdigest()
+            # Corrupted file is useless even with a journal.
+            discard = True
+            _check_sha1(sha1, result)
+        except BaseException:
+            if discard:
+                await asyncio.to_thread(_remove_file, path)
+            raise
+        return result
+
+    async def aclose(self):
+        await self._hc.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
@@ -0,0 +1,13 @@
+__author__ = 'deadblue'
+
+
+class UploadError(Exception):
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+
+class DownloadError(Exception):
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
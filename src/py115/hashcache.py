@@ -0,0 +1,219 @@
+__author__ = 'deadblue'
+
+import io
+import os
+import os.path as ospath
+import sqlite3
+import stat
+import sys
+import threading
+from typing import BinaryIO, Tuple
+
+from py115._internal.crypto.hash import (
+    DigestResult, digest, digest_range
+)
+
+
+_SCHEMA_VERSION = 1
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    path TEXT,
+    sha1 TEXT NOT NULL,
+    PRIMARY KEY (dev, ino)
+);
+CREATE TABLE IF NOT EXISTS ranges (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    range_spec TEXT NOT NULL,
+    sha1 TEXT NOT NULL,
+    PRIMARY KEY (dev, ino, range_spec)
+);
+'''
+
+FileKey = Tuple[int, int, int, int]
+"""Identity of a file: device, inode, size and mtime in nanoseconds."""
+
+
+def file_key(st: os.stat_result) -> FileKey | None:
+    """
+    Get cache key of a file from its stat, None when it is not a regular 
+    file.
+    """
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def default_cache_path() -> str:
+    """
+    Get default path of hash cache under user cache directory.
+    """
+    if sys.platform == 'win32':
+        base_dir = os.environ.get('LOCALAPPDATA', None) \
+            or ospath.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        base_dir = ospath.expanduser('~/Library/Caches')
+    else:
+        base_dir = os.environ.get('XDG_CACHE_HOME', None) \
+            or ospath.expanduser('~/.cache')
+    return ospath.join(base_dir, 'py115', 'hashes.sqlite3')
+
+
+class HashCache:
+    """
+    HashCache persists SHA-1 of local files in a SQLite database, including
+    ranged SHA-1 used by upload sign checks.
+
+    A file is identified by its device and inode, and its cached hashes are
+    dropped once its size or mtime changes. Streams which are not regular
+    files are hashed without cache.
+
+    It is thread-safe, and can be shared by multiple cloud instances.
+    """
+
+    _path: str
+    _lock: threading.Lock
+    _conn: sqlite3.Connection
+
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Args:
+            path (str): Path of database file, default path under user cache
+                directory is used when not specified.
+        """
+        self._path = path or default_cache_path()
+        if self._path != ':memory:':
+            os.makedirs(ospath.dirname(ospath.abspath(self._path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self._path, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            try:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.DatabaseError:
+                pass
+            version, = self._conn.execute('PRAGMA user_version').fetchone()
+            if version != _SCHEMA_VERSION:
+                self._conn.executescript(
+                    'DROP TABLE IF EXISTS files;'
+                    'DROP TABLE IF EXISTS ranges;'
+                    f'{_SCHEMA}'
+                    f'PRAGMA user_version={_SCHEMA_VERSION};'
+                )
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _get_key(self, stream: BinaryIO) -> FileKey | None:
+        try:
+            return file_key(os.fstat(stream.fileno()))
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def _lookup(self, key: FileKey) -> str | None:
+        # Caller must hold the lock
+        row = self._conn.execute(
+            'SELECT size, mtime_ns, sha1 FROM files WHERE dev=? AND ino=?',
+            key[:2]
+        ).fetchone()
+        if row is None:
+            return None
+        if (row[0], row[1]) != key[2:]:
+            # File has been changed
+            self._conn.execute(
+                'DELETE FROM ranges WHERE dev=? AND ino=?', key[:2]
+            )
+            self._conn.execute(
+                'DELETE FROM files WHERE dev=? AND ino=?', key[:2]
+            )
+            return None
+        return row[2]
+
+    def lookup(self, key: FileKey) -> str | None:
+        """
+        Get cached SHA-1 of a file by its key from `file_key()`, None when
+        it is not cached or the file has been changed.
+        """
+        with self._lock:
+            return self._lookup(key)
+
+    def store(self, key: FileKey, path: str | None, sha1: str):
+        """
+        Store SHA-1 of a file by its key from `file_key()`, which must be 
+        taken before hashing, and unchanged after.
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                key + (path, sha1)
+            )
+
+    def digest(self, stream: BinaryIO) -> DigestResult:
+        """
+        Calculate SHA-1 of the whole file behind stream, or get it from
+        cache when the file is unchanged.
+        """
+        key = None
+        if stream.seekable() and stream.tell() == 0:
+            key = self._get_key(stream)
+        if key is None:
+            return digest(stream)
+        sha1 = self.lookup(key)
+        if sha1 is not None:
+            stream.seek(0, io.SEEK_END)
+            return DigestResult(sha1=sha1, size=key[2])
+        dr = digest(stream)
+        if dr.size == key[2]:
+            self.store(key, getattr(stream, 'name', None), dr.sha1)
+        return dr
+
+    def digest_range(self, stream: BinaryIO, range_spec: str) -> str:
+        """
+        Calculate SHA-1 of a range of the file behind stream, or get it from
+        cache when the file is unchanged.
+        """
+        key = self._get_key(stream)
+        if key is None:
+            return digest_range(stream, range_spec)
+        with self._lock:
+            row = None
+            if self._lookup(key) is not None:
+                row = self._conn.execute(
+                    'SELECT sha1 FROM ranges '
+                    'WHERE dev=? AND ino=? AND range_spec=?',
+                    key[:2] + (range_spec, )
+                ).fetchone()
+        if row is not None:
+            return row[0]
+        sha1 = digest_range(stream, range_spec)
+        if sha1 is not None:
+            with self._lock:
+                # Ranged hash is kept only along with the whole file hash.
+                if self._lookup(key) is not None:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO ranges VALUES (?, ?, ?, ?)',
+                        key[:2] + (range_spec, sha1)
+                    )
+        return sha1
+
+    def clear(self):
+        """
+        Remove all cached hashes.
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM ranges')
+            self._conn.execute('DELETE FROM files')
+
+    def close(self):
+        """
+        Close the database.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,209 @@
+__author__ = 'deadblue'
+
+import asyncio
+import os
+from concurrent.futures import (
+    Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+)
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+)
+
+from py115._internal.crypto.hash import digest
+from py115.hashcache import FileKey, HashCache, file_key
+
+
+@dataclass
+class FileHash:
+    """
+    FileHash is the hashing result of a local file.
+    """
+
+    path: str
+    """Local file path."""
+
+    size: int
+    """File size in bytes."""
+
+    sha1: str | None
+    """Upper-case hex SHA-1 of file, None when hashing failed."""
+
+    error: Exception | None = None
+    """Error raised when hashing the file."""
+
+    key: FileKey | None = None
+    """Device, inode, size and mtime of the file when it was hashed, None 
+    when it is unknown."""
+
+    def is_current(self, st: os.stat_result) -> bool:
+        """
+        Check whether the file with stat `st` is unchanged since hashing, 
+        so that the SHA-1 can be reused.
+        """
+        return self.sha1 is not None and self.key is not None \
+            and file_key(st) == self.key
+
+
+def digest_path(path: str, hash_cache: HashCache | None = None) -> FileHash:
+    """
+    Hash a local file, or get its SHA-1 from cache when it is unchanged.
+
+    Args:
+        path (str): Local file path.
+        hash_cache (HashCache): Cache to lookup and store the result.
+
+    Returns:
+        FileHash: Hashing result of the file, errors are raised instead of
+            being set into it.
+    """
+    with open(path, 'rb') as fp:
+        key = file_key(os.fstat(fp.fileno()))
+        if hash_cache is None or key is None:
+            dr = digest(fp)
+        else:
+            dr = hash_cache.digest(fp)
+        # File is changed during hashing, its key is not trustable.
+        if key is not None and file_key(os.fstat(fp.fileno())) != key:
+            key = None
+    return FileHash(path, dr.size, dr.sha1, key=key)
+
+
+def _hash_file(path: str) -> Tuple[int, str, FileKey | None]:
+    with open(path, 'rb') as fp:
+        key = file_key(os.fstat(fp.fileno()))
+        dr = digest(fp)
+        # Do not cache the result when file is changed during hashing.
+        if key is not None and file_key(os.fstat(fp.fileno())) != key:
+            key = None
+    return dr.size, dr.sha1, key
+
+
+def _prepare(
+        paths: Iterable[str],
+        hash_cache: HashCache | None
+    ) -> Tuple[List[FileHash], List[str]]:
+    done, jobs = [], []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            done.append(FileHash(path, 0, None, e))
+            continue
+        key = file_key(st)
+        if hash_cache is not None and key is not None:
+            sha1 = hash_cache.lookup(key)
+            if sha1 is not None:
+                done.append(FileHash(path, st.st_size, sha1, key=key))
+                continue
+        jobs.append((st.st_size, path))
+    # Hash largest files first, so that no big file is left running alone
+    # at the end.
+    jobs.sort(key=lambda job: job[0], reverse=True)
+    return done, [path for _, path in jobs]
+
+
+def _new_executor(workers: int | None, processes: bool) -> Executor:
+    if workers is not None and workers < 1:
+        raise ValueError('workers must be at least 1')
+    if processes:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='py115-hash'
+    )
+
+
+def _make_result(
+        path: str,
+        future: Future,
+        hash_cache: HashCache | None
+    ) -> FileHash:
+    try:
+        size, sha1, key = future.result()
+    except Exception as e:
+        return FileHash(path, 0, None, e)
+    if hash_cache is not None and key is not None:
+        hash_cache.store(key, path, sha1)
+    return FileHash(path, size, sha1, key=key)
+
+
+def hash_files(
+        paths: Iterable[str],
+        *,
+        workers: int | None = None,
+        processes: bool = False,
+        hash_cache: HashCache | None = None
+    ) -> Iterator[FileHash]:
+    """
+    Hash multiple local files in parallel, and yield results as they
+    complete.
+
+    Args:
+        paths (Iterable[str]): Local file paths.
+        workers (int): Maximum number of workers, default value of the
+            executor is used when not specified.
+        processes (bool): Hash in a process pool instead of a thread pool.
+            Threads are usually enough, since hashing releases the GIL.
+        hash_cache (HashCache): Cache to lookup and store results.
+
+    Yields:
+        FileHash: Hashing result of a file.
+    """
+    done, jobs = _prepare(paths, hash_cache)
+    yield from done
+    if len(jobs) == 0:
+        return
+    executor = _new_executor(workers, processes)
+    try:
+        futures = {
+            executor.submit(_hash_file, path): path for path in jobs
+        }
+        for future in as_completed(futures):
+            yield _make_result(futures[future], future, hash_cache)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def hash_files_async(
+        paths: Iterable[str],
+        *,
+        workers: int | None = None,
+        processes: bool = False,
+        hash_cache: HashCache | None = None
+    ) -> AsyncIterator[FileHash]:
+    """
+    Asynchronous version of `hash_files`.
+
+    Args:
+        paths (Iterable[str]): Local file paths.
+        workers (int): Maximum number of workers, default value of the
+            executor is used when not specified.
+        processes (bool): Hash in a process pool instead of a thread pool.
+        hash_cache (HashCache): Cache to lookup and store results.
+
+    Yields:
+        FileHash: Hashing result of a file.
+    """
+    done, jobs = await asyncio.to_thread(_prepare, paths, hash_cache)
+    for result in done:
+        yield result
+    if len(jobs) == 0:
+        return
+    executor = _new_executor(workers, processes)
+    try:
+        futures: Dict[asyncio.Future, Tuple[str, Future]] = {}
+        for path in jobs:
+            future = executor.submit(_hash_file, path)
+            futures[asyncio.wrap_future(future)] = (path, future)
+        pending = set(futures)
+        while pending:
+            finished, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for fut in finished:
+                path, future = futures[fut]
+                yield await asyncio.to_thread(
+                    _make_result, path, future, hash_cache
+                )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,53 @@
 __author__ = 'deadblue'
 
-from .client import Client, AsyncClient
-from .exceptions import ApiException
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .cache import ApiCache, CacheStats, MemoryCache
+    from .client import Client, AsyncClient
+    from .concurrency import AdaptiveConcurrency
+    from .exceptions import ApiException
+    from .ratelimit import Rate, RateLimiter
+    from .retry import RetryPolicy
+    from .singleflight import AsyncSingleFlight, SingleFlight
+
+# Public names are loaded on first access, so importing a submodule does 
+# not pull in HTTP client and its dependencies.
+_LAZY_NAMES = {
+    'ApiCache': '.cache',
+    'CacheStats': '.cache',
+    'MemoryCache': '.cache',
+    'Client': '.client',
+    'AsyncClient': '.client',
+    'AdaptiveConcurrency': '.concurrency',
+    'ApiException': '.exceptions',
+    'Rate': '.ratelimit',
+    'RateLimiter': '.ratelimit',
+    'RetryPolicy': '.retry',
+    'SingleFlight': '.singleflight',
+    'AsyncSingleFlight': '.singleflight',
+}
 
 __all__ = [
     'Client', 'AsyncClient',
-    'ApiException'
+    'ApiCache', 'CacheStats', 'MemoryCache',
+    'AdaptiveConcurrency',
+    'ApiException',
+    'Rate', 'RateLimiter',
+    'RetryPolicy',
+    'SingleFlight', 'AsyncSingleFlight'
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_NAMES.get(name, None)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -20,6 +20,17 @@ _MIME_TYPE_WWW_FORM = 'application/x-www-form-urlencoded'
 JsonResult: TypeAlias = Dict[str, Any]
 
 
+# Tags for cached results
+TAG_PATH = 'path'
+TAG_STORAGE = 'storage'
+TAG_LABEL = 'label'
+TAG_USER = 'user'
+
+
+def file_tag(file_id: str) -> str:
+    return f'file:{file_id}'
+
+
 class JsonApiSpec(ApiSpec[R], ABC):
 
     def __init__(self, api_url: str) -> None:
@@ -1,5 +1,7 @@
 __author__ = 'deadblue'
 
+from typing import Hashable
+
 from py115.lowlevel.types.app import (
     AppName, AppVersion, AppVersionResult
 )
@@ -11,6 +13,14 @@ class AppVersionApi(JsonApiSpec[AppVersionResult]):
     def __init__(self) -> None:
         super().__init__('https://appversion.115.com/1/web/1.0/api/getMultiVer')
 
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('AppVersionApi',)
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 3600.0
+
     def _parse_json_result(self, json_obj: JsonResult) -> AppVersionResult:
         result: AppVersionResult = {}
         for key, value in json_obj.get('data').items():
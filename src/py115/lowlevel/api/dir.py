@@ -1,8 +1,10 @@
 __author__ = 'deadblue'
 
+from typing import Hashable, Iterable
+
 from py115.lowlevel.types.dir import DirOrder
 from ._base import (
-    JsonApiSpec, JsonResult, VoidApiSpec
+    JsonApiSpec, JsonResult, VoidApiSpec, TAG_PATH, file_tag
 )
 
 
@@ -17,6 +19,10 @@ class DirMakeApi(JsonApiSpec[str]):
             'cname': dir_name
         })
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (TAG_PATH, file_tag(self.form['pid']))
+
     def _parse_json_result(self, json_obj: JsonResult) -> str:
         return json_obj.get('file_id')
 
@@ -32,12 +38,28 @@ class DirSetOrderApi(VoidApiSpec):
             'fc_mix': 0
         })
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (file_tag(self.form['file_id']),)
+
 
 class DirGetIdApi(JsonApiSpec[str]):
 
     def __init__(self, path: str):
         super().__init__('https://webapi.115.com/files/getid')
         self.query['path'] = path
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('DirGetIdApi', self.query['path'])
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 300.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (TAG_PATH,)
     
     def _parse_json_result(self, json_obj: JsonResult) -> str:
         return json_obj.get('id')
@@ -1,5 +1,7 @@
 __author__ = 'deadblue'
 
+from typing import Hashable
+
 from py115.lowlevel.types.download import DownloadResult
 from py115.lowlevel._utils import now_str
 from ._base import M115ApiSpec, JsonResult
@@ -12,6 +14,10 @@ class DownloadApi(M115ApiSpec[DownloadResult]):
         self.query['t'] = now_str()
         self.form['pickcode'] = pickcode
 
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('DownloadApi', self.form['pickcode'])
+
     def _parse_m115_result(self, m115_obj: JsonResult) -> DownloadResult:
         if len(m115_obj) == 0:
             return None
@@ -1,7 +1,7 @@
 __author__ = 'deadblue'
 
 from abc import ABC
-from typing import Dict, Sequence
+from typing import Dict, Hashable, Iterable, List, Sequence
 
 from py115.lowlevel.exceptions import RetryException
 from py115.lowlevel.types.dir import DirOrder
@@ -9,7 +9,8 @@ from py115.lowlevel.types.file import (
     FileInfo, FileListResult, FileType
 )
 from ._base import (
-    JsonApiSpec, JsonResult, VoidApiSpec
+    JsonApiSpec, JsonResult, VoidApiSpec, 
+    TAG_PATH, TAG_STORAGE, file_tag
 )
 from ._error import FILE_ORDER_INVALID
 
@@ -181,30 +182,65 @@ class FileLabeledApi(BaseFileListApi):
             self.query['type'] = str(file_type.value)
 
 
+class BaseFileEditApi(VoidApiSpec, ABC):
+    """
+    Base class of APIs which modify files.
+    """
+
+    _file_ids: List[str]
+    _extra_tags: Sequence[str] = ()
+
+    def __init__(self, api_url: str, file_ids: Sequence[str]) -> None:
+        super().__init__(api_url)
+        self._file_ids = list(file_ids)
+
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return [
+            file_tag(file_id) for file_id in self._file_ids
+        ] + list(self._extra_tags)
+
+
 class FileGetInfoApi(JsonApiSpec[FileInfo]):
     
     def __init__(self, file_id: str) -> None:
         super().__init__('https://webapi.115.com/files/get_info')
         self.query['file_id'] = file_id
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('FileGetInfoApi', self.query['file_id'])
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 60.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (file_tag(self.query['file_id']),)
     
     def _parse_json_result(self, json_obj: JsonResult) -> FileInfo:
         return FileInfo(json_obj['data'][0])
 
 
-class FileDeleteApi(VoidApiSpec):
+class FileDeleteApi(BaseFileEditApi):
+
+    _extra_tags = (TAG_PATH, TAG_STORAGE)
 
     def __init__(self, file_ids: Sequence[str]) -> None:
-        super().__init__('https://webapi.115.com/rb/delete')
+        super().__init__('https://webapi.115.com/rb/delete', file_ids)
         for index, file_id in enumerate(file_ids):
             sub_key = f'fid[{index}]'
             self.form[sub_key] = file_id
         self.form['ignore_warn'] = '1'
 
 
-class FileMoveApi(VoidApiSpec):
+class FileMoveApi(BaseFileEditApi):
+
+    _extra_tags = (TAG_PATH,)
 
     def __init__(self, target_dir_id: str, file_ids: Sequence[str]) -> None:
-        super().__init__('https://webapi.115.com/files/move')
+        super().__init__('https://webapi.115.com/files/move', file_ids)
         self.form['pid'] = target_dir_id
         for index, file_id in enumerate(file_ids):
             sub_key = f'fid[{index}]'
@@ -212,39 +248,43 @@ class FileMoveApi(VoidApiSpec):
         self.form['ignore_warn'] = '1'
 
 
-class FileBatchRenameApi(VoidApiSpec):
+class FileBatchRenameApi(BaseFileEditApi):
+
+    _extra_tags = (TAG_PATH,)
 
     def __init__(self, new_names: Dict[str, str]) -> None:
-        super().__init__('https://webapi.115.com/files/batch_rename')
+        super().__init__(
+            'https://webapi.115.com/files/batch_rename', list(new_names.keys())
+        )
         for file_id, new_name in new_names.items():
             key = f'files_new_name[{file_id}]'
             self.form[key] = new_name
 
 
-class FileSetStarApi(VoidApiSpec):
+class FileSetStarApi(BaseFileEditApi):
 
     def __init__(self, file_ids: Sequence[str], star: bool) -> None:
-        super().__init__('https://webapi.115.com/files/star')
+        super().__init__('https://webapi.115.com/files/star', file_ids)
         self.form.update({
             'file_id': ','.join(file_ids),
             'star': '1' if star else '0'
         })
 
 
-class FileSetLabelsApi(VoidApiSpec):
+class FileSetLabelsApi(BaseFileEditApi):
 
     def __init__(self, file_id: str, label_ids: Sequence[str]) -> None:
-        super().__init__('https://webapi.115.com/files/edit')
+        super().__init__('https://webapi.115.com/files/edit', [file_id])
         self.form.update({
             'fid': file_id,
             'file_label': ','.join(label_ids) if len(label_ids) > 0 else ''
         })
 
 
-class FileBatchSetLabelsApi(VoidApiSpec):
+class FileBatchSetLabelsApi(BaseFileEditApi):
     
     def __init__(self, file_ids: Sequence[str], label_ids: Sequence[str]) -> None:
-        super().__init__('https://webapi.115.com/files/batch_label')
+        super().__init__('https://webapi.115.com/files/batch_label', file_ids)
         self.form.update({
             'file_ids': ','.join(file_ids),
             'file_label': ','.join(label_ids),
@@ -252,10 +292,10 @@ class FileBatchSetLabelsApi(VoidApiSpec):
         })
 
 
-class FileBatchAddLabelsApi(VoidApiSpec):
+class FileBatchAddLabelsApi(BaseFileEditApi):
     
     def __init__(self, file_ids: Sequence[str], label_ids: Sequence[str]) -> None:
-        super().__init__('https://webapi.115.com/files/batch_label')
+        super().__init__('https://webapi.115.com/files/batch_label', file_ids)
         self.form.update({
             'file_ids': ','.join(file_ids),
             'file_label': ','.join(label_ids),
@@ -263,10 +303,10 @@ class FileBatchAddLabelsApi(VoidApiSpec):
         })
 
 
-class FileBatchRemoveLabelsApi(VoidApiSpec):
+class FileBatchRemoveLabelsApi(BaseFileEditApi):
     
     def __init__(self, file_ids: Sequence[str], label_ids: Sequence[str]) -> None:
-        super().__init__('https://webapi.115.com/files/batch_label')
+        super().__init__('https://webapi.115.com/files/batch_label', file_ids)
         self.form.update({
             'file_ids': ','.join(file_ids),
             'file_label': ','.join(label_ids),
@@ -274,10 +314,10 @@ class FileBatchRemoveLabelsApi(VoidApiSpec):
         })
 
 
-class FileSetDescApi(VoidApiSpec):
+class FileSetDescApi(BaseFileEditApi):
 
     def __init__(self, file_id: str, description: str) -> None:
-        super().__init__('https://webapi.115.com/files/edit')
+        super().__init__('https://webapi.115.com/files/edit', [file_id])
         self.form.update({
             'fid': file_id,
             'file_desc': description
@@ -294,25 +334,39 @@ class FileGetDescApi(JsonApiSpec[str]):
             'new_html': '1',
             'format': 'json',
         })
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('FileGetDescApi', self.query['file_id'])
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 60.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (file_tag(self.query['file_id']),)
     
     def _parse_json_result(self, json_obj: JsonResult) -> str:
         return json_obj.get('desc')
 
 
-class FileHideApi(VoidApiSpec):
+class FileHideApi(BaseFileEditApi):
+
+    _extra_tags = (TAG_PATH,)
 
     def __init__(self, file_ids: Sequence[str], hidden: bool) -> None:
-        super().__init__('https://webapi.115.com/files/hiddenfiles')
+        super().__init__('https://webapi.115.com/files/hiddenfiles', file_ids)
         for index, file_id in enumerate(file_ids):
             key = f'fid[{index}]'
             self.form[key] = file_id
         self.form['hidden'] = '1' if hidden else '0'
 
 
-class FileSetTopApi(VoidApiSpec):
+class FileSetTopApi(BaseFileEditApi):
 
     def __init__(self, file_ids: Sequence[str], on_top: bool) -> None:
-        super().__init__('https://webapi.115.com/files/top')
+        super().__init__('https://webapi.115.com/files/top', file_ids)
         self.form.update({
             'file_id': ','.join(file_ids),
             'top': '1' if on_top else '0'
@@ -328,3 +382,7 @@ class FileShowHiddenApi(VoidApiSpec):
             'valid_type': '1',
             'safe_pwd': password if password is not None else ''
         })
+
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (TAG_PATH,)
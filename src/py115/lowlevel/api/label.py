@@ -1,10 +1,12 @@
 __author__ = 'deadblue'
 
+from typing import Hashable, Iterable
+
 from py115.lowlevel.types.label import (
     LabelColor, LabelInfo, LabelListResult
 )
 from ._base import (
-    JsonApiSpec, JsonResult, VoidApiSpec
+    JsonApiSpec, JsonResult, VoidApiSpec, TAG_LABEL
 )
 
 
@@ -16,6 +18,22 @@ class LabelListApi(JsonApiSpec[LabelListResult]):
         if offset > 0:
             self.query['offset'] = str(offset)
 
+    @property
+    def cache_key(self) -> Hashable | None:
+        return (
+            'LabelListApi', 
+            self.query.get('offset', '0'), 
+            self.query['limit']
+        )
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 300.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (TAG_LABEL,)
+
     def _parse_json_result(self, json_obj: JsonResult) -> LabelListResult:
         data_obj = json_obj['data']
         return LabelListResult(
@@ -33,6 +51,10 @@ class LabelAddApi(JsonApiSpec[LabelInfo]):
         super().__init__('https://webapi.115.com/label/add_multi')
         self.form['name[]'] = f'{name}\x07{color.value}'
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (TAG_LABEL,)
+
     def _parse_json_result(self, json_obj: JsonResult) -> LabelInfo:
         return LabelInfo(json_obj['data'][0])
 
@@ -52,9 +74,17 @@ class LabelEditApi(VoidApiSpec):
         if color is not None:
             self.form['color'] = color.value
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (TAG_LABEL,)
+
 
 class LabelDeleteApi(VoidApiSpec):
     
     def __init__(self, label_id: str) -> None:
         super().__init__('https://webapi.115.com/label/delete')
         self.form['id'] = label_id
+
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (TAG_LABEL,)
@@ -1,5 +1,7 @@
 __author__ = 'deadblue'
 
+from typing import Hashable
+
 from py115.lowlevel.types.media import (
     ImageInfo, VideoInfo
 )
@@ -17,6 +19,10 @@ class ImageLinkApi(JsonApiSpec[ImageInfo]):
             '_': now_str()
         })
 
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('ImageLinkApi', self.query['pickcode'])
+
     def _parse_json_result(self, json_obj: JsonResult) -> ImageInfo:
         data_obj = json_obj['data']
         return ImageInfo(
@@ -31,6 +37,10 @@ class VideoPlayWebApi(JsonApiSpec[VideoInfo]):
         super().__init__('https://webapi.115.com/files/video')
         self.query['pickcode'] = pickcode
 
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('VideoPlayWebApi', self.query['pickcode'])
+
     def _parse_json_result(self, json_obj: JsonResult) -> VideoInfo:
         return VideoInfo(
             file_name=json_obj['file_name'],
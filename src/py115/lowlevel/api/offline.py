@@ -1,6 +1,6 @@
 __author__ = 'deadblue'
 
-from typing import Dict, List, Sequence
+from typing import Dict, Iterable, List, Sequence
 
 from py115.lowlevel.types.common import CommonParams
 from py115.lowlevel.types.offline import (
@@ -11,7 +11,8 @@ from py115.lowlevel.types.offline import (
     OfflineAddResult,
 )
 from ._base import (
-    JsonApiSpec, JsonResult, M115ApiSpec, VoidApiSpec
+    JsonApiSpec, JsonResult, M115ApiSpec, VoidApiSpec, 
+    TAG_PATH, TAG_STORAGE
 )
 from ._error import (
     OFFLINE_LINK_INVALID, OFFLINE_TASK_EXISTED
@@ -63,6 +64,12 @@ class OfflineDeleteApi(VoidApiSpec):
             self.form[key] = info_hash
         self.form['flag'] = '1' if delete_files else '0'
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        if self.form['flag'] == '1':
+            return (TAG_PATH, TAG_STORAGE)
+        return ()
+
 
 class OfflineClearApi(VoidApiSpec):
     
@@ -72,6 +79,15 @@ class OfflineClearApi(VoidApiSpec):
         )
         self.form['flag'] = str(flag.value)
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        if self.form['flag'] in (
+            str(OfflineClearFlag.DONE_AND_DELETE.value), 
+            str(OfflineClearFlag.ALL_AND_DELETE.value)
+        ):
+            return (TAG_PATH, TAG_STORAGE)
+        return ()
+
 
 _add_error_mapping: Dict[int, OfflineErrorReason] = {
     OFFLINE_LINK_INVALID: OfflineErrorReason.LINK_INVALID,
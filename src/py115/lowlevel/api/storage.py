@@ -1,13 +1,27 @@
 __author__ = 'deadblue'
 
+from typing import Hashable, Iterable
+
 from py115.lowlevel.types.storage import StorageInfo
-from ._base import JsonApiSpec, JsonResult
+from ._base import JsonApiSpec, JsonResult, TAG_STORAGE
 
 
 class StorageInfoApi(JsonApiSpec[StorageInfo]):
 
     def __init__(self) -> None:
         super().__init__('https://webapi.115.com/files/index_info')
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('StorageInfoApi',)
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 60.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (TAG_STORAGE,)
     
     def _parse_json_result(self, json_obj: JsonResult) -> StorageInfo:
         space_info = json_obj['data']['space_info']
@@ -1,6 +1,7 @@
 __author__ = 'deadblue'
 
 import hashlib
+from typing import Hashable, Iterable
 
 from py115.lowlevel.types.common import CommonParams
 from py115.lowlevel.types.upload import (
@@ -11,14 +12,29 @@ from py115.lowlevel.types.upload import (
     UploadInitResult,
     UploadToken
 )
+from py115.lowlevel.exceptions import ApiException
 from py115.lowlevel._utils import parse_rfc3399, now_str
-from ._base import JsonApiSpec, JsonResult
+from ._base import (
+    JsonApiSpec, JsonResult, TAG_PATH, TAG_STORAGE, TAG_USER, file_tag
+)
 
 
 class UploadInfoApi(JsonApiSpec[UploadInfo]):
 
     def __init__(self) -> None:
         super().__init__('https://proapi.115.com/app/uploadinfo')
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('UploadInfoApi',)
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 3600.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (TAG_USER,)
     
     def _parse_json_result(self, json_obj: JsonResult) -> UploadInfo:
         return UploadInfo(
@@ -35,6 +51,7 @@ _TOKEN_SALT: str = 'Qclm8MGWUv59TnrR0XPg'
 class UploadInitApi(JsonApiSpec[UploadInitResult]):
 
     _cp: CommonParams
+    _dir_id: str
 
     def __init__(
             self, cp: CommonParams,
@@ -47,6 +64,7 @@ class UploadInitApi(JsonApiSpec[UploadInitResult]):
         ) -> None:
         super().__init__('https://uplb.115.com/4.0/initupload.php')
         self._cp = cp
+        self._dir_id = dir_id
         target_id = _to_target_id(dir_id)
         self.form.update({
             'appid': '0',
@@ -77,6 +95,10 @@ class UploadInitApi(JsonApiSpec[UploadInitResult]):
     def use_ec(self) -> bool:
         return True
 
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        return (TAG_PATH, TAG_STORAGE, file_tag(self._dir_id))
+
     def _set_token(self):
         file_sha1 = self.form.get('fileid')
         file_size = self.form.get('filesize')
@@ -116,7 +138,7 @@ class UploadInitApi(JsonApiSpec[UploadInitResult]):
                 sign_key=json_obj['sign_key'],
                 sign_range=json_obj['sign_check']
             )
-        return None
+        raise ApiException(json_obj.get('statuscode', -1), json_obj)
 
 
 class UploadTokenApi(JsonApiSpec[UploadToken]):
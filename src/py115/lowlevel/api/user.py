@@ -1,13 +1,27 @@
 __author__ = 'deadblue'
 
+from typing import Hashable, Iterable
+
 from py115.lowlevel.types.user import UserInfo
-from ._base import JsonApiSpec, JsonResult
+from ._base import JsonApiSpec, JsonResult, TAG_USER
 
 
 class UserInfoApi(JsonApiSpec[UserInfo]):
 
     def __init__(self) -> None:
         super().__init__('https://my.115.com/?ct=ajax&ac=nav')
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        return ('UserInfoApi',)
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return 300.0
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        return (TAG_USER,)
     
     def _parse_json_result(self, json_obj: JsonResult) -> UserInfo:
         data_obj = json_obj['data']
@@ -0,0 +1,301 @@
+__author__ = 'deadblue'
+
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from typing import (
+    Any, Dict, Hashable, Iterable, Mapping, Tuple, Type
+)
+
+from py115.lowlevel.spec import ApiSpec
+
+
+@dataclass
+class CacheStats:
+    """
+    CacheStats contains statistics of an API cache.
+    """
+
+    hits: int = 0
+    """Number of lookups which found a fresh result."""
+
+    misses: int = 0
+    """Number of lookups which found nothing or an expired result."""
+
+    evictions: int = 0
+    """Number of results evicted to satisfy size limits."""
+
+    invalidations: int = 0
+    """Number of results removed by mutating APIs."""
+
+    entries: int = 0
+    """Number of cached results."""
+
+    size: int = 0
+    """Estimated memory size of cached results in bytes."""
+
+
+class ApiCache(ABC):
+    """
+    ApiCache is the interface of API result caches.
+
+    A result is cached under the cache key of its API spec, and labeled with
+    the cache tags of the spec. Calling a mutating API invalidates all
+    results labeled with its invalidate tags.
+
+    Clients look up and store results under keys and tags which are scoped
+    to the logged-in user, so one cache can be shared by clients of
+    different users.
+
+    Cached results are shared between callers, they should be treated as
+    read-only.
+    """
+
+    _ttls: Dict[Type[ApiSpec], float | None]
+
+    def __init__(
+            self,
+            ttls: Mapping[Type[ApiSpec], float | None] | None = None
+        ) -> None:
+        """
+        Args:
+            ttls (Mapping[Type[ApiSpec], float]): TTL overrides keyed by API
+                spec class, None value disables caching for the API.
+        """
+        self._ttls = dict(ttls or {})
+
+    def get_ttl(self, spec: ApiSpec) -> float | None:
+        """
+        Get TTL in seconds for result of the API, None means not cacheable.
+        """
+        if spec.cache_key is None:
+            return None
+        for cls in type(spec).__mro__:
+            if cls in self._ttls:
+                return self._ttls[cls]
+        return spec.cache_ttl
+
+    @abstractmethod
+    def version(self) -> int:
+        """
+        Get current invalidation version, which should be taken before the
+        API call, and passed to `put()` after.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Lookup a result.
+
+        Returns:
+            Tuple[bool, Any]: Whether a fresh result is found, and the result.
+        """
+        pass
+
+    @abstractmethod
+    def put(
+            self,
+            key: Hashable,
+            value: Any,
+            ttl: float,
+            tags: Iterable[str],
+            version: int
+        ):
+        """
+        Store a result. Implementation must drop the result when any of its
+        tags has been invalidated after `version`, since it may be stale.
+        """
+        pass
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]):
+        """
+        Remove all results which are labeled with any of the tags.
+        """
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """
+        Remove all results.
+        """
+        pass
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """
+        Get statistics of the cache.
+        """
+        pass
+
+
+class _Entry:
+
+    __slots__ = ('value', 'expire_at', 'tags', 'size')
+
+    def __init__(
+            self, value: Any, expire_at: float, tags: Tuple[str], size: int
+        ) -> None:
+        self.value = value
+        self.expire_at = expire_at
+        self.tags = tags
+        self.size = size
+
+
+class MemoryCache(ApiCache):
+    """
+    In-memory LRU cache bounded by entry count and estimated memory size.
+    It is thread-safe, and can be shared by multiple clients, even of
+    different users.
+    """
+
+    _max_entries: int
+    _max_size: int | None
+    _lock: threading.Lock
+    _entries: 'OrderedDict[Hashable, _Entry]'
+    _tag_index: Dict[str, set]
+    _tag_versions: Dict[str, int]
+    _version: int
+    _floor_version: int
+    _stats: CacheStats
+
+    def __init__(
+            self,
+            max_entries: int = 4096,
+            max_size: int | None = 64 * 1024 * 1024,
+            ttls: Mapping[Type[ApiSpec], float | None] | None = None
+        ) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of cached results.
+            max_size (int): Maximum estimated memory size in bytes, None
+                means no limit.
+            ttls (Mapping[Type[ApiSpec], float]): TTL overrides keyed by API
+                spec class, None value disables caching for the API.
+        """
+        super().__init__(ttls)
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tag_index = {}
+        self._tag_versions = {}
+        self._version = 0
+        self._floor_version = 0
+        self._stats = CacheStats()
+
+    def version(self) -> int:
+        return self._version
+
+    def _remove(self, key: Hashable) -> _Entry:
+        # Caller must hold the lock
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag, None)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self._tag_index[tag]
+        self._stats.size -= entry.size
+        return entry
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and entry.expire_at < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return True, entry.value
+
+    def put(
+            self,
+            key: Hashable,
+            value: Any,
+            ttl: float,
+            tags: Iterable[str],
+            version: int
+        ):
+        tags = tuple(tags)
+        size = _estimate_size(value)
+        if self._max_size is not None and size > self._max_size:
+            return
+        with self._lock:
+            if version < self._floor_version:
+                return
+            for tag in tags:
+                if self._tag_versions.get(tag, 0) > version:
+                    return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                value, time.monotonic() + ttl, tags, size
+            )
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            self._stats.size += size
+            # Evict least recently used results
+            while len(self._entries) > self._max_entries or (
+                self._max_size is not None and
+                self._stats.size > self._max_size
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]):
+        with self._lock:
+            self._version += 1
+            if len(self._tag_versions) > self._max_entries * 4:
+                # Bound the tracked tags, results from calls started before
+                # now will be dropped instead.
+                self._tag_versions.clear()
+                self._floor_version = self._version
+            for tag in tags:
+                self._tag_versions[tag] = self._version
+                for key in list(self._tag_index.get(tag, ())):
+                    self._remove(key)
+                    self._stats.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            self._stats.size = 0
+            # Results from calls started before now may be stale as well.
+            self._version += 1
+            self._tag_versions.clear()
+            self._floor_version = self._version
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._stats.entries = len(self._entries)
+            return CacheStats(**self._stats.__dict__)
+
+
+def _estimate_size(obj: Any, depth: int = 4) -> int:
+    size = sys.getsizeof(obj)
+    if depth == 0:
+        return size
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)):
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key, depth - 1)
+            size += _estimate_size(value, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _estimate_size(item, depth - 1)
+    elif is_dataclass(obj):
+        for f in fields(obj):
+            size += _estimate_size(getattr(obj, f.name, None), depth - 1)
+    return size
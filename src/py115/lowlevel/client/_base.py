@@ -1,40 +1,175 @@
 __author__ = 'deadblue'
 
-from abc import ABC
+import threading
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, nullcontext
 from typing import (
-    Any, Dict, Generic, TypeVar, get_args
+    Any, Callable, Dict, Generic, Iterable, List, TypeVar, get_args
 )
 from types import get_original_bases
 
 import httpx
 
-from py115._internal.crypto.ec115 import Cipher
+from py115._internal.crypto.ec115 import Cipher, shared_cipher
+from py115.lowlevel.cache import ApiCache
+from py115.lowlevel.concurrency import AdaptiveConcurrency
+from py115.lowlevel.ratelimit import RateLimiter
+from py115.lowlevel.retry import RetryPolicy
 from py115.lowlevel.spec import ApiSpec
 from ._cookie import LowlevelCookieJar
+from ._network import DnsCache, TimingHook
 
 
 COOKIE_DOMAINS = ('.115.com', '.anxia.com')
 DEFAULT_COOKIE_URL = 'https://115.com/'
 DEFAULT_USER_AGNET = 'Mozilla/5.0'
 
+KNOWN_HOSTS = (
+    'webapi.115.com',
+    'proapi.115.com',
+    'lixian.115.com',
+    'uplb.115.com',
+)
+
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 10.0
+
 C = TypeVar('C', httpx.Client, httpx.AsyncClient)
 
 
+def _validate_limits(limits: httpx.Limits):
+    for name in ('max_connections', 'max_keepalive_connections'):
+        value = getattr(limits, name)
+        if value is not None and value < 1:
+            raise ValueError(f'{name} must be at least 1')
+    if limits.keepalive_expiry is not None and limits.keepalive_expiry < 0:
+        raise ValueError('keepalive_expiry must not be negative')
+    if limits.max_connections is not None \
+        and limits.max_keepalive_connections is not None \
+        and limits.max_keepalive_connections > limits.max_connections:
+        raise ValueError(
+            'max_keepalive_connections must not exceed max_connections'
+        )
+
+
 class BaseClient(Generic[C], ABC):
 
     _ua: str = DEFAULT_USER_AGNET
-    _ecc: Cipher
+    _ecc: Cipher | None
+    _ecc_key: bytes | None
+    _ecc_lock: threading.Lock
     _jar: LowlevelCookieJar
     _hc: C
+    _retry_policy: RetryPolicy
+    _rate_limiter: RateLimiter | None
+    _concurrency: AdaptiveConcurrency | None
+    _trace: Callable | None
+    _flights: Any
+    _cache: ApiCache | None
+    _keepalive_expiry: float | None
 
-    def __init__(self, **kwargs: Any) -> None:
-        self._ecc = Cipher()
+    def __init__(
+            self, 
+            *,
+            http2: bool = False,
+            max_connections: int | None = None,
+            max_keepalive_connections: int | None = DEFAULT_MAX_KEEPALIVE,
+            keepalive_expiry: float | None = DEFAULT_KEEPALIVE_EXPIRY,
+            limits: httpx.Limits | None = None,
+            retry_policy: RetryPolicy | None = None,
+            rate_limiter: RateLimiter | None = None,
+            concurrency: AdaptiveConcurrency | None = None,
+            dns_cache_ttl: float | None = None,
+            timing_hook: TimingHook | None = None,
+            coalesce: bool = False,
+            cache: ApiCache | None = None,
+            ec_key: bytes | str | None = None,
+            **kwargs: Any
+        ) -> None:
+        """
+        Args:
+            http2 (bool): Enable HTTP/2, requires "h2" package, which can be 
+                installed by "pip install py115[http2]".
+            max_connections (int): Maximum number of connections in pool, 
+                None means no limit.
+            max_keepalive_connections (int): Maximum number of idle 
+                connections kept in pool, None means no limit. It is capped
+                at `max_connections`.
+            keepalive_expiry (float): Seconds before an idle connection is 
+                closed, None means never.
+            limits (httpx.Limits): Pool limits, overrides the three 
+                arguments above when specified.
+            retry_policy (RetryPolicy): Default retry policy for API calls.
+            rate_limiter (RateLimiter): Limiter to pace API calls, can be 
+                shared with other clients.
+            concurrency (AdaptiveConcurrency): Controller to limit in-flight
+                API calls, can be shared with other clients.
+            dns_cache_ttl (float): Seconds to cache resolved host addresses,
+                None to resolve on every new connection. Can not be used 
+                with "transport" or "mounts" in kwargs.
+            timing_hook (TimingHook): Hook to receive connection and request
+                timing events, such as DNS resolving, TCP connecting, TLS 
+                handshake and response receiving.
+            coalesce (bool): Let concurrent calls of an idempotent API with 
+                the same cache key share one request and its result.
+            cache (ApiCache): Cache for results of idempotent APIs, can be
+                shared with other clients, results are kept apart by user.
+            ec_key (bytes | str): Key for EC-encrypted APIs, which is 
+                exported from `ec_key` property of another client, or 
+                "shared" to use the process-wide key. A new key is 
+                generated on first use when not specified.
+            **kwargs: Extra arguments for underlying HTTP client.
+        """
+        if limits is None:
+            if max_connections is not None and (
+                max_keepalive_connections is None or 
+                max_keepalive_connections > max_connections
+            ):
+                max_keepalive_connections = max_connections
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        _validate_limits(limits)
+        self._keepalive_expiry = limits.keepalive_expiry
+        if http2:
+            try:
+                import h2 # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    'HTTP/2 requires "h2" package, install it by '
+                    '"pip install py115[http2]".'
+                ) from None
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._rate_limiter = rate_limiter
+        self._concurrency = concurrency
+        self._flights = self._new_single_flight() if coalesce else None
+        self._cache = cache
+        # EC cipher is created on first use, since key generation is costly
+        self._ecc = None
+        self._ecc_lock = threading.Lock()
+        if isinstance(ec_key, str) and ec_key != 'shared':
+            raise ValueError('ec_key must be bytes or "shared"')
+        self._ecc_key = ec_key
         self._jar = LowlevelCookieJar()
+        if dns_cache_ttl is not None:
+            if 'transport' in kwargs or 'mounts' in kwargs:
+                raise ValueError(
+                    'dns_cache_ttl can not be used with custom transport '
+                    'or mounts'
+                )
+            kwargs['transport'] = self._new_caching_transport(
+                DnsCache(dns_cache_ttl, timing_hook), limits, http2,
+                verify=kwargs.get('verify', True),
+                cert=kwargs.get('cert', None),
+                trust_env=kwargs.get('trust_env', True)
+            )
         # Get HTTP client class
         orig_base_cls, = get_original_bases(type(self))
         hc_cls, = get_args(orig_base_cls)
         # Drop reserved arguments
-        for reserved_arg in ('headers', 'cookies', 'limits'):
+        for reserved_arg in ('headers', 'cookies'):
             if reserved_arg in kwargs:
                 del kwargs[reserved_arg]
         # Create HTTP client
@@ -43,13 +178,38 @@ class BaseClient(Generic[C], ABC):
                 'User-Agent': self._ua
             },
             cookies=self._jar,
-            limits=httpx.Limits(
-                max_connections=None,
-                max_keepalive_connections=20,
-                keepalive_expiry=10.0
-            ),
+            limits=limits,
+            http2=http2,
             **kwargs
         )
+        self._trace = None
+        if timing_hook is not None:
+            self._trace = self._wrap_timing_hook(timing_hook)
+
+    def _keep_alive_interval(self, interval: float | None) -> float:
+        if interval is None:
+            interval = (self._keepalive_expiry or 60.0) / 2
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+        return interval
+
+    @abstractmethod
+    def _new_single_flight(self) -> Any:
+        pass
+
+    @abstractmethod
+    def _wrap_timing_hook(self, hook: TimingHook) -> Callable:
+        pass
+
+    @abstractmethod
+    def _new_caching_transport(
+            self, 
+            cache: DnsCache, 
+            limits: httpx.Limits, 
+            http2: bool, 
+            **kwargs: Any
+        ) -> Any:
+        pass
 
     def import_cookies(self, cookies: Dict[str, str]):
         """
@@ -85,6 +245,65 @@ class BaseClient(Generic[C], ABC):
         self._ua = f'{self._ua} {extension}'
         self._hc.headers['User-Agent'] = self._ua
 
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self._retry_policy
+
+    def _get_retry_policy(self, spec: ApiSpec) -> RetryPolicy:
+        return spec.retry_policy or self._retry_policy
+
+    @property
+    def cache(self) -> ApiCache | None:
+        return self._cache
+
+    def _cache_scope(self) -> str:
+        # UID cookie looks like "<user_id>_<login_app>_<timestamp>"
+        for cookie in self._jar:
+            if cookie.name == 'UID':
+                return cookie.value.split('_', 1)[0]
+        return ''
+
+    def _cache_key(self, scope: str, spec: ApiSpec) -> Any:
+        return (scope, spec.cache_key)
+
+    def _cache_tags(self, scope: str, tags: Iterable[str]) -> List[str]:
+        return [f'{scope}:{tag}' for tag in tags]
+
+    def _invalidate_cache(self, spec: ApiSpec):
+        if self._cache is not None:
+            tags = spec.invalidate_tags
+            if tags:
+                self._cache.invalidate(
+                    self._cache_tags(self._cache_scope(), tags)
+                )
+
+    def _concurrency_slot(self) -> AbstractContextManager:
+        if self._concurrency is None:
+            return nullcontext()
+        return self._concurrency.slot()
+
+    def _get_ecc(self) -> Cipher:
+        if self._ecc is None:
+            with self._ecc_lock:
+                if self._ecc is None:
+                    if self._ecc_key == 'shared':
+                        self._ecc = shared_cipher()
+                    else:
+                        self._ecc = Cipher(self._ecc_key)
+        return self._ecc
+
+    @property
+    def ec_key(self) -> bytes:
+        """
+        Key for EC-encrypted APIs, it can be persisted and passed to other 
+        clients, even in other processes, to skip key generation.
+        """
+        return self._get_ecc().private_key
+
+    def _check_response(self, resp: httpx.Response, policy: RetryPolicy):
+        if resp.status_code in policy.retry_statuses:
+            resp.raise_for_status()
+
     def _prepare_request(self, spec: ApiSpec) -> httpx.Request:
         method, headers, content = 'GET', {}, None
         payload = spec.payload()
@@ -95,9 +314,10 @@ class BaseClient(Generic[C], ABC):
             })
             content = payload.content
         if spec.use_ec:
-            spec.query['k_ec'] = self._ecc.encode_token()
+            ecc = self._get_ecc()
+            spec.query['k_ec'] = ecc.encode_token()
             if content is not None: 
-                content = self._ecc.encode(content)
+                content = ecc.encode(content)
         timeout = httpx.Timeout(
             timeout=None,
             connect=spec.timeout.connect,
@@ -109,5 +329,6 @@ class BaseClient(Generic[C], ABC):
             params=spec.query,
             headers=headers,
             content=content,
-            timeout=timeout
+            timeout=timeout,
+            extensions={} if self._trace is None else {'trace': self._trace}
         )
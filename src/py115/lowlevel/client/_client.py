@@ -1,13 +1,38 @@
 __author__ = 'deadblue'
 
-from typing import Awaitable
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import (
+    Any, AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, 
+    Sequence, Tuple
+)
 from types import TracebackType
 
 import httpx
 
-from py115.lowlevel.exceptions import RetryException
+from py115._internal.crypto.ec115 import Cipher, decompress
+from py115.lowlevel.retry import RetryPolicy
+from py115.lowlevel.singleflight import AsyncSingleFlight, SingleFlight
 from py115.lowlevel.spec import ApiSpec, R
-from ._base import BaseClient
+from ._base import BaseClient, KNOWN_HOSTS
+from ._network import (
+    AsyncCachingTransport, 
+    CachingTransport, 
+    DnsCache, 
+    TimingHook
+)
+
+
+DEFAULT_CONCURRENCY = 8
+
+DEFAULT_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+def _check_concurrency(concurrency: int):
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
 
 
 class Client(BaseClient[httpx.Client]):
@@ -15,21 +40,205 @@ class Client(BaseClient[httpx.Client]):
     Low-level API client.
     """
 
+    _keep_alive_stop: threading.Event | None = None
+    _flights: SingleFlight | None
+
+    def _new_single_flight(self) -> SingleFlight:
+        return SingleFlight()
+
+    def _wrap_timing_hook(self, hook: TimingHook):
+        def _trace(event: str, info: Dict[str, Any]):
+            hook(event, time.monotonic(), info)
+        return _trace
+
+    def _new_caching_transport(
+            self, 
+            cache: DnsCache, 
+            limits: httpx.Limits, 
+            http2: bool, 
+            **kwargs: Any
+        ) -> httpx.BaseTransport:
+        return CachingTransport(cache, limits=limits, http2=http2, **kwargs)
+
+    def _send(self, spec: ApiSpec[R], policy: RetryPolicy) -> R:
+        req = self._prepare_request(spec)
+        if not spec.use_ec:
+            resp = self._hc.send(req)
+            self._check_response(resp, policy)
+            return spec.parse_result(resp.content)
+        # Decode EC response while receiving it
+        resp = self._hc.send(req, stream=True)
+        try:
+            self._check_response(resp, policy)
+            decoder = self._get_ecc().decoder()
+            for chunk in resp.iter_bytes():
+                decoder.feed(chunk)
+        finally:
+            resp.close()
+        return spec.parse_result(decoder.finish())
+
     def call_api(self, spec: ApiSpec[R]) -> R:
+        cache = self._cache
+        ttl = None if cache is None else cache.get_ttl(spec)
+        if ttl is None:
+            try:
+                return self._call_coalesced(spec)
+            finally:
+                self._invalidate_cache(spec)
+        scope, version = self._cache_scope(), cache.version()
+        key = self._cache_key(scope, spec)
+        hit, result = cache.get(key)
+        if not hit:
+            result = self._call_coalesced(spec)
+            cache.put(
+                key, result, ttl, self._cache_tags(scope, spec.cache_tags),
+                version
+            )
+        return result
+
+    def _call_coalesced(self, spec: ApiSpec[R]) -> R:
+        if self._flights is not None:
+            key = spec.cache_key
+            if key is not None:
+                return self._flights.do(key, lambda: self._call_api(spec))
+        return self._call_api(spec)
+
+    def _call_api(self, spec: ApiSpec[R]) -> R:
+        policy = self._get_retry_policy(spec)
+        retry_state = policy.start(spec.idempotent)
         while True:
             try:
-                req = self._prepare_request(spec)
-                resp = self._hc.send(req)
-                body = resp.content
-                if spec.use_ec:
-                    body = self._ecc.decode(body)
-                return spec.parse_result(body)
-            except (httpx.TimeoutException, RetryException):
-                pass
+                if self._rate_limiter is not None:
+                    self._rate_limiter.acquire(spec)
+                with self._concurrency_slot():
+                    return self._send(spec, policy)
+            except Exception as e:
+                delay = retry_state.next_delay(e)
+                if delay is None:
+                    raise
+                if delay > 0:
+                    time.sleep(delay)
+
+    def call_many(
+            self, 
+            specs: Iterable[ApiSpec[R]], 
+            concurrency: int = DEFAULT_CONCURRENCY
+        ) -> List[R | Exception]:
+        """
+        Call multiple independent APIs concurrently.
+
+        Args:
+            specs (Iterable[ApiSpec]): APIs to call.
+            concurrency (int): Maximum number of worker threads.
+
+        Returns:
+            List[R|Exception]: API results in input order, an exception is 
+                placed instead of result when the call fails.
+        """
+        specs = list(specs)
+        results: List[R | Exception] = [None] * len(specs)
+        for index, result in self.iter_many(specs, concurrency):
+            results[index] = result
+        return results
+
+    def iter_many(
+            self, 
+            specs: Iterable[ApiSpec[R]], 
+            concurrency: int = DEFAULT_CONCURRENCY
+        ) -> Iterator[Tuple[int, R | Exception]]:
+        """
+        Call multiple independent APIs concurrently, and yield results as 
+        they complete.
+
+        Args:
+            specs (Iterable[ApiSpec]): APIs to call.
+            concurrency (int): Maximum number of worker threads.
+
+        Yields:
+            Tuple[int, R|Exception]: Input index of the API, and its result or
+                exception.
+        """
+        _check_concurrency(concurrency)
+        executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='py115-call'
+        )
+        try:
+            futures = {
+                executor.submit(self.call_api, spec): index
+                for index, spec in enumerate(specs)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    yield index, future.result()
+                except Exception as e:
+                    yield index, e
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
     
     def fetch(self, url: str) -> bytes:
         resp = self._hc.get(url)
         return resp.content
+
+    def _ping(self, host: str):
+        try:
+            self._hc.head(
+                f'https://{host}/', 
+                extensions={} if self._trace is None else {'trace': self._trace}
+            )
+        except httpx.HTTPError:
+            pass
+
+    def warm_up(self, hosts: Sequence[str] = KNOWN_HOSTS):
+        """
+        Open connections to hosts in advance, so that following API calls 
+        can skip DNS resolving and TLS handshake.
+
+        Args:
+            hosts (Sequence[str]): Hosts to connect.
+        """
+        if len(hosts) == 0: return
+        with ThreadPoolExecutor(
+            max_workers=len(hosts), thread_name_prefix='py115-warmup'
+        ) as executor:
+            for _ in executor.map(self._ping, hosts): pass
+
+    def start_keep_alive(
+            self, 
+            interval: float | None = None, 
+            hosts: Sequence[str] = KNOWN_HOSTS
+        ):
+        """
+        Start a background thread which keeps connections to hosts alive.
+
+        Args:
+            interval (float): Seconds between two rounds, default is half of 
+                keepalive expiry.
+            hosts (Sequence[str]): Hosts to keep alive.
+        """
+        interval = self._keep_alive_interval(interval)
+        self.stop_keep_alive()
+        stop = threading.Event()
+        def _keep_alive():
+            while True:
+                self.warm_up(hosts)
+                if stop.wait(interval): break
+        threading.Thread(
+            target=_keep_alive, name='py115-keepalive', daemon=True
+        ).start()
+        self._keep_alive_stop = stop
+
+    def stop_keep_alive(self):
+        """
+        Stop the background keep-alive thread.
+        """
+        if self._keep_alive_stop is not None:
+            self._keep_alive_stop.set()
+            self._keep_alive_stop = None
+
+    def close(self):
+        self.stop_keep_alive()
+        self._hc.close()
     
     def __enter__(self):
         self._hc.__enter__()
@@ -41,6 +250,7 @@ class Client(BaseClient[httpx.Client]):
             exc_value: BaseException | None,
             traceback: TracebackType | None
         ):
+        self.stop_keep_alive()
         self._hc.__exit__(exc_type, exc_value, traceback)
 
 
@@ -50,17 +260,258 @@ class AsyncClient(BaseClient[httpx.AsyncClient]):
     Low-level asynchronous API client.
     """
 
+    _keep_alive_task: asyncio.Task | None = None
+    _flights: AsyncSingleFlight | None
+    _offload_executor: Executor | None
+    _offload_threshold: int
+
+    def __init__(
+            self,
+            *,
+            offload_executor: Executor | None = None,
+            offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+            **kwargs: Any
+        ) -> None:
+        """
+        Args:
+            offload_executor (Executor): Executor to decompress and parse 
+                large responses in, so that they do not stall the event 
+                loop. It can be a thread pool, or a process pool when API 
+                specs are picklable. EC responses are decrypted on the event
+                loop, so no key is sent to the executor. None to handle all 
+                responses on the event loop.
+            offload_threshold (int): Minimum response size in bytes to be 
+                handled in `offload_executor`.
+            **kwargs: Arguments for `BaseClient`.
+        """
+        super().__init__(**kwargs)
+        if offload_threshold < 0:
+            raise ValueError('offload_threshold must not be negative')
+        self._offload_executor = offload_executor
+        self._offload_threshold = offload_threshold
+
+    def _new_single_flight(self) -> AsyncSingleFlight:
+        return AsyncSingleFlight()
+
+    def _wrap_timing_hook(self, hook: TimingHook):
+        async def _trace(event: str, info: Dict[str, Any]):
+            hook(event, time.monotonic(), info)
+        return _trace
+
+    def _new_caching_transport(
+            self, 
+            cache: DnsCache, 
+            limits: httpx.Limits, 
+            http2: bool, 
+            **kwargs: Any
+        ) -> httpx.AsyncBaseTransport:
+        return AsyncCachingTransport(
+            cache, limits=limits, http2=http2, **kwargs
+        )
+
+    async def _parse(
+            self, spec: ApiSpec[R], body: bytes, ecc: Cipher | None
+        ) -> R:
+        tail = None
+        if ecc is not None:
+            body, tail = ecc.decrypt(body)
+        if self._offload_executor is None \
+            or len(body) < self._offload_threshold:
+            return _decompress_and_parse(spec, body, tail)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._offload_executor, _decompress_and_parse, spec, body, tail
+        )
+
+    async def _send(self, spec: ApiSpec[R], policy: RetryPolicy) -> R:
+        req = self._prepare_request(spec)
+        if not spec.use_ec:
+            resp = await self._hc.send(req)
+            self._check_response(resp, policy)
+            return await self._parse(spec, resp.content, None)
+        if self._offload_executor is not None:
+            # Receive whole response, then decompress it in executor
+            resp = await self._hc.send(req)
+            self._check_response(resp, policy)
+            return await self._parse(spec, resp.content, self._get_ecc())
+        # Decode EC response while receiving it
+        resp = await self._hc.send(req, stream=True)
+        try:
+            self._check_response(resp, policy)
+            decoder = self._get_ecc().decoder()
+            async for chunk in resp.aiter_bytes():
+                decoder.feed(chunk)
+        finally:
+            await resp.aclose()
+        return spec.parse_result(decoder.finish())
+
     async def call_api(self, spec: ApiSpec[R]) -> Awaitable[R]:
+        cache = self._cache
+        ttl = None if cache is None else cache.get_ttl(spec)
+        if ttl is None:
+            try:
+                return await self._call_coalesced(spec)
+            finally:
+                self._invalidate_cache(spec)
+        scope, version = self._cache_scope(), cache.version()
+        key = self._cache_key(scope, spec)
+        hit, result = cache.get(key)
+        if not hit:
+            result = await self._call_coalesced(spec)
+            cache.put(
+                key, result, ttl, self._cache_tags(scope, spec.cache_tags),
+                version
+            )
+        return result
+
+    async def _call_coalesced(self, spec: ApiSpec[R]) -> Awaitable[R]:
+        if self._flights is not None:
+            key = spec.cache_key
+            if key is not None:
+                return await self._flights.do(key, lambda: self._call_api(spec))
+        return await self._call_api(spec)
+
+    async def _call_api(self, spec: ApiSpec[R]) -> Awaitable[R]:
+        policy = self._get_retry_policy(spec)
+        retry_state = policy.start(spec.idempotent)
         while True:
             try:
-                req = self._prepare_request(spec)
-                resp = await self._hc.send(req)
-                body = resp.content
-                if spec.use_ec:
-                    body = self._ecc.decode(body)
-                return spec.parse_result(body)
-            except (httpx.TimeoutException, RetryException):
-                pass
+                if self._rate_limiter is not None:
+                    await self._rate_limiter.acquire_async(spec)
+                async with self._concurrency_slot():
+                    return await self._send(spec, policy)
+            except Exception as e:
+                delay = retry_state.next_delay(e)
+                if delay is None:
+                    raise
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    async def call_many(
+            self, 
+            specs: Iterable[ApiSpec[R]], 
+            concurrency: int = DEFAULT_CONCURRENCY
+        ) -> List[R | Exception]:
+        """
+        Call multiple independent APIs concurrently.
+
+        Args:
+            specs (Iterable[ApiSpec]): APIs to call.
+            concurrency (int): Maximum number of in-flight calls.
+
+        Returns:
+            List[R|Exception]: API results in input order, an exception is 
+                placed instead of result when the call fails.
+        """
+        _check_concurrency(concurrency)
+        sem = asyncio.Semaphore(concurrency)
+        async def _call(spec: ApiSpec[R]) -> R | Exception:
+            async with sem:
+                try:
+                    return await self.call_api(spec)
+                except Exception as e:
+                    return e
+        return await asyncio.gather(*[
+            _call(spec) for spec in specs
+        ])
+
+    async def iter_many(
+            self, 
+            specs: Iterable[ApiSpec[R]], 
+            concurrency: int = DEFAULT_CONCURRENCY
+        ) -> AsyncIterator[Tuple[int, R | Exception]]:
+        """
+        Call multiple independent APIs concurrently, and yield results as 
+        they complete.
+
+        Args:
+            specs (Iterable[ApiSpec]): APIs to call.
+            concurrency (int): Maximum number of in-flight calls.
+
+        Yields:
+            Tuple[int, R|Exception]: Input index of the API, and its result or
+                exception.
+        """
+        _check_concurrency(concurrency)
+        sem = asyncio.Semaphore(concurrency)
+        async def _call(
+                index: int, spec: ApiSpec[R]
+            ) -> Tuple[int, R | Exception]:
+            async with sem:
+                try:
+                    return index, await self.call_api(spec)
+                except Exception as e:
+                    return index, e
+        tasks = [
+            asyncio.create_task(_call(index, spec))
+            for index, spec in enumerate(specs)
+        ]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Wait cancelled tasks, so that none is destroyed while pending.
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def fetch(self, url: str) -> bytes:
+        resp = await self._hc.get(url)
+        return resp.content
+
+    async def _ping(self, host: str):
+        try:
+            await self._hc.head(
+                f'https://{host}/', 
+                extensions={} if self._trace is None else {'trace': self._trace}
+            )
+        except httpx.HTTPError:
+            pass
+
+    async def warm_up(self, hosts: Sequence[str] = KNOWN_HOSTS):
+        """
+        Open connections to hosts in advance, so that following API calls 
+        can skip DNS resolving and TLS handshake.
+
+        Args:
+            hosts (Sequence[str]): Hosts to connect.
+        """
+        await asyncio.gather(*[
+            self._ping(host) for host in hosts
+        ])
+
+    def start_keep_alive(
+            self, 
+            interval: float | None = None, 
+            hosts: Sequence[str] = KNOWN_HOSTS
+        ):
+        """
+        Start a background task which keeps connections to hosts alive, 
+        must be called in a running event loop.
+
+        Args:
+            interval (float): Seconds between two rounds, default is half of 
+                keepalive expiry.
+            hosts (Sequence[str]): Hosts to keep alive.
+        """
+        interval = self._keep_alive_interval(interval)
+        self.stop_keep_alive()
+        async def _keep_alive():
+            while True:
+                await self.warm_up(hosts)
+                await asyncio.sleep(interval)
+        self._keep_alive_task = asyncio.create_task(_keep_alive())
+
+    def stop_keep_alive(self):
+        """
+        Stop the background keep-alive task.
+        """
+        if self._keep_alive_task is not None:
+            self._keep_alive_task.cancel()
+            self._keep_alive_task = None
+
+    async def aclose(self):
+        self.stop_keep_alive()
+        await self._hc.aclose()
 
     async def __aenter__(self):
         await self._hc.__aenter__()
@@ -72,4 +523,13 @@ class AsyncClient(BaseClient[httpx.AsyncClient]):
         exc_value: BaseException | None = None,
         traceback: TracebackType | None = None,
     ):
+        self.stop_keep_alive()
         await self._hc.__aexit__(exc_type, exc_value, traceback)
+
+
+def _decompress_and_parse(
+        spec: ApiSpec[R], body: bytes, tail: bytearray | None
+    ) -> R:
+    if tail is not None:
+        body = decompress(body, tail)
+    return spec.parse_result(body)
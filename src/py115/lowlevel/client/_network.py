@@ -0,0 +1,369 @@
+__author__ = 'deadblue'
+
+import asyncio
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple
+)
+
+import httpcore
+import httpx
+
+
+TimingHook = Callable[[str, float, Dict[str, Any]], None]
+"""
+Hook to receive timing events, it is called with event name, monotonic
+timestamp and event info.
+"""
+
+
+class DnsCache:
+    """
+    DnsCache caches resolved addresses per host and port.
+    """
+
+    _ttl: float
+    _entries: Dict[Tuple[str, int], Tuple[float, List[str]]]
+    _lock: threading.Lock
+    _hook: TimingHook | None
+
+    def __init__(self, ttl: float, hook: TimingHook | None = None) -> None:
+        self._ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._hook = hook
+
+    def _lookup(self, host: str, port: int) -> List[str] | None:
+        with self._lock:
+            entry = self._entries.get((host, port), None)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def _store(
+            self, host: str, port: int, infos: Iterable[Tuple]
+        ) -> List[str]:
+        addrs = []
+        for *_, sockaddr in infos:
+            if sockaddr[0] not in addrs:
+                addrs.append(sockaddr[0])
+        with self._lock:
+            self._entries[(host, port)] = (time.monotonic() + self._ttl, addrs)
+        return addrs
+
+    def _emit(self, host: str, cached: bool, start: float):
+        if self._hook is not None:
+            self._hook('dns.resolve.complete', time.monotonic(), {
+                'host': host,
+                'cached': cached,
+                'elapsed': time.monotonic() - start
+            })
+
+    def invalidate(self, host: str, port: int):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        start = time.monotonic()
+        addrs = self._lookup(host, port)
+        if addrs is None:
+            addrs = self._store(host, port, socket.getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            ))
+            self._emit(host, False, start)
+        else:
+            self._emit(host, True, start)
+        return addrs
+
+    async def resolve_async(self, host: str, port: int) -> List[str]:
+        start = time.monotonic()
+        addrs = self._lookup(host, port)
+        if addrs is None:
+            loop = asyncio.get_running_loop()
+            addrs = self._store(host, port, await loop.getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            ))
+            self._emit(host, False, start)
+        else:
+            self._emit(host, True, start)
+        return addrs
+
+
+class CachingNetworkBackend(httpcore.NetworkBackend):
+    """
+    Network backend which connects via addresses from DnsCache. TLS server
+    name is still taken from request URL by httpcore.
+    """
+
+    _backend: httpcore.NetworkBackend
+    _cache: DnsCache
+
+    def __init__(self, backend: httpcore.NetworkBackend, cache: DnsCache) -> None:
+        self._backend = backend
+        self._cache = cache
+
+    def connect_tcp(
+            self,
+            host: str,
+            port: int,
+            timeout: float | None = None,
+            local_address: str | None = None,
+            socket_options: Iterable | None = None
+        ) -> httpcore.NetworkStream:
+        try:
+            addrs = self._cache.resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error = httpcore.ConnectError(f'No address found for {host}')
+        for addr in addrs:
+            try:
+                return self._backend.connect_tcp(
+                    addr, port, timeout, local_address, socket_options
+                )
+            except httpcore.ConnectError as e:
+                error = e
+        # All cached addresses are unreachable, resolve again next time.
+        self._cache.invalidate(host, port)
+        raise error
+
+    def connect_unix_socket(
+            self,
+            path: str,
+            timeout: float | None = None,
+            socket_options: Iterable | None = None
+        ) -> httpcore.NetworkStream:
+        return self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+
+class AsyncCachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Asynchronous version of CachingNetworkBackend.
+    """
+
+    _backend: httpcore.AsyncNetworkBackend
+    _cache: DnsCache
+
+    def __init__(
+            self, backend: httpcore.AsyncNetworkBackend, cache: DnsCache
+        ) -> None:
+        self._backend = backend
+        self._cache = cache
+
+    async def connect_tcp(
+            self,
+            host: str,
+            port: int,
+            timeout: float | None = None,
+            local_address: str | None = None,
+            socket_options: Iterable | None = None
+        ) -> httpcore.AsyncNetworkStream:
+        try:
+            addrs = await self._cache.resolve_async(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error = httpcore.ConnectError(f'No address found for {host}')
+        for addr in addrs:
+            try:
+                return await self._backend.connect_tcp(
+                    addr, port, timeout, local_address, socket_options
+                )
+            except httpcore.ConnectError as e:
+                error = e
+        # All cached addresses are unreachable, resolve again next time.
+        self._cache.invalidate(host, port)
+        raise error
+
+    async def connect_unix_socket(
+            self,
+            path: str,
+            timeout: float | None = None,
+            socket_options: Iterable | None = None
+        ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout, socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+_ERROR_MAPPING = {
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.ProtocolError: httpx.ProtocolError,
+}
+
+
+@contextmanager
+def _map_errors(request: httpx.Request) -> Iterator[None]:
+    try:
+        yield
+    except Exception as e:
+        for cls in type(e).__mro__:
+            mapped = _ERROR_MAPPING.get(cls, None)
+            if mapped is not None:
+                raise mapped(str(e), request=request) from e
+        raise
+
+
+def _to_core_request(request: httpx.Request) -> httpcore.Request:
+    return httpcore.Request(
+        method=request.method,
+        url=httpcore.URL(
+            scheme=request.url.raw_scheme,
+            host=request.url.raw_host,
+            port=request.url.port,
+            target=request.url.raw_path
+        ),
+        headers=request.headers.raw,
+        content=request.stream,
+        extensions=request.extensions
+    )
+
+
+class _ResponseStream(httpx.SyncByteStream):
+
+    _stream: Iterable[bytes]
+    _request: httpx.Request
+
+    def __init__(self, stream: Iterable[bytes], request: httpx.Request) -> None:
+        self._stream = stream
+        self._request = request
+
+    def __iter__(self) -> Iterator[bytes]:
+        with _map_errors(self._request):
+            for chunk in self._stream:
+                yield chunk
+
+    def close(self):
+        if hasattr(self._stream, 'close'):
+            self._stream.close()
+
+
+class _AsyncResponseStream(httpx.AsyncByteStream):
+
+    _stream: Any
+    _request: httpx.Request
+
+    def __init__(self, stream: Any, request: httpx.Request) -> None:
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _map_errors(self._request):
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self):
+        if hasattr(self._stream, 'aclose'):
+            await self._stream.aclose()
+
+
+class CachingTransport(httpx.BaseTransport):
+    """
+    HTTP transport on a connection pool which connects via addresses from
+    DnsCache.
+    """
+
+    _pool: httpcore.ConnectionPool
+
+    def __init__(
+            self,
+            cache: DnsCache,
+            *,
+            limits: httpx.Limits,
+            http2: bool = False,
+            verify: Any = True,
+            cert: Any = None,
+            trust_env: bool = True
+        ) -> None:
+        self._pool = httpcore.ConnectionPool(
+            ssl_context=httpx.create_ssl_context(
+                verify=verify, cert=cert, trust_env=trust_env
+            ),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=CachingNetworkBackend(
+                httpcore.SyncBackend(), cache
+            )
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with _map_errors(request):
+            resp = self._pool.handle_request(_to_core_request(request))
+        return httpx.Response(
+            status_code=resp.status,
+            headers=resp.headers,
+            stream=_ResponseStream(resp.stream, request),
+            extensions=resp.extensions
+        )
+
+    def close(self):
+        self._pool.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """
+    Asynchronous version of CachingTransport.
+    """
+
+    _pool: httpcore.AsyncConnectionPool
+
+    def __init__(
+            self,
+            cache: DnsCache,
+            *,
+            limits: httpx.Limits,
+            http2: bool = False,
+            verify: Any = True,
+            cert: Any = None,
+            trust_env: bool = True
+        ) -> None:
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(
+                verify=verify, cert=cert, trust_env=trust_env
+            ),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=AsyncCachingNetworkBackend(
+                httpcore.AnyIOBackend(), cache
+            )
+        )
+
+    async def handle_async_request(
+            self, request: httpx.Request
+        ) -> httpx.Response:
+        with _map_errors(request):
+            resp = await self._pool.handle_async_request(
+                _to_core_request(request)
+            )
+        return httpx.Response(
+            status_code=resp.status,
+            headers=resp.headers,
+            stream=_AsyncResponseStream(resp.stream, request),
+            extensions=resp.extensions
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
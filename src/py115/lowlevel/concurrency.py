@@ -0,0 +1,238 @@
+__author__ = 'deadblue'
+
+import asyncio
+import threading
+import time
+from collections import deque
+from types import TracebackType
+from typing import Deque, FrozenSet, Tuple
+
+import httpx
+
+from py115.lowlevel.exceptions import ApiException
+
+
+_THROTTLE_STATUSES = frozenset([429, 503])
+
+
+class AdaptiveConcurrency:
+    """
+    AdaptiveConcurrency limits in-flight API calls with an AIMD algorithm.
+
+    The limit grows additively while calls succeed in time, and shrinks
+    multiplicatively when server pushes back, by timeouts, throttling HTTP
+    statuses, throttling API error codes or slow responses.
+
+    One controller can be shared by multiple clients, both sync and async,
+    across threads.
+    """
+
+    _limit: float
+    _min_limit: int
+    _max_limit: int
+    _increase: float
+    _decrease: float
+    _latency_threshold: float | None
+    _throttle_error_codes: FrozenSet[int]
+    _cooldown: float
+
+    _in_flight: int
+    _last_decrease: float
+    _cond: threading.Condition
+    _async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]
+
+    def __init__(
+            self,
+            initial_limit: int = 4,
+            *,
+            min_limit: int = 1,
+            max_limit: int = 64,
+            increase: float = 1.0,
+            decrease: float = 0.5,
+            latency_threshold: float | None = None,
+            throttle_error_codes: FrozenSet[int] = frozenset(),
+            cooldown: float = 1.0
+        ) -> None:
+        """
+        Args:
+            initial_limit (int): Initial in-flight calls limit.
+            min_limit (int): Lower bound of the limit.
+            max_limit (int): Upper bound of the limit.
+            increase (float): How much the limit grows after a full window
+                of successful calls.
+            decrease (float): Factor to multiply the limit by on push back.
+            latency_threshold (float): Call slower than this in seconds is
+                considered as push back, None to ignore latency.
+            throttle_error_codes (FrozenSet[int]): API error codes which
+                indicate server throttling.
+            cooldown (float): Minimum interval in seconds between two
+                decreases, so a burst of failures shrinks limit only once.
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError('limits must satisfy 1 <= min <= initial <= max')
+        if increase <= 0 or not 0 < decrease < 1:
+            raise ValueError('increase must be positive and decrease in (0, 1)')
+        self._limit = float(initial_limit)
+        self._min_limit, self._max_limit = min_limit, max_limit
+        self._increase, self._decrease = increase, decrease
+        self._latency_threshold = latency_threshold
+        self._throttle_error_codes = throttle_error_codes
+        self._cooldown = cooldown
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        """Current in-flight calls limit."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of in-flight calls."""
+        return self._in_flight
+
+    def is_throttled(self, error: BaseException) -> bool:
+        """
+        Classify whether an error means server is pushing back.
+        """
+        if isinstance(error, httpx.TimeoutException):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in _THROTTLE_STATUSES
+        if isinstance(error, ApiException):
+            return error.error_code in self._throttle_error_codes
+        return False
+
+    def _on_complete(self, latency: float, error: BaseException | None):
+        # Caller must hold the lock
+        congested = error is not None and self.is_throttled(error)
+        if not congested and self._latency_threshold is not None:
+            congested = latency > self._latency_threshold
+        if congested:
+            now = time.monotonic()
+            if now - self._last_decrease >= self._cooldown:
+                self._last_decrease = now
+                self._limit = max(
+                    float(self._min_limit), self._limit * self._decrease
+                )
+        elif error is None:
+            self._limit = min(
+                float(self._max_limit),
+                self._limit + self._increase / self._limit
+            )
+
+    def _wake_waiters(self):
+        # Caller must hold the lock
+        while self._async_waiters and self._in_flight < self.limit:
+            loop, fut = self._async_waiters.popleft()
+            self._in_flight += 1
+            loop.call_soon_threadsafe(_resolve_waiter, fut)
+        if self._in_flight < self.limit:
+            self._cond.notify(self.limit - self._in_flight)
+
+    def acquire(self):
+        """
+        Block current thread until an in-flight slot is available.
+        """
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self):
+        """
+        Wait without blocking event loop until an in-flight slot is available.
+        """
+        with self._cond:
+            if self._in_flight < self.limit and not self._async_waiters:
+                self._in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+                else:
+                    # Slot has been handed to us, give it back.
+                    self._in_flight -= 1
+                    self._wake_waiters()
+            raise
+
+    def release(
+            self, 
+            latency: float | None, 
+            error: BaseException | None = None
+        ):
+        """
+        Release an in-flight slot and feed back the call outcome.
+
+        Args:
+            latency (float): Call latency in seconds, None when the call was
+                aborted and should not affect the limit.
+            error (BaseException): Error raised by the call, None on success.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if latency is not None:
+                self._on_complete(latency, error)
+            self._wake_waiters()
+
+    def slot(self) -> '_Slot':
+        """
+        Context manager which holds a slot during an API call, works with
+        both "with" and "async with".
+        """
+        return _Slot(self)
+
+
+def _resolve_waiter(fut: asyncio.Future):
+    if not fut.done():
+        fut.set_result(None)
+
+
+class _Slot:
+
+    _controller: AdaptiveConcurrency
+    _start: float
+
+    def __init__(self, controller: AdaptiveConcurrency) -> None:
+        self._controller = controller
+
+    def _exit(self, exc_value: BaseException | None):
+        if exc_value is not None and not isinstance(exc_value, Exception):
+            # Cancelled or interrupted, says nothing about the server.
+            self._controller.release(None)
+        else:
+            self._controller.release(time.monotonic() - self._start, exc_value)
+
+    def __enter__(self):
+        self._controller.acquire()
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None
+        ):
+        self._exit(exc_value)
+
+    async def __aenter__(self):
+        await self._controller.acquire_async()
+        self._start = time.monotonic()
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None
+        ):
+        self._exit(exc_value)
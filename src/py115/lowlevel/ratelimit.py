@@ -0,0 +1,132 @@
+__author__ = 'deadblue'
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Type
+from urllib.parse import urlsplit
+
+from py115.lowlevel.spec import ApiSpec
+
+
+@dataclass
+class Rate:
+    """
+    Rate describes a token bucket.
+    """
+
+    per_second: float
+    """Tokens refilled per second."""
+
+    burst: int = 1
+    """Bucket capacity, how many requests can be sent at once."""
+
+    def __post_init__(self):
+        if self.per_second <= 0:
+            raise ValueError('per_second must be positive')
+        if self.burst < 1:
+            raise ValueError('burst must be at least 1')
+
+
+class _Bucket:
+    """
+    Token bucket in GCRA form: it tracks the theoretical arrival time of the
+    next request instead of a token count, so a reservation is O(1) and
+    never blocks while lock is held.
+    """
+
+    _interval: float
+    _tolerance: float
+    _tat: float
+
+    def __init__(self, rate: Rate) -> None:
+        self._interval = 1.0 / rate.per_second
+        self._tolerance = self._interval * (rate.burst - 1)
+        self._tat = 0.0
+
+    def reserve(self, now: float) -> float:
+        tat = max(self._tat, now)
+        delay = max(0.0, tat - self._tolerance - now)
+        self._tat = tat + self._interval
+        return delay
+
+
+class RateLimiter:
+    """
+    RateLimiter paces API requests with token buckets.
+
+    A bucket is keyed by API spec class or request host, the spec class
+    (including its super classes) takes priority over the host. Requests
+    which match no key use the default rate, or are not limited when
+    default rate is not set.
+
+    One limiter can be shared by multiple clients, both sync and async,
+    across threads.
+    """
+
+    _rates: Dict[str | Type[ApiSpec], Rate]
+    _default: Rate | None
+    _buckets: Dict[str | Type[ApiSpec], _Bucket]
+    _lock: threading.Lock
+
+    def __init__(
+            self,
+            rates: Mapping[str | Type[ApiSpec], Rate],
+            default: Rate | None = None
+        ) -> None:
+        """
+        Args:
+            rates (Mapping[str|Type[ApiSpec], Rate]): Rates keyed by host
+                name or API spec class.
+            default (Rate): Rate for each host which has no explicit rate.
+        """
+        self._rates = dict(rates)
+        self._default = default
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _resolve_key(self, spec: ApiSpec) -> str | Type[ApiSpec] | None:
+        for cls in type(spec).__mro__:
+            if cls in self._rates:
+                return cls
+        host = urlsplit(spec.url).hostname
+        if host in self._rates or self._default is not None:
+            return host
+        return None
+
+    def reserve(self, spec: ApiSpec) -> float:
+        """
+        Take a token for the API call.
+
+        Args:
+            spec (ApiSpec): API to be called.
+
+        Returns:
+            float: Delay in seconds that caller should wait before sending.
+        """
+        key = self._resolve_key(spec)
+        if key is None:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(key, None)
+            if bucket is None:
+                bucket = _Bucket(self._rates.get(key, self._default))
+                self._buckets[key] = bucket
+            return bucket.reserve(time.monotonic())
+
+    def acquire(self, spec: ApiSpec):
+        """
+        Block current thread until the API call is allowed.
+        """
+        delay = self.reserve(spec)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, spec: ApiSpec):
+        """
+        Wait without blocking event loop until the API call is allowed.
+        """
+        delay = self.reserve(spec)
+        if delay > 0:
+            await asyncio.sleep(delay)
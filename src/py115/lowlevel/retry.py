@@ -0,0 +1,187 @@
+__author__ = 'deadblue'
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import FrozenSet
+
+import httpx
+
+from py115.lowlevel.exceptions import ApiException, RetryException
+
+
+_DEFAULT_RETRY_STATUSES = frozenset([
+    429, 500, 502, 503, 504
+])
+
+_NOT_SENT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout
+)
+"""Errors raised before request reaches the server."""
+
+_NOT_PROCESSED_STATUSES = frozenset([429])
+"""HTTP status codes which mean request is rejected without processing."""
+
+
+@dataclass
+class RetryPolicy:
+    """
+    RetryPolicy controls how client retries a failed API call.
+    """
+
+    max_attempts: int = 5
+    """Maximum number of attempts, including the first one."""
+
+    backoff_base: float = 0.5
+    """Delay in seconds before the first retry."""
+
+    backoff_max: float = 8.0
+    """Upper bound of delay in seconds between two attempts."""
+
+    jitter: float = 1.0
+    """
+    Fraction of the delay to randomize, 0 means no jitter, 1 means
+    "full jitter".
+    """
+
+    deadline: float | None = 60.0
+    """Total time budget in seconds for all attempts, None means no limit."""
+
+    retry_statuses: FrozenSet[int] = field(
+        default_factory=lambda: _DEFAULT_RETRY_STATUSES
+    )
+    """HTTP status codes which are considered retryable."""
+
+    retry_error_codes: FrozenSet[int] = field(default_factory=frozenset)
+    """API error codes which are considered retryable."""
+
+    retry_non_idempotent: bool = False
+    """
+    Retry non-idempotent API calls like idempotent ones. By default they are
+    retried only when the request surely has not been processed, since a
+    retry may create duplicate tasks or files.
+    """
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        if self.backoff_base < 0 or self.backoff_max < 0:
+            raise ValueError('backoff must not be negative')
+        if not 0 <= self.jitter <= 1:
+            raise ValueError('jitter must be in range [0, 1]')
+
+    def is_retryable(
+            self, error: BaseException, idempotent: bool = True
+        ) -> bool:
+        """
+        Classify whether an error is transient and worth retrying.
+
+        Args:
+            error (BaseException): Error raised by an attempt.
+            idempotent (bool): Whether the API call is idempotent.
+
+        Returns:
+            bool: True when the call should be retried.
+        """
+        if isinstance(error, RetryException):
+            return True
+        if not idempotent and not self.retry_non_idempotent:
+            if isinstance(error, _NOT_SENT_ERRORS):
+                return True
+            if isinstance(error, httpx.HTTPStatusError):
+                status = error.response.status_code
+                return status in _NOT_PROCESSED_STATUSES and \
+                    status in self.retry_statuses
+            return False
+        if isinstance(error, (
+            httpx.TimeoutException,
+            httpx.NetworkError,
+            httpx.RemoteProtocolError
+        )):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.retry_statuses
+        if isinstance(error, ApiException):
+            return error.error_code in self.retry_error_codes
+        return False
+
+    def backoff(self, retry_num: int) -> float:
+        """
+        Calculate delay before a retry.
+
+        Args:
+            retry_num (int): Retry number, starts from 1.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        delay = min(
+            self.backoff_max,
+            self.backoff_base * (2 ** (retry_num - 1))
+        )
+        return delay - delay * self.jitter * random.random()
+
+    def start(self, idempotent: bool = True) -> 'RetryState':
+        """
+        Start tracking retries of an API call.
+
+        Args:
+            idempotent (bool): Whether the API call is idempotent.
+        """
+        return RetryState(self, idempotent)
+
+
+class RetryState:
+    """
+    RetryState tracks attempts of one API call under a RetryPolicy.
+    """
+
+    _policy: RetryPolicy
+    _idempotent: bool
+    _attempts: int
+    _retries: int
+    _start_time: float
+
+    def __init__(self, policy: RetryPolicy, idempotent: bool = True) -> None:
+        self._policy = policy
+        self._idempotent = idempotent
+        self._attempts = 1
+        self._retries = 0
+        self._start_time = time.monotonic()
+
+    @property
+    def attempts(self) -> int:
+        return self._attempts
+
+    def next_delay(self, error: BaseException) -> float | None:
+        """
+        Decide whether to retry after an error.
+
+        Args:
+            error (BaseException): Error raised by last attempt.
+
+        Returns:
+            float|None: Delay in seconds before next attempt, or None when
+                the error should be raised to caller.
+        """
+        policy = self._policy
+        if self._attempts >= policy.max_attempts:
+            return None
+        if not policy.is_retryable(error, self._idempotent):
+            return None
+        if isinstance(error, RetryException):
+            # Request has been adjusted by API spec, retry immediately, but
+            # still within attempts and deadline, so a spec which keeps
+            # asking for retry can not hang the caller.
+            delay = 0.0
+        else:
+            self._retries += 1
+            delay = policy.backoff(self._retries)
+        if policy.deadline is not None:
+            elapsed = time.monotonic() - self._start_time
+            if elapsed + delay >= policy.deadline:
+                return None
+        self._attempts += 1
+        return delay
@@ -0,0 +1,72 @@
+__author__ = 'deadblue'
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import (
+    Awaitable, Callable, Dict, Hashable, TypeVar
+)
+
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    SingleFlight makes concurrent calls with the same key share one
+    execution, its result or exception is delivered to all callers.
+    """
+
+    _lock: threading.Lock
+    _calls: Dict[Hashable, Future]
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key, None)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    Asynchronous version of SingleFlight. The shared execution runs in its
+    own task, so cancelling one caller does not affect the others.
+    """
+
+    _calls: Dict[Hashable, asyncio.Task]
+
+    def __init__(self) -> None:
+        self._calls = {}
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key, None) is task:
+            del self._calls[key]
+        # Mark exception as retrieved, in case all callers have gone.
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key, None)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        return await asyncio.shield(task)
@@ -3,8 +3,9 @@ __author__ = 'deadblue'
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from math import fabs
-from typing import Dict, Generic, TypeVar
+from typing import Dict, Generic, Hashable, Iterable, TypeVar
 
+from py115.lowlevel.retry import RetryPolicy
 
 R = TypeVar('R')
 
@@ -41,6 +42,7 @@ class ApiSpec(Generic[R], ABC):
 
     _api_url: str
     _timeout: ApiTimeout
+    _retry_policy: RetryPolicy | None = None
     query: Dict[str, str]
     form: Dict[str, str]
 
@@ -56,6 +58,58 @@ class ApiSpec(Generic[R], ABC):
     def timeout(self) -> ApiTimeout:
         return self._timeout
 
+    @property
+    def retry_policy(self) -> RetryPolicy | None:
+        """
+        Retry policy for this API, None means using the one of client.
+        """
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy | None):
+        self._retry_policy = value
+
+    @property
+    def cache_key(self) -> Hashable | None:
+        """
+        Key to identify an idempotent API call, calls with the same key 
+        return the same result, so they can share one request.
+        Child class which is idempotent, should override this method.
+        """
+        return None
+
+    @property
+    def idempotent(self) -> bool:
+        """
+        Indicate whether calling API repeatedly has the same effect as calling
+        it once, so that it is safe to retry on any transient error.
+        Default to True for APIs which send no form or have a cache key.
+        """
+        return len(self.form) == 0 or self.cache_key is not None
+
+    @property
+    def cache_ttl(self) -> float | None:
+        """
+        Default time in seconds that result can be cached, None means the 
+        result should not be cached.
+        """
+        return None
+
+    @property
+    def cache_tags(self) -> Iterable[str]:
+        """
+        Tags of the cached result, used to find results to invalidate.
+        """
+        return ()
+
+    @property
+    def invalidate_tags(self) -> Iterable[str]:
+        """
+        Tags of cached results that become stale after this API is called.
+        Child class which mutates data, should override this method.
+        """
+        return ()
+
     @property
     def use_ec(self) -> bool:
         """
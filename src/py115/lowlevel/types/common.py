@@ -9,12 +9,15 @@ class CommonParams:
     """
 
     _app_ver: str
-    _user_id: str
-    _user_hash: str
-    _user_key: str
+    _user_id: str | None
+    _user_hash: str | None
+    _user_key: str | None
 
     def __init__(self, app_ver: str) -> None:
         self._app_ver = app_ver
+        self._user_id = None
+        self._user_hash = None
+        self._user_key = None
 
     def set_user_info(self, user_id: int, user_key: str):
         self._user_id = str(user_id)
@@ -26,15 +29,15 @@ class CommonParams:
         return self._app_ver
     
     @property
-    def user_id(self) -> str:
+    def user_id(self) -> str | None:
         return self._user_id
 
     @property
-    def user_hash(self) -> str:
+    def user_hash(self) -> str | None:
         return self._user_hash
     
     @property
-    def user_key(self) -> str:
+    def user_key(self) -> str | None:
         return self._user_key
     
     def clone(self) -> 'CommonParams':
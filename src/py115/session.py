@@ -0,0 +1,123 @@
+__author__ = 'deadblue'
+
+import json
+import os
+import os.path as ospath
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+
+_FORMAT_VERSION = 1
+
+DEFAULT_SESSION_TTL = 7 * 24 * 3600.0
+
+
+@dataclass
+class SessionData:
+    """
+    SessionData contains startup information of a cloud instance.
+    """
+
+    app_ver: str
+    """App version to simulate."""
+
+    cookies: Dict[str, str] | None = None
+    """Credential cookies."""
+
+    user_id: str | None = None
+    """User ID for upload."""
+
+    user_key: str | None = None
+    """User key for upload."""
+
+    saved_at: float = 0
+    """Timestamp when data is saved."""
+
+    def has_user_info(self) -> bool:
+        return self.cookies is not None \
+            and self.user_id is not None \
+            and self.user_key is not None
+
+
+class SessionCache:
+    """
+    SessionCache persists app version, credential and upload identity in a
+    local file, so that a cloud instance can start without network calls.
+
+    The file contains credential, it is written with owner-only permission.
+    """
+
+    _path: str
+    _ttl: float
+
+    def __init__(self, path: str, ttl: float = DEFAULT_SESSION_TTL) -> None:
+        """
+        Args:
+            path (str): Path of session file.
+            ttl (float): Seconds before cached session expires.
+        """
+        self._path = path
+        self._ttl = ttl
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def load(self) -> SessionData | None:
+        """
+        Load session from file.
+
+        Returns:
+            SessionData: Cached session, or None when file is missing,
+                malformed or expired.
+        """
+        try:
+            with open(self._path, 'r', encoding='utf-8') as fp:
+                obj = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(obj, dict) or obj.get('version') != _FORMAT_VERSION:
+            return None
+        try:
+            data = SessionData(**obj['data'])
+        except (KeyError, TypeError):
+            return None
+        if not isinstance(data.app_ver, str) or not data.app_ver:
+            return None
+        if data.cookies is not None and not isinstance(data.cookies, dict):
+            return None
+        if not isinstance(data.saved_at, (int, float)):
+            return None
+        if time.time() - data.saved_at > self._ttl:
+            return None
+        return data
+
+    def save(self, data: SessionData):
+        """
+        Save session to file, the file is replaced atomically.
+        """
+        data.saved_at = time.time()
+        dir_name = ospath.dirname(ospath.abspath(self._path))
+        os.makedirs(dir_name, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix='.py115-session-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+                json.dump({
+                    'version': _FORMAT_VERSION,
+                    'data': asdict(data)
+                }, fp)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def clear(self):
+        """
+        Remove session file.
+        """
+        try:
+            os.unlink(self._path)
+        except FileNotFoundError:
+            pass
@@ -2,7 +2,7 @@ __author__ = 'deadblue'
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, TypeAlias
+from typing import Callable, Dict, TypeAlias
 
 from py115.lowlevel.types import (
     QrcodeClient, 
@@ -17,6 +17,12 @@ File: TypeAlias = FileInfo
 
 Task: TypeAlias = TaskInfo
 
+ProgressHook: TypeAlias = Callable[[int, int], None]
+"""
+Hook to receive upload or download progress, it is called with transferred 
+bytes and total bytes.
+"""
+
 
 class QrcodeSession:
     """QRcode login session."""
@@ -158,7 +164,7 @@ class UploadTicket:
     """Expiration time of this ticket."""
 
     def __bool__(self) -> bool:
-        return datetime.now().timestamp < self.expiration
+        return datetime.now().timestamp() < self.expiration
 
 
 __all__ = [
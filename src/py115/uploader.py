@@ -0,0 +1,727 @@
+__author__ = 'deadblue'
+
+import asyncio
+import io
+import json
+import os
+import os.path as ospath
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import (
+    Any, Awaitable, BinaryIO, Callable, Dict, List, Tuple
+)
+from urllib.parse import quote
+
+import httpx
+
+from py115._internal import oss
+from py115.exceptions import UploadError
+from py115.lowlevel.retry import RetryPolicy
+from py115.types import ProgressHook, UploadTicket
+
+
+MIN_PART_SIZE = 100 * 1024
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+MAX_PARTS = 10000
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+
+_CHECKPOINT_VERSION = 2
+
+_Part = Tuple[int, int, int]
+
+
+def choose_part_size(
+        file_size: int,
+        part_size: int = DEFAULT_PART_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY
+    ) -> int:
+    """
+    Choose part size for a multipart upload. Part size shrinks to keep all
+    workers busy on small files, and grows to stay within part count limit
+    on large files.
+
+    Args:
+        file_size (int): Size of file to upload.
+        part_size (int): Preferred part size.
+        concurrency (int): Number of parts to upload in parallel.
+
+    Returns:
+        int: Part size in bytes.
+    """
+    size = min(part_size, -(-file_size // concurrency))
+    size = max(size, -(-file_size // MAX_PARTS), MIN_PART_SIZE)
+    return min(size, MAX_PART_SIZE)
+
+
+def _plan_parts(file_size: int, part_size: int) -> List[_Part]:
+    return [
+        (index + 1, offset, min(part_size, file_size - offset))
+        for index, offset in enumerate(range(0, file_size, part_size))
+    ]
+
+
+@dataclass
+class _Checkpoint:
+    bucket: str
+    object_key: str
+    size: int
+    mtime_ns: int | None
+    part_size: int
+    upload_id: str
+
+
+def _get_mtime_ns(stream: BinaryIO) -> int | None:
+    try:
+        st = os.fstat(stream.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+    return st.st_mtime_ns if stat.S_ISREG(st.st_mode) else None
+
+
+def _load_checkpoint(
+        path: str | None, 
+        ticket: UploadTicket, 
+        size: int, 
+        mtime_ns: int | None
+    ) -> _Checkpoint | None:
+    if path is None:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as fp:
+            obj = json.load(fp)
+        if obj.get('version') != _CHECKPOINT_VERSION:
+            return None
+        cp = _Checkpoint(**obj['data'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # Checkpoint of another file or upload target is useless.
+    if cp.bucket != ticket.bucket_name or \
+        cp.object_key != ticket.object_key or \
+        cp.size != size or \
+        cp.mtime_ns != mtime_ns:
+        return None
+    return cp
+
+
+def _save_checkpoint(path: str | None, cp: _Checkpoint):
+    if path is None:
+        return
+    dir_name = ospath.dirname(ospath.abspath(path))
+    os.makedirs(dir_name, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix='.py115-upload-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+            json.dump({
+                'version': _CHECKPOINT_VERSION,
+                'data': asdict(cp)
+            }, fp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remove_checkpoint(path: str | None):
+    if path is None:
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class _PartReader:
+    """
+    _PartReader reads parts of a stream from multiple threads. Regular files
+    are read by `os.pread` without locking.
+    """
+
+    _stream: BinaryIO
+    _fd: int | None
+    _lock: threading.Lock
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self._fd = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'pread'):
+            try:
+                fd = stream.fileno()
+                if stat.S_ISREG(os.fstat(fd).st_mode):
+                    self._fd = fd
+            except (AttributeError, OSError, ValueError):
+                pass
+
+    def read(self, offset: int, size: int) -> bytes:
+        if self._fd is None:
+            with self._lock:
+                self._stream.seek(offset, io.SEEK_SET)
+                data = self._stream.read(size)
+        else:
+            chunks = []
+            while size > 0:
+                chunk = os.pread(self._fd, size, offset)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                offset += len(chunk)
+                size -= len(chunk)
+            data = b''.join(chunks)
+        return data
+
+
+class _BaseUploader:
+
+    _concurrency: int
+    _part_size: int
+    _multipart_threshold: int
+    _retry_policy: RetryPolicy
+    _endpoint: str | None
+    _path_style: bool
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            part_size: int = DEFAULT_PART_SIZE,
+            multipart_threshold: int | None = None,
+            retry_policy: RetryPolicy | None = None,
+            endpoint: str | None = None,
+            path_style: bool = False
+        ) -> None:
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        if not MIN_PART_SIZE <= part_size <= MAX_PART_SIZE:
+            raise ValueError(
+                f'part_size must be in range [{MIN_PART_SIZE}, {MAX_PART_SIZE}]'
+            )
+        self._concurrency = concurrency
+        self._part_size = part_size
+        self._multipart_threshold = part_size \
+            if multipart_threshold is None else multipart_threshold
+        self._retry_policy = retry_policy or RetryPolicy(
+            max_attempts=5, deadline=None
+        )
+        self._endpoint = endpoint
+        self._path_style = path_style
+
+    def _build_request(
+            self,
+            ticket: UploadTicket,
+            method: str,
+            sub_resources: Dict[str, str | None],
+            headers: Dict[str, str] | None = None
+        ) -> Tuple[str, Dict[str, str]]:
+        headers = dict(headers or {})
+        headers['x-oss-security-token'] = ticket.security_token
+        oss.sign_headers(
+            method, ticket.bucket_name, ticket.object_key, sub_resources,
+            headers, ticket.access_key_id, ticket.access_key_secret
+        )
+        url = oss.make_url(
+            self._endpoint or ticket.endpoint,
+            ticket.bucket_name,
+            ticket.object_key,
+            self._path_style
+        )
+        if sub_resources:
+            url += '?' + '&'.join(
+                k if v is None else f'{k}={quote(v, safe="")}'
+                for k, v in sub_resources.items()
+            )
+        return url, headers
+
+    def _callback_headers(self, ticket: UploadTicket) -> Dict[str, str]:
+        return {
+            'x-oss-callback': ticket.callback,
+            'x-oss-callback-var': ticket.callback_var
+        }
+
+    def _plan(
+            self,
+            ticket: UploadTicket,
+            size: int,
+            mtime_ns: int | None,
+            checkpoint: str | None
+        ) -> Tuple[_Checkpoint | None, List[_Part]]:
+        cp = _load_checkpoint(checkpoint, ticket, size, mtime_ns)
+        if cp is None:
+            return None, []
+        return cp, _plan_parts(size, cp.part_size)
+
+    def _new_checkpoint(
+            self, 
+            ticket: UploadTicket, 
+            size: int, 
+            mtime_ns: int | None, 
+            upload_id: str
+        ) -> _Checkpoint:
+        return _Checkpoint(
+            bucket=ticket.bucket_name,
+            object_key=ticket.object_key,
+            size=size,
+            mtime_ns=mtime_ns,
+            part_size=choose_part_size(
+                size, self._part_size, self._concurrency
+            ),
+            upload_id=upload_id
+        )
+
+
+def _filter_uploaded(
+        uploaded: List[Tuple[int, int, str]],
+        plan: List[_Part]
+    ) -> Dict[int, str]:
+    sizes = dict((number, size) for number, _, size in plan)
+    # Drop parts which do not match the plan
+    return dict(
+        (number, etag) for number, size, etag in uploaded
+        if sizes.get(number, None) == size
+    )
+
+
+def _parse_callback_result(resp: httpx.Response) -> Dict[str, Any]:
+    if resp.status_code == 203:
+        raise UploadError(f'Upload callback failed: {resp.text}')
+    if len(resp.content) == 0:
+        return {}
+    return resp.json()
+
+
+class OssUploader(_BaseUploader):
+    """
+    OssUploader uploads file to cloud storage with an `UploadTicket`.
+
+    Large file is uploaded in parts concurrently, each part is retried on
+    transient errors. When a checkpoint file is specified, an interrupted
+    upload resumes from the uploaded parts.
+    """
+
+    _hc: httpx.Client
+    _renew_ticket: Callable[[UploadTicket], None] | None
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            part_size: int = DEFAULT_PART_SIZE,
+            multipart_threshold: int | None = None,
+            retry_policy: RetryPolicy | None = None,
+            endpoint: str | None = None,
+            path_style: bool = False,
+            renew_ticket: Callable[[UploadTicket], None] | None = None,
+            **kwargs: Any
+        ) -> None:
+        """
+        Args:
+            concurrency (int): Maximum number of parts uploading in parallel.
+            part_size (int): Preferred part size, it is adjusted by file size.
+            multipart_threshold (int): File not larger than this is uploaded
+                in one request, default to `part_size`.
+            retry_policy (RetryPolicy): Retry policy for every request.
+            endpoint (str): Override endpoint in ticket, for example an
+                OSS-compatible server.
+            path_style (bool): Put bucket name in URL path instead of host.
+            renew_ticket (Callable): Callback to renew credentials in ticket
+                before every request, such as `renew_ticket` of storage 
+                service.
+            **kwargs: Extra arguments for underlying HTTP client.
+        """
+        super().__init__(
+            concurrency=concurrency,
+            part_size=part_size,
+            multipart_threshold=multipart_threshold,
+            retry_policy=retry_policy,
+            endpoint=endpoint,
+            path_style=path_style
+        )
+        kwargs.setdefault('timeout', httpx.Timeout(60.0, connect=10.0))
+        self._renew_ticket = renew_ticket
+        self._hc = httpx.Client(**kwargs)
+
+    def _request(
+            self,
+            ticket: UploadTicket,
+            method: str,
+            sub_resources: Dict[str, str | None],
+            headers: Dict[str, str] | None = None,
+            content: Callable[[], bytes] | bytes | None = None,
+            idempotent: bool = True
+        ) -> httpx.Response:
+        state = self._retry_policy.start(idempotent)
+        while True:
+            try:
+                if self._renew_ticket is not None:
+                    self._renew_ticket(ticket)
+                url, req_headers = self._build_request(
+                    ticket, method, sub_resources, headers
+                )
+                body = content() if callable(content) else content
+                resp = self._hc.request(
+                    method, url, headers=req_headers, content=body
+                )
+                resp.raise_for_status()
+                return resp
+            except Exception as e:
+                delay = state.next_delay(e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    def _list_parts(
+            self, ticket: UploadTicket, upload_id: str
+        ) -> List[Tuple[int, int, str]]:
+        result, marker = [], None
+        while True:
+            sub_resources = {'uploadId': upload_id}
+            if marker is not None:
+                sub_resources['part-number-marker'] = marker
+            resp = self._request(ticket, 'GET', sub_resources)
+            parts, marker = oss.parse_list_parts(resp.content)
+            result.extend(parts)
+            if marker is None:
+                return result
+
+    def _upload_part(
+            self,
+            ticket: UploadTicket,
+            upload_id: str,
+            reader: _PartReader,
+            part: _Part
+        ) -> str:
+        number, offset, size = part
+        resp = self._request(
+            ticket, 'PUT',
+            {'partNumber': str(number), 'uploadId': upload_id},
+            content=lambda: reader.read(offset, size)
+        )
+        return resp.headers['ETag']
+
+    def upload(
+            self,
+            ticket: UploadTicket,
+            stream: BinaryIO,
+            *,
+            checkpoint: str | None = None,
+            progress: ProgressHook | None = None
+        ) -> Dict[str, Any]:
+        """
+        Upload whole stream to cloud storage.
+
+        Args:
+            ticket (UploadTicket): Upload ticket from `request_upload`.
+            stream (BinaryIO): Seekable data stream.
+            checkpoint (str): Path of checkpoint file to resume upload from,
+                it is ignored when size or mtime of the file has changed, 
+                and removed after upload completes.
+            progress (ProgressHook): Hook to receive upload progress.
+
+        Returns:
+            Dict[str, Any]: Callback result from cloud.
+        """
+        size = stream.seek(0, io.SEEK_END)
+        reader = _PartReader(stream)
+        if size <= self._multipart_threshold:
+            resp = self._request(
+                ticket, 'PUT', {}, self._callback_headers(ticket),
+                content=lambda: reader.read(0, size),
+                # OSS may have run the callback when response is lost.
+                idempotent=False
+            )
+            if progress is not None:
+                progress(size, size)
+            return _parse_callback_result(resp)
+        # Resume from checkpoint
+        mtime_ns = _get_mtime_ns(stream)
+        cp, plan = self._plan(ticket, size, mtime_ns, checkpoint)
+        uploaded = {}
+        if cp is not None:
+            try:
+                uploaded = _filter_uploaded(
+                    self._list_parts(ticket, cp.upload_id), plan
+                )
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    raise
+                cp = None
+        if cp is None:
+            resp = self._request(ticket, 'POST', {'uploads': None})
+            cp = self._new_checkpoint(
+                ticket, size, mtime_ns, oss.parse_upload_id(resp.content)
+            )
+            plan = _plan_parts(size, cp.part_size)
+            _save_checkpoint(checkpoint, cp)
+        done_size = sum(s for n, _, s in plan if n in uploaded)
+        if progress is not None:
+            progress(done_size, size)
+        # Upload parts concurrently
+        executor = ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix='py115-upload'
+        )
+        try:
+            futures = dict(
+                (executor.submit(
+                    self._upload_part, ticket, cp.upload_id, reader, part
+                ), part) for part in plan if part[0] not in uploaded
+            )
+            for future in as_completed(futures):
+                number, _, part_size = futures[future]
+                uploaded[number] = future.result()
+                done_size += part_size
+                if progress is not None:
+                    progress(done_size, size)
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if checkpoint is None:
+                # Nothing can resume it, abort to free uploaded parts.
+                self._abort(ticket, cp.upload_id)
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        # Complete upload with callback
+        headers = self._callback_headers(ticket)
+        headers['Content-Type'] = 'application/xml'
+        resp = self._request(
+            ticket, 'POST', {'uploadId': cp.upload_id}, headers,
+            content=oss.make_complete_body(uploaded.items()),
+            idempotent=False
+        )
+        _remove_checkpoint(checkpoint)
+        return _parse_callback_result(resp)
+
+    def _abort(self, ticket: UploadTicket, upload_id: str):
+        try:
+            self._request(ticket, 'DELETE', {'uploadId': upload_id})
+        except Exception:
+            pass
+
+    def close(self):
+        self._hc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class AsyncOssUploader(_BaseUploader):
+    """
+    Asynchronous version of OssUploader.
+    """
+
+    _hc: httpx.AsyncClient
+    _renew_ticket: Callable[[UploadTicket], Awaitable[None]] | None
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            part_size: int = DEFAULT_PART_SIZE,
+            multipart_threshold: int | None = None,
+            retry_policy: RetryPolicy | None = None,
+            endpoint: str | None = None,
+            path_style: bool = False,
+            renew_ticket: Callable[[UploadTicket], Awaitable[None]] | None = None,
+            **kwargs: Any
+        ) -> None:
+        """
+        Args:
+            concurrency (int): Maximum number of parts uploading in parallel.
+            part_size (int): Preferred part size, it is adjusted by file size.
+            multipart_threshold (int): File not larger than this is uploaded
+                in one request, default to `part_size`.
+            retry_policy (RetryPolicy): Retry policy for every request.
+            endpoint (str): Override endpoint in ticket, for example an
+                OSS-compatible server.
+            path_style (bool): Put bucket name in URL path instead of host.
+            renew_ticket (Callable): Callback to renew credentials in ticket
+                before every request, such as `renew_ticket` of storage 
+                service.
+            **kwargs: Extra arguments for underlying HTTP client.
+        """
+        super().__init__(
+            concurrency=concurrency,
+            part_size=part_size,
+            multipart_threshold=multipart_threshold,
+            retry_policy=retry_policy,
+            endpoint=endpoint,
+            path_style=path_style
+        )
+        kwargs.setdefault('timeout', httpx.Timeout(60.0, connect=10.0))
+        self._renew_ticket = renew_ticket
+        self._hc = httpx.AsyncClient(**kwargs)
+
+    async def _request(
+            self,
+            ticket: UploadTicket,
+            method: str,
+            sub_resources: Dict[str, str | None],
+            headers: Dict[str, str] | None = None,
+            content: Callable[[], bytes] | bytes | None = None,
+            idempotent: bool = True
+        ) -> httpx.Response:
+        state = self._retry_policy.start(idempotent)
+        while True:
+            try:
+                if self._renew_ticket is not None:
+                    await self._renew_ticket(ticket)
+                url, req_headers = self._build_request(
+                    ticket, method, sub_resources, headers
+                )
+                body = await asyncio.to_thread(content) \
+                    if callable(content) else content
+                resp = await self._hc.request(
+                    method, url, headers=req_headers, content=body
+                )
+                resp.raise_for_status()
+                return resp
+            except Exception as e:
+                delay = state.next_delay(e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    async def _list_parts(
+            self, ticket: UploadTicket, upload_id: str
+        ) -> List[Tuple[int, int, str]]:
+        result, marker = [], None
+        while True:
+            sub_resources = {'uploadId': upload_id}
+            if marker is not None:
+                sub_resources['part-number-marker'] = marker
+            resp = await self._request(ticket, 'GET', sub_resources)
+            parts, marker = oss.parse_list_parts(resp.content)
+            result.extend(parts)
+            if marker is None:
+                return result
+
+    async def _upload_part(
+            self,
+            ticket: UploadTicket,
+            upload_id: str,
+            reader: _PartReader,
+            part: _Part,
+            semaphore: asyncio.Semaphore
+        ) -> Tuple[_Part, str]:
+        number, offset, size = part
+        async with semaphore:
+            resp = await self._request(
+                ticket, 'PUT',
+                {'partNumber': str(number), 'uploadId': upload_id},
+                content=lambda: reader.read(offset, size)
+            )
+        return part, resp.headers['ETag']
+
+    async def upload(
+            self,
+            ticket: UploadTicket,
+            stream: BinaryIO,
+            *,
+            checkpoint: str | None = None,
+            progress: ProgressHook | None = None
+        ) -> Dict[str, Any]:
+        """
+        Upload whole stream to cloud storage.
+
+        Args:
+            ticket (UploadTicket): Upload ticket from `request_upload`.
+            stream (BinaryIO): Seekable data stream.
+            checkpoint (str): Path of checkpoint file to resume upload from,
+                it is ignored when size or mtime of the file has changed, 
+                and removed after upload completes.
+            progress (ProgressHook): Hook to receive upload progress.
+
+        Returns:
+            Dict[str, Any]: Callback result from cloud.
+        """
+        size = stream.seek(0, io.SEEK_END)
+        reader = _PartReader(stream)
+        if size <= self._multipart_threshold:
+            resp = await self._request(
+                ticket, 'PUT', {}, self._callback_headers(ticket),
+                content=lambda: reader.read(0, size),
+                # OSS may have run the callback when response is lost.
+                idempotent=False
+            )
+            if progress is not None:
+                progress(size, size)
+            return _parse_callback_result(resp)
+        # Resume from checkpoint
+        mtime_ns = _get_mtime_ns(stream)
+        cp, plan = await asyncio.to_thread(
+            self._plan, ticket, size, mtime_ns, checkpoint
+        )
+        uploaded = {}
+        if cp is not None:
+            try:
+                uploaded = _filter_uploaded(
+                    await self._list_parts(ticket, cp.upload_id), plan
+                )
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    raise
+                cp = None
+        if cp is None:
+            resp = await self._request(ticket, 'POST', {'uploads': None})
+            cp = self._new_checkpoint(
+                ticket, size, mtime_ns, oss.parse_upload_id(resp.content)
+            )
+            plan = _plan_parts(size, cp.part_size)
+            await asyncio.to_thread(_save_checkpoint, checkpoint, cp)
+        done_size = sum(s for n, _, s in plan if n in uploaded)
+        if progress is not None:
+            progress(done_size, size)
+        # Upload parts concurrently
+        semaphore = asyncio.Semaphore(self._concurrency)
+        tasks = [
+            asyncio.ensure_future(self._upload_part(
+                ticket, cp.upload_id, reader, part, semaphore
+            )) for part in plan if part[0] not in uploaded
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                (number, _, part_size), etag = await task
+                uploaded[number] = etag
+                done_size += part_size
+                if progress is not None:
+                    progress(done_size, size)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if checkpoint is None:
+                # Nothing can resume it, abort to free uploaded parts.
+                await self._abort(ticket, cp.upload_id)
+            raise
+        # Complete upload with callback
+        headers = self._callback_headers(ticket)
+        headers['Content-Type'] = 'application/xml'
+        resp = await self._request(
+            ticket, 'POST', {'uploadId': cp.upload_id}, headers,
+            content=oss.make_complete_body(uploaded.items()),
+            idempotent=False
+        )
+        await asyncio.to_thread(_remove_checkpoint, checkpoint)
+        return _parse_callback_result(resp)
+
+    async def _abort(self, ticket: UploadTicket, upload_id: str):
+        try:
+            await self._request(ticket, 'DELETE', {'uploadId': upload_id})
+        except Exception:
+            pass
+
+    async def aclose(self):
+        await self._hc.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
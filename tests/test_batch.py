@@ -0,0 +1,44 @@
+import asyncio
+
+from py115.batch import import_files_async
+
+
+class _FakeStorage:
+
+    hash_cache = None
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+
+    async def import_file(self, dir_id, save_name, size, sha1, sign=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0 if save_name == 'f0' else 10)
+        finally:
+            self.running -= 1
+        return 'pickcode'
+
+
+def _entries(count: int):
+    return [('0', f'f{i}', 1, 'ab' * 20, None) for i in range(count)]
+
+
+def test_import_files_async_leaves_no_pending_task():
+    async def run():
+        storage = _FakeStorage()
+        results = import_files_async(storage, _entries(20), workers=2)
+        async for result in results:
+            assert result.name == 'f0'
+            break
+        await results.aclose()
+        current = asyncio.current_task()
+        pending = [t for t in asyncio.all_tasks() if t is not current]
+        return storage, pending
+
+    storage, pending = asyncio.run(run())
+    assert pending == []
+    assert storage.running == 0
+    # In-flight entries are bounded by twice the workers, as sync version
+    assert storage.max_running == 4
@@ -0,0 +1,63 @@
+import httpx
+
+from py115.lowlevel import Client, MemoryCache
+from py115.lowlevel.api import FileGetDescApi, FileSetDescApi
+
+
+def test_invalidate_removes_tagged_results():
+    cache = MemoryCache()
+    cache.put('a', 1, 60, ['file:1'], cache.version())
+    cache.put('b', 2, 60, ['file:2'], cache.version())
+    cache.invalidate(['file:1'])
+    assert cache.get('a') == (False, None)
+    assert cache.get('b') == (True, 2)
+    assert cache.stats().invalidations == 1
+
+
+def test_put_after_invalidate_is_dropped():
+    cache = MemoryCache()
+    version = cache.version()
+    # A mutating call finishes while the lookup is in flight
+    cache.invalidate(['file:1'])
+    cache.put('a', 1, 60, ['file:1'], version)
+    assert cache.get('a') == (False, None)
+
+
+def test_clear_resets_tag_versions():
+    cache = MemoryCache()
+    version = cache.version()
+    cache.invalidate(['file:1'])
+    cache.clear()
+    assert cache._tag_versions == {}
+    # Results of calls started before clear are dropped
+    cache.put('a', 1, 60, ['file:2'], version)
+    assert cache.get('a') == (False, None)
+    cache.put('a', 1, 60, ['file:1'], cache.version())
+    assert cache.get('a') == (True, 1)
+
+
+def _new_client(cache: MemoryCache, uid: str, calls: list) -> Client:
+    def handler(req: httpx.Request) -> httpx.Response:
+        calls.append(uid)
+        if req.method == 'POST':
+            return httpx.Response(200, json={'state': True})
+        return httpx.Response(200, json={'state': True, 'desc': uid})
+
+    client = Client(cache=cache, transport=httpx.MockTransport(handler))
+    client.import_cookies({'UID': f'{uid}_A1_1700000000'})
+    return client
+
+
+def test_shared_cache_isolates_users():
+    cache, calls = MemoryCache(), []
+    alice = _new_client(cache, '1001', calls)
+    bob = _new_client(cache, '1002', calls)
+    assert alice.call_api(FileGetDescApi('1')) == '1001'
+    assert bob.call_api(FileGetDescApi('1')) == '1002'
+    assert alice.call_api(FileGetDescApi('1')) == '1001'
+    assert calls == ['1001', '1002']
+    # Mutation of one user does not evict results of the other
+    bob.call_api(FileSetDescApi('1', 'new'))
+    assert alice.call_api(FileGetDescApi('1')) == '1001'
+    assert bob.call_api(FileGetDescApi('1')) == '1002'
+    assert calls == ['1001', '1002', '1002', '1002']
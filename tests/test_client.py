@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+
+from py115.lowlevel import AsyncClient, Client
+from py115.lowlevel.api import FileGetDescApi
+
+
+def _handler(req: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={
+        'state': True, 'desc': req.url.params['file_id']
+    })
+
+
+def test_call_many_keeps_input_order():
+    client = Client(transport=httpx.MockTransport(_handler))
+    results = client.call_many(
+        [FileGetDescApi(str(i)) for i in range(10)], concurrency=3
+    )
+    assert results == [str(i) for i in range(10)]
+
+
+def test_iter_many_leaves_no_pending_task():
+    async def handler(req: httpx.Request) -> httpx.Response:
+        if req.url.params['file_id'] != '0':
+            await asyncio.sleep(10)
+        return _handler(req)
+
+    async def run():
+        client = AsyncClient(transport=httpx.MockTransport(handler))
+        results = client.iter_many([FileGetDescApi(str(i)) for i in range(5)])
+        async for index, result in results:
+            assert (index, result) == (0, '0')
+            break
+        await results.aclose()
+        current = asyncio.current_task()
+        return [t for t in asyncio.all_tasks() if t is not current]
+
+    assert asyncio.run(run()) == []
+
+
+def test_small_pool_caps_keepalive():
+    # Default keepalive limit exceeds the pool size, which httpx rejects
+    client = Client(
+        max_connections=5, transport=httpx.MockTransport(_handler)
+    )
+    assert client.call_api(FileGetDescApi('1')) == '1'
+    client.close()
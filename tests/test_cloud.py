@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+import pytest
+
+from py115 import AsyncCloud, Cloud
+from py115.lowlevel import AsyncClient, Client, RetryPolicy
+
+
+def _handler(req: httpx.Request) -> httpx.Response:
+    raise AssertionError(f'Unexpected request: {req.url}')
+
+
+def test_cloud_uses_given_client():
+    client = Client(transport=httpx.MockTransport(_handler))
+    cloud = Cloud(app_ver='27.0.0', client=client)
+    assert cloud.lowlevel()[0] is client
+
+
+def test_cloud_forwards_client_kwargs():
+    policy = RetryPolicy(max_attempts=1)
+    cloud = Cloud(
+        app_ver='27.0.0', retry_policy=policy, max_connections=2,
+        transport=httpx.MockTransport(_handler)
+    )
+    client, _ = cloud.lowlevel()
+    assert client.retry_policy is policy
+
+
+def test_client_and_client_kwargs_conflict():
+    with pytest.raises(ValueError):
+        Cloud(app_ver='27.0.0', client=Client(), http2=True)
+
+
+def test_async_cloud_keeps_given_client_open():
+    async def run():
+        client = AsyncClient(transport=httpx.MockTransport(_handler))
+        async with await AsyncCloud.create(
+            app_ver='27.0.0', client=client
+        ) as cloud:
+            assert cloud.lowlevel()[0] is client
+        return client
+
+    client = asyncio.run(run())
+    assert not client._hc.is_closed
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import httpx
+import pytest
+
+from py115.downloader import (
+    AsyncDownloader, Downloader, MIN_CHUNK_SIZE, _JOURNAL_VERSION
+)
+from py115.exceptions import DownloadError
+from py115.lowlevel.retry import RetryPolicy
+from py115.types import DownloadTicket
+
+
+DATA = os.urandom(MIN_CHUNK_SIZE * 3 + 1000)
+SHA1 = hashlib.sha1(DATA).hexdigest().upper()
+
+
+class _Server:
+
+    def __init__(self) -> None:
+        self.ranges = []
+
+    def __call__(self, req: httpx.Request) -> httpx.Response:
+        start, end = req.headers['Range'][6:].split('-')
+        start, end = int(start), int(end)
+        self.ranges.append(start)
+        return httpx.Response(206, content=DATA[start:end + 1])
+
+
+def _ticket() -> DownloadTicket:
+    return DownloadTicket('https://cdn.example/file', 'file.bin', len(DATA))
+
+
+def _downloader(server: _Server) -> Downloader:
+    return Downloader(
+        concurrency=2, chunk_size=MIN_CHUNK_SIZE,
+        transport=httpx.MockTransport(server)
+    )
+
+
+def test_download_verifies_sha1(tmp_path):
+    path = str(tmp_path / 'file.bin')
+    with _downloader(_Server()) as downloader:
+        assert downloader.download(_ticket(), path, sha1=SHA1) == SHA1
+    with open(path, 'rb') as fp:
+        assert fp.read() == DATA
+    os.unlink(path)
+    with _downloader(_Server()) as downloader:
+        with pytest.raises(DownloadError):
+            downloader.download(_ticket(), path, sha1='0' * 40)
+
+
+def test_download_resumes_from_journal(tmp_path):
+    path, journal = str(tmp_path / 'file.bin'), str(tmp_path / 'file.jn')
+    # First two ranges are downloaded by an interrupted run
+    with open(path, 'wb') as fp:
+        fp.write(DATA[:MIN_CHUNK_SIZE * 2])
+        fp.truncate(len(DATA))
+    with open(journal, 'w') as fp:
+        json.dump({'version': _JOURNAL_VERSION, 'data': {
+            'file_name': 'file.bin', 'size': len(DATA),
+            'chunk_size': MIN_CHUNK_SIZE, 'sha1': SHA1, 'done': [0, 1]
+        }}, fp)
+    server = _Server()
+    with _downloader(server) as downloader:
+        result = downloader.download(
+            _ticket(), path, sha1=SHA1, journal=journal
+        )
+    assert result == SHA1
+    assert sorted(server.ranges) == [MIN_CHUNK_SIZE * 2, MIN_CHUNK_SIZE * 3]
+    assert not os.path.exists(journal)
+
+
+def test_existing_file_is_not_overwritten(tmp_path):
+    path, journal = str(tmp_path / 'file.bin'), str(tmp_path / 'file.jn')
+    with open(path, 'wb') as fp:
+        fp.write(b'precious')
+    with _downloader(_Server()) as downloader:
+        with pytest.raises(DownloadError):
+            downloader.download(_ticket(), path, journal=journal)
+    with open(path, 'rb') as fp:
+        assert fp.read() == b'precious'
+
+
+def test_failed_download_can_be_retried(tmp_path):
+    path = str(tmp_path / 'file.bin')
+
+    def failing(req: httpx.Request) -> httpx.Response:
+        if req.headers['Range'].startswith('bytes=0-'):
+            return httpx.Response(500)
+        return _Server()(req)
+
+    downloader = Downloader(
+        concurrency=2, chunk_size=MIN_CHUNK_SIZE,
+        retry_policy=RetryPolicy(max_attempts=1),
+        transport=httpx.MockTransport(failing)
+    )
+    with downloader:
+        with pytest.raises(httpx.HTTPStatusError):
+            downloader.download(_ticket(), path, sha1=SHA1)
+    assert not os.path.exists(path)
+    with _downloader(_Server()) as downloader:
+        assert downloader.download(_ticket(), path, sha1=SHA1) == SHA1
+
+
+def test_corrupted_download_is_removed(tmp_path):
+    path, journal = str(tmp_path / 'file.bin'), str(tmp_path / 'file.jn')
+    with _downloader(_Server()) as downloader:
+        with pytest.raises(DownloadError):
+            downloader.download(
+                _ticket(), path, sha1='0' * 40, journal=journal
+            )
+    assert not os.path.exists(path)
+    assert not os.path.exists(journal)
+
+
+def test_async_failed_download_can_be_retried(tmp_path):
+    path = str(tmp_path / 'file.bin')
+
+    async def run(handler, **kwargs):
+        async with AsyncDownloader(
+            concurrency=2, chunk_size=MIN_CHUNK_SIZE,
+            transport=httpx.MockTransport(handler), **kwargs
+        ) as downloader:
+            return await downloader.download(_ticket(), path, sha1=SHA1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run(
+            lambda req: httpx.Response(500),
+            retry_policy=RetryPolicy(max_attempts=1)
+        ))
+    assert not os.path.exists(path)
+    assert asyncio.run(run(_Server())) == SHA1
+
+
+def test_expired_url_is_resolved_a_bounded_number_of_times(tmp_path):
+    resolves = []
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        return httpx.Response(403)
+
+    def resolve() -> DownloadTicket:
+        resolves.append(1)
+        ticket = _ticket()
+        ticket.url += f'?n={len(resolves)}'
+        return ticket
+
+    downloader = Downloader(
+        concurrency=1, transport=httpx.MockTransport(handler)
+    )
+    with downloader:
+        with pytest.raises(httpx.HTTPStatusError):
+            downloader.download(
+                _ticket(), str(tmp_path / 'file.bin'), resolve=resolve
+            )
+    assert 0 < len(resolves) <= 3
+
+
+def test_async_download(tmp_path):
+    path = str(tmp_path / 'file.bin')
+
+    async def run():
+        async with AsyncDownloader(
+            concurrency=2, chunk_size=MIN_CHUNK_SIZE,
+            transport=httpx.MockTransport(_Server())
+        ) as downloader:
+            return await downloader.download(_ticket(), path, sha1=SHA1)
+
+    assert asyncio.run(run()) == SHA1
+    with open(path, 'rb') as fp:
+        assert fp.read() == DATA
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import pickle
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import lz4.block
+
+from py115._internal.crypto.ec115 import Cipher, decompress
+from py115.lowlevel import AsyncClient
+from py115.lowlevel.api._base import JsonApiSpec, JsonResult
+
+
+def _encrypt_response(cipher: Cipher, data: bytes) -> bytes:
+    # Compress in 8 KiB blocks, as the server does
+    plaintext = bytearray()
+    for pos in range(0, len(data), 8192):
+        block = lz4.block.compress(data[pos:pos+8192], store_size=False)
+        plaintext += struct.pack('<H', len(block)) + block
+    tail = bytearray(12)
+    tail[7] = 0x5a
+    tail[:4] = bytes(b ^ 0x5a for b in struct.pack('<I', len(data)))
+    return cipher.encode(bytes(plaintext)) + bytes(tail)
+
+
+def test_decode_round_trip():
+    cipher = Cipher()
+    data = b''.join(b'%08d' % i for i in range(10000))
+    body = _encrypt_response(cipher, data)
+    assert cipher.decode(body) == data
+    decoder = cipher.decoder()
+    for pos in range(0, len(body), 1000):
+        decoder.feed(body[pos:pos+1000])
+    assert decoder.finish() == data
+
+
+def test_decompress_needs_no_key():
+    cipher = Cipher()
+    data = b'{"state": true}' * 1000
+    plaintext, tail = cipher.decrypt(_encrypt_response(cipher, data))
+    # What is sent to an offload executor must not carry the key
+    task = pickle.dumps((plaintext, tail))
+    assert cipher.private_key not in task
+    assert decompress(*pickle.loads(task)) == data
+
+
+class _EcEchoApi(JsonApiSpec[dict]):
+
+    def __init__(self) -> None:
+        super().__init__('https://uplb.115.com/echo')
+
+    @property
+    def use_ec(self) -> bool:
+        return True
+
+    def _parse_json_result(self, json_obj: JsonResult) -> dict:
+        return json_obj
+
+
+def test_offloaded_ec_response():
+    cipher = Cipher()
+    data = {'state': True, 'items': list(range(1000))}
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        body = _encrypt_response(cipher, json.dumps(data).encode())
+        return httpx.Response(200, content=body)
+
+    async def run(executor):
+        client = AsyncClient(
+            ec_key=cipher.private_key,
+            offload_executor=executor,
+            offload_threshold=0,
+            transport=httpx.MockTransport(handler)
+        )
+        return await client.call_api(_EcEchoApi())
+
+    assert asyncio.run(run(None)) == data
+    with ProcessPoolExecutor(1) as executor:
+        assert asyncio.run(run(executor)) == data
@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+import os
+
+from py115 import HashCache, digest_path, hash_files
+from py115.cloud import _aspool, _to_digest_result
+
+
+def _write(path, data: bytes, mtime_ns: int):
+    with open(path, 'wb') as fp:
+        fp.write(data)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hash_cache_lookup_and_store(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    _write(path, b'hello', 1_000_000_000)
+    cache = HashCache(':memory:')
+    first = digest_path(path, cache)
+    assert first.key is not None
+    assert cache.lookup(first.key) == first.sha1
+    # Same size but new mtime invalidates the cached hash
+    _write(path, b'world', 2_000_000_000)
+    fh = digest_path(path)
+    assert cache.lookup(fh.key) is None
+    assert fh.sha1 != first.sha1
+
+
+def test_file_hash_is_not_reused_after_change(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    _write(path, b'hello', 1_000_000_000)
+    fh, = hash_files([path])
+    with open(path, 'rb') as fp:
+        assert _to_digest_result(fh, fp).sha1 == fh.sha1
+    # Content changed in place, size is kept
+    _write(path, b'world', 2_000_000_000)
+    with open(path, 'rb') as fp:
+        assert _to_digest_result(fh, fp) is None
+
+
+def test_async_chunks_are_spooled_with_digest():
+    data = os.urandom(3 * 1024 * 1024 + 100)
+
+    async def chunks():
+        for offset in range(0, len(data), 4096):
+            yield data[offset:offset + 4096]
+
+    spool, dr = asyncio.run(_aspool(chunks(), 1024 * 1024))
+    with spool:
+        assert spool.read() == data
+    assert dr.size == len(data)
+    assert dr.sha1 == hashlib.sha1(data).hexdigest().upper()
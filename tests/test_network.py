@@ -0,0 +1,57 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from py115.lowlevel import Client
+from py115.lowlevel.client._network import CachingTransport, DnsCache
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'pong'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_port():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_caching_transport_resolves_once(server_port):
+    events = []
+    cache = DnsCache(60, lambda name, ts, info: events.append(info))
+    transport = CachingTransport(cache, limits=httpx.Limits())
+    with httpx.Client(transport=transport) as hc:
+        for _ in range(3):
+            resp = hc.get(f'http://localhost:{server_port}/')
+            assert resp.content == b'pong'
+    assert [e['cached'] for e in events][0] is False
+
+
+def test_empty_addresses_raise_connect_error(monkeypatch):
+    monkeypatch.setattr(socket, 'getaddrinfo', lambda *args, **kwargs: [])
+    transport = CachingTransport(DnsCache(60, None), limits=httpx.Limits())
+    with httpx.Client(transport=transport) as hc:
+        with pytest.raises(httpx.ConnectError):
+            hc.get('http://example.invalid/')
+
+
+def test_dns_cache_rejects_custom_transport():
+    with pytest.raises(ValueError):
+        Client(dns_cache_ttl=5, transport=httpx.HTTPTransport())
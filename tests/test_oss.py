@@ -0,0 +1,48 @@
+from py115._internal import oss
+
+
+def test_sign_headers_known_example():
+    # Example from OSS document of V1 signature
+    headers = {
+        'Content-MD5': 'ODBGOERFMDMzQTczRUY3NUE3NzA5QzdFNUYzMDQxNEM=',
+        'Content-Type': 'text/html',
+        'Date': 'Thu, 17 Nov 2005 18:49:58 GMT',
+        'X-OSS-Meta-Author': 'foo@bar.com',
+        'X-OSS-Magic': 'abracadabra',
+    }
+    assert oss.make_string_to_sign(
+        'PUT', 'oss-example', 'nelson', {}, headers
+    ) == (
+        'PUT\n'
+        'ODBGOERFMDMzQTczRUY3NUE3NzA5QzdFNUYzMDQxNEM=\n'
+        'text/html\n'
+        'Thu, 17 Nov 2005 18:49:58 GMT\n'
+        'x-oss-magic:abracadabra\n'
+        'x-oss-meta-author:foo@bar.com\n'
+        '/oss-example/nelson'
+    )
+    oss.sign_headers(
+        'PUT', 'oss-example', 'nelson', {}, headers,
+        '44CF9590006BF252F707', 'OtxrzxIsfpFjA7SwPzILwy8Bw21TLhquhboDYROV'
+    )
+    assert headers['Authorization'] == \
+        'OSS 44CF9590006BF252F707:26NBxoKdsyly4EDv6inkoDft/yA='
+
+
+def test_only_sub_resources_are_signed():
+    headers = {'Date': 'Thu, 17 Nov 2005 18:49:58 GMT'}
+    string_to_sign = oss.make_string_to_sign(
+        'GET', 'bucket', 'a/b.bin', {
+            'uploadId': 'id', 'part-number-marker': '10', 'max-parts': '5'
+        }, headers
+    )
+    assert string_to_sign.endswith('\n/bucket/a/b.bin?uploadId=id')
+    string_to_sign = oss.make_string_to_sign(
+        'PUT', 'bucket', 'a/b.bin', {'uploadId': 'id', 'partNumber': '2'},
+        headers
+    )
+    assert string_to_sign.endswith('?partNumber=2&uploadId=id')
+    string_to_sign = oss.make_string_to_sign(
+        'POST', 'bucket', 'a/b.bin', {'uploads': None}, headers
+    )
+    assert string_to_sign.endswith('/bucket/a/b.bin?uploads')
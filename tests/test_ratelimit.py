@@ -0,0 +1,51 @@
+import pytest
+
+from py115.lowlevel import Rate, RateLimiter
+from py115.lowlevel.api import FileGetDescApi, FileSetDescApi
+from py115.lowlevel.ratelimit import _Bucket
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = _Bucket(Rate(per_second=10, burst=3))
+    delays = [bucket.reserve(100.0) for _ in range(5)]
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert delays[3] == pytest.approx(0.1)
+    assert delays[4] == pytest.approx(0.2)
+
+
+def test_bucket_refills_over_time():
+    bucket = _Bucket(Rate(per_second=10, burst=2))
+    assert bucket.reserve(100.0) == 0.0
+    assert bucket.reserve(100.0) == 0.0
+    assert bucket.reserve(100.0) == pytest.approx(0.1)
+    # After idling, the full burst is available again
+    assert bucket.reserve(101.0) == 0.0
+    assert bucket.reserve(101.0) == 0.0
+
+
+def test_rate_validation():
+    with pytest.raises(ValueError):
+        Rate(per_second=0)
+    with pytest.raises(ValueError):
+        Rate(per_second=1, burst=0)
+
+
+def test_spec_class_takes_priority_over_host():
+    limiter = RateLimiter({
+        FileGetDescApi: Rate(per_second=1),
+        'webapi.115.com': Rate(per_second=1000, burst=100),
+    })
+    get_api = FileGetDescApi('1')
+    assert limiter.reserve(get_api) == 0.0
+    assert limiter.reserve(get_api) > 0.5
+    # Other APIs on the same host use the host bucket
+    set_api = FileSetDescApi('1', 'desc')
+    assert limiter.reserve(set_api) == 0.0
+    assert limiter.reserve(set_api) == 0.0
+
+
+def test_unmatched_spec_is_not_limited():
+    limiter = RateLimiter({'example.com': Rate(per_second=1)})
+    api = FileGetDescApi('1')
+    for _ in range(10):
+        assert limiter.reserve(api) == 0.0
@@ -0,0 +1,107 @@
+import httpx
+import pytest
+
+from py115.lowlevel import Client
+from py115.lowlevel.api._base import JsonApiSpec, JsonResult
+from py115.lowlevel.exceptions import ApiException, RetryException
+from py115.lowlevel.retry import RetryPolicy
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    req = httpx.Request('POST', 'https://example.com/')
+    resp = httpx.Response(status, request=req)
+    return httpx.HTTPStatusError('error', request=req, response=resp)
+
+
+def test_backoff_without_jitter():
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0, jitter=0)
+    assert [policy.backoff(n) for n in range(1, 6)] == [
+        0.5, 1.0, 2.0, 3.0, 3.0
+    ]
+
+
+def test_next_delay_stops_at_max_attempts():
+    policy = RetryPolicy(max_attempts=3, jitter=0, deadline=None)
+    state = policy.start()
+    error = httpx.ReadTimeout('timeout')
+    assert state.next_delay(error) == 0.5
+    assert state.next_delay(error) == 1.0
+    assert state.next_delay(error) is None
+    assert state.attempts == 3
+
+
+def test_next_delay_respects_deadline():
+    policy = RetryPolicy(backoff_base=10, jitter=0, deadline=5)
+    assert policy.start().next_delay(httpx.ReadTimeout('timeout')) is None
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (_status_error(503), True),
+    (_status_error(404), False),
+    (httpx.ConnectError('refused'), True),
+    (ApiException(990001), False),
+    (ValueError('bad'), False),
+])
+def test_idempotent_errors(error, retryable):
+    delay = RetryPolicy(jitter=0).start().next_delay(error)
+    assert (delay is not None) == retryable
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (_status_error(503), False),
+    (_status_error(429), True),
+    (httpx.ReadTimeout('timeout'), False),
+    (httpx.RemoteProtocolError('closed'), False),
+    (httpx.ConnectError('refused'), True),
+    (httpx.ConnectTimeout('timeout'), True),
+])
+def test_non_idempotent_errors(error, retryable):
+    delay = RetryPolicy(jitter=0).start(idempotent=False).next_delay(error)
+    assert (delay is not None) == retryable
+
+
+def test_retry_non_idempotent_flag():
+    policy = RetryPolicy(jitter=0, retry_non_idempotent=True)
+    assert policy.start(idempotent=False).next_delay(_status_error(503)) == 0.5
+
+
+def test_retry_exception_counts_attempts():
+    state = RetryPolicy(max_attempts=3).start(idempotent=False)
+    assert state.next_delay(RetryException()) == 0.0
+    assert state.next_delay(RetryException()) == 0.0
+    assert state.next_delay(RetryException()) is None
+
+
+def test_retry_exception_respects_deadline():
+    state = RetryPolicy(deadline=0.0).start()
+    assert state.next_delay(RetryException()) is None
+
+
+class _EndlessRetryApi(JsonApiSpec[None]):
+
+    def __init__(self) -> None:
+        super().__init__('https://example.com/api')
+        self.attempts = 0
+
+    def _get_error_code(self, json_obj: JsonResult) -> int:
+        self.attempts += 1
+        raise RetryException()
+
+    def _parse_json_result(self, json_obj: JsonResult) -> None:
+        return None
+
+
+def test_endless_retry_exception_gives_up():
+    client = Client(transport=httpx.MockTransport(
+        lambda req: httpx.Response(200, json={'state': False})
+    ))
+    spec = _EndlessRetryApi()
+    spec.retry_policy = RetryPolicy(max_attempts=4)
+    with pytest.raises(RetryException):
+        client.call_api(spec)
+    assert spec.attempts == 4
+
+
+def test_retry_error_codes():
+    policy = RetryPolicy(jitter=0, retry_error_codes=frozenset([911]))
+    assert policy.start().next_delay(ApiException(911)) == 0.5
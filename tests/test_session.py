@@ -0,0 +1,48 @@
+import pytest
+
+from py115.cloud import _make_session_data
+from py115.lowlevel.types import CommonParams
+from py115.session import SessionCache, SessionData
+from py115.types import Credential
+
+
+def test_save_and_load(tmp_path):
+    cache = SessionCache(str(tmp_path / 'session.json'))
+    cache.save(SessionData(
+        app_ver='27.0.0', cookies={'UID': '1'}, user_id='1', user_key='k'
+    ))
+    data = cache.load()
+    assert data.app_ver == '27.0.0'
+    assert data.has_user_info()
+
+
+def test_expired_session_is_ignored(tmp_path):
+    path = str(tmp_path / 'session.json')
+    SessionCache(path).save(SessionData(app_ver='27.0.0'))
+    assert SessionCache(path, ttl=-1).load() is None
+
+
+@pytest.mark.parametrize('content', [
+    'not json',
+    '[]',
+    '{"version": 1}',
+    '{"version": 1, "data": {"app_ver": 1}}',
+    '{"version": 1, "data": {"app_ver": "27.0.0", "cookies": "x"}}',
+    '{"version": 1, "data": {"app_ver": "27.0.0", "saved_at": "x"}}',
+    '{"version": 1, "data": {"app_ver": "27.0.0", "unknown": 1}}',
+])
+def test_malformed_file_is_ignored(tmp_path, content):
+    path = tmp_path / 'session.json'
+    path.write_text(content)
+    assert SessionCache(str(path)).load() is None
+
+
+def test_session_data_takes_user_info_from_params():
+    cp = CommonParams('27.0.0')
+    credential = Credential(uid='1', cid='c', kid=None, seid='s')
+    data = _make_session_data(cp, credential)
+    assert data.cookies == {'UID': '1', 'CID': 'c', 'SEID': 's'}
+    assert not data.has_user_info()
+    cp.set_user_info(1, 'key')
+    data = _make_session_data(cp, credential)
+    assert (data.user_id, data.user_key) == ('1', 'key')
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from py115.lowlevel import ApiException
+from py115.lowlevel.api import (
+    DirMakeApi, DownloadApi, FileListApi, UploadInitApi
+)
+from py115.lowlevel.retry import RetryPolicy
+from py115.lowlevel.types import CommonParams
+
+
+def test_idempotent_by_default():
+    assert FileListApi('0').idempotent
+    # POST with a cache key
+    assert DownloadApi('pickcode').idempotent
+    # POST which creates data
+    assert not DirMakeApi('0', 'name').idempotent
+
+
+def test_retry_policy_override():
+    spec = FileListApi('0')
+    assert spec.retry_policy is None
+    policy = RetryPolicy(max_attempts=1)
+    spec.retry_policy = policy
+    assert spec.retry_policy is policy
+
+
+def test_unknown_upload_init_status_raises():
+    cp = CommonParams('27.0.0')
+    cp.set_user_info(1, 'key')
+    spec = UploadInitApi(cp, '0', 'a.bin', 1, 'A' * 40)
+    body = json.dumps({'status': 0, 'statuscode': 0}).encode()
+    with pytest.raises(ApiException):
+        spec.parse_result(body)
@@ -0,0 +1,30 @@
+import time
+
+from py115.cloud import _TokenCache
+from py115.lowlevel.types.upload import UploadToken
+
+
+class _FakeClient:
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def call_api(self, spec):
+        self.calls += 1
+        return UploadToken(
+            access_key_id=f'ak{self.calls}',
+            access_key_secret='secret',
+            security_token='token',
+            expiration=int(time.time()) + 3600
+        )
+
+
+def test_token_is_cached_until_cleared():
+    lac = _FakeClient()
+    tokens = _TokenCache(lac)
+    assert tokens.get().access_key_id == 'ak1'
+    assert tokens.get().access_key_id == 'ak1'
+    # User changed
+    tokens.clear()
+    assert tokens.get().access_key_id == 'ak2'
+    assert lac.calls == 2
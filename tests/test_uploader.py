@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import io
+import os
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qsl
+
+import httpx
+import pytest
+
+from py115.exceptions import UploadError
+from py115.lowlevel.retry import RetryPolicy
+from py115.types import UploadTicket
+from py115.uploader import (
+    AsyncOssUploader, MIN_PART_SIZE, OssUploader,
+    _Checkpoint, _load_checkpoint, _parse_callback_result, _save_checkpoint
+)
+
+
+DATA = os.urandom(MIN_PART_SIZE * 3 + 1000)
+
+
+def _ticket() -> UploadTicket:
+    return UploadTicket(
+        region='', endpoint='', access_key_id='', access_key_secret='',
+        security_token='', bucket_name='bucket', object_key='key',
+        callback='cb', callback_var='cbv', expiration=0
+    )
+
+
+def test_checkpoint_requires_same_file(tmp_path):
+    path = str(tmp_path / 'upload.json')
+    _save_checkpoint(path, _Checkpoint(
+        bucket='bucket', object_key='key', size=100, mtime_ns=1,
+        part_size=10, upload_id='id'
+    ))
+    assert _load_checkpoint(path, _ticket(), 100, 1).upload_id == 'id'
+    assert _load_checkpoint(path, _ticket(), 100, 2) is None
+    assert _load_checkpoint(path, _ticket(), 101, 1) is None
+
+
+def test_callback_failure_raises_upload_error():
+    with pytest.raises(UploadError):
+        _parse_callback_result(httpx.Response(203, text='failed'))
+
+
+class _OssServer:
+    """
+    Stand-in of OSS multipart upload API, it keeps uploads in memory.
+    """
+
+    def __init__(self) -> None:
+        self.uploads = {}
+        self.objects = {}
+        self.calls = []
+        # Part number or request name mapped to errors to raise in order.
+        self.failures = {}
+
+    def _fail(self, key):
+        errors = self.failures.get(key)
+        if errors:
+            error = errors.pop(0)
+            if isinstance(error, Exception):
+                raise error
+            return httpx.Response(error)
+        return None
+
+    def __call__(self, req: httpx.Request) -> httpx.Response:
+        assert req.headers['Authorization'].startswith('OSS ')
+        query = dict(parse_qsl(req.url.query.decode(), keep_blank_values=True))
+        if req.method == 'POST' and 'uploads' in query:
+            self.calls.append('initiate')
+            upload_id = f'upload-{len(self.uploads) + 1}'
+            self.uploads[upload_id] = {}
+            return httpx.Response(200, content=(
+                '<InitiateMultipartUploadResult><UploadId>'
+                f'{upload_id}</UploadId></InitiateMultipartUploadResult>'
+            ).encode())
+        if req.method == 'PUT' and 'partNumber' in query:
+            number = int(query['partNumber'])
+            self.calls.append(('part', number))
+            error = self._fail(number)
+            if error is not None:
+                return error
+            parts = self.uploads.get(query['uploadId'])
+            if parts is None:
+                return httpx.Response(404)
+            etag = '"%s"' % hashlib.md5(req.content).hexdigest().upper()
+            parts[number] = (req.content, etag)
+            return httpx.Response(200, headers={'ETag': etag})
+        if req.method == 'GET':
+            self.calls.append('list')
+            parts = self.uploads.get(query['uploadId'])
+            if parts is None:
+                return httpx.Response(404)
+            # Two parts per page, to walk through pagination.
+            marker = int(query.get('part-number-marker', 0))
+            numbers = sorted(n for n in parts if n > marker)
+            page = numbers[:2]
+            return httpx.Response(200, content=(
+                '<ListPartsResult><IsTruncated>%s</IsTruncated>'
+                '<NextPartNumberMarker>%d</NextPartNumberMarker>%s'
+                '</ListPartsResult>' % (
+                    str(len(numbers) > 2).lower(), page[-1] if page else 0,
+                    ''.join(
+                        f'<Part><PartNumber>{n}</PartNumber><Size>'
+                        f'{len(parts[n][0])}</Size><ETag>{parts[n][1]}'
+                        '</ETag></Part>' for n in page
+                    )
+                )
+            ).encode())
+        if req.method == 'POST':
+            self.calls.append('complete')
+            error = self._fail('complete')
+            if error is not None:
+                return error
+            assert req.headers['x-oss-callback'] == 'cb'
+            parts = self.uploads.pop(query['uploadId'])
+            data = b''
+            for el in ET.fromstring(req.content).iter('Part'):
+                content, etag = parts[int(el.findtext('PartNumber'))]
+                assert etag == el.findtext('ETag')
+                data += content
+            self.objects['key'] = data
+            return httpx.Response(200, json={'state': True})
+        if req.method == 'PUT':
+            self.calls.append('put')
+            error = self._fail('put')
+            if error is not None:
+                return error
+            assert req.headers['x-oss-callback'] == 'cb'
+            self.objects['key'] = req.content
+            return httpx.Response(200, json={'state': True})
+        if req.method == 'DELETE':
+            self.calls.append('abort')
+            self.uploads.pop(query['uploadId'], None)
+            return httpx.Response(204)
+        return httpx.Response(400)
+
+
+def _uploader(server: _OssServer, max_attempts: int = 5) -> OssUploader:
+    return OssUploader(
+        concurrency=2, part_size=MIN_PART_SIZE,
+        retry_policy=RetryPolicy(
+            max_attempts=max_attempts, backoff_base=0, deadline=None
+        ),
+        endpoint='http://oss.example', path_style=True,
+        transport=httpx.MockTransport(server)
+    )
+
+
+def _write_data(tmp_path) -> str:
+    path = str(tmp_path / 'data.bin')
+    with open(path, 'wb') as fp:
+        fp.write(DATA)
+    return path
+
+
+def test_multipart_upload(tmp_path):
+    server = _OssServer()
+    with _uploader(server) as uploader, \
+        open(_write_data(tmp_path), 'rb') as fp:
+        assert uploader.upload(_ticket(), fp) == {'state': True}
+    assert server.objects['key'] == DATA
+    assert server.calls.count('initiate') == 1
+    assert sorted(c[1] for c in server.calls if c[0] == 'part') == [1, 2, 3, 4]
+
+
+def test_interrupted_upload_resumes_from_checkpoint(tmp_path):
+    path, checkpoint = _write_data(tmp_path), str(tmp_path / 'cp.json')
+    server = _OssServer()
+    server.failures[3] = [500]
+    with _uploader(server, max_attempts=1) as uploader, \
+        open(path, 'rb') as fp:
+        with pytest.raises(httpx.HTTPStatusError):
+            uploader.upload(_ticket(), fp, checkpoint=checkpoint)
+    # Upload is kept for resuming, not aborted
+    assert 'abort' not in server.calls
+    assert os.path.exists(checkpoint)
+    done = set(c[1] for c in server.calls if c[0] == 'part') - {3}
+    server.calls.clear()
+    with _uploader(server) as uploader, open(path, 'rb') as fp:
+        uploader.upload(_ticket(), fp, checkpoint=checkpoint)
+    assert server.objects['key'] == DATA
+    assert 'initiate' not in server.calls
+    assert 'list' in server.calls
+    resent = set(c[1] for c in server.calls if c[0] == 'part')
+    assert resent == {1, 2, 3, 4} - done
+    assert not os.path.exists(checkpoint)
+
+
+def test_part_is_retried(tmp_path):
+    server = _OssServer()
+    server.failures[2] = [503, httpx.ReadTimeout('timeout')]
+    with _uploader(server) as uploader, \
+        open(_write_data(tmp_path), 'rb') as fp:
+        uploader.upload(_ticket(), fp)
+    assert server.objects['key'] == DATA
+    assert server.calls.count(('part', 2)) == 3
+
+
+def test_callback_requests_are_not_retried(tmp_path):
+    server = _OssServer()
+    server.failures['complete'] = [httpx.ReadTimeout('timeout')]
+    with _uploader(server) as uploader, \
+        open(_write_data(tmp_path), 'rb') as fp:
+        with pytest.raises(httpx.ReadTimeout):
+            uploader.upload(_ticket(), fp)
+    assert server.calls.count('complete') == 1
+    server = _OssServer()
+    server.failures['put'] = [503]
+    with _uploader(server) as uploader:
+        with pytest.raises(httpx.HTTPStatusError):
+            uploader.upload(_ticket(), io.BytesIO(b'small'))
+    assert server.calls == ['put']
+
+
+def test_async_multipart_upload(tmp_path):
+    server = _OssServer()
+    server.failures[2] = [500]
+
+    async def run():
+        async with AsyncOssUploader(
+            concurrency=2, part_size=MIN_PART_SIZE,
+            retry_policy=RetryPolicy(backoff_base=0, deadline=None),
+            endpoint='http://oss.example', path_style=True,
+            transport=httpx.MockTransport(server)
+        ) as uploader:
+            with open(_write_data(tmp_path), 'rb') as fp:
+                return await uploader.upload(_ticket(), fp)
+
+    assert asyncio.run(run()) == {'state': True}
+    assert server.objects['key'] == DATA
+    assert server.calls.count(('part', 2)) == 2